@@ -27,10 +27,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'recommendox.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'recommendox.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -56,13 +57,140 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'recommendation_project.wsgi.application'
 
+# SQLite tuned for multi-worker use: WAL lets readers run alongside the
+# single writer, IMMEDIATE transactions take the write lock up front, and
+# busy_timeout makes writers wait instead of failing with "database is locked".
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+]
+SQLITE_WRITE_RETRIES = 5
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+        # File-backed (not in-memory) so the sqlite_stress test can fork writers against it
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Read replicas, e.g. RECOMMENDOX_REPLICAS="db_replica1.sqlite3,db_replica2.sqlite3".
+# Locally, `manage.py sync_replicas` copies the primary into each file.
+DATABASE_REPLICAS = []
+for index, replica_name in enumerate(filter(None, os.environ.get('RECOMMENDOX_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / replica_name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['recommendox.routers.PrimaryReplicaRouter']
+
+# Local-memory cache by default; point this at Redis/Memcached when running
+# several workers so invalidations (e.g. role changes) reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recommendox',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+REPLICA_MAX_LAG_SECONDS = 30
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+REPLICA_PIN_SECONDS = 10
+
+# Trending: events decay with this half-life and drop out after the window
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_DAYS = 7
+TRENDING_SIZE = 50
+TRENDING_REFRESH_SECONDS = 60
+TRENDING_FLUSH_SECONDS = 15  # how often each worker writes its buffered event counts
+
+# Top-rated boards: Bayesian prior weight and how often each worker rebuilds them
+LEADERBOARD_PRIOR_VOTES = 5
+LEADERBOARD_REFRESH_SECONDS = 60
+
+# In-memory facet bitsets are patched on writes and fully rebuilt this often per worker
+CATALOG_INDEX_REFRESH_SECONDS = 300
+
+# How many recommendations precompute_recommendations stores per user
+RECOMMENDATION_COUNT = 12
+
+# Cold-start top lists per (genre, language) segment and how long each stays fresh
+SEGMENT_SIZE = 30
+SEGMENT_REFRESH_SECONDS = 600
+
+# Dashboard hybrid ranker: overall latency budget, per-source budgets (ms) and
+# how long a source's last good result is kept as its fallback
+RANKER_BUDGET_MS = 150
+RANKER_SOURCE_BUDGETS_MS = {
+    'collaborative': 40,
+    'similar': 100,
+    'trending': 30,
+    'segments': 30,
+    'critics': 30,
+}
+RANKER_CACHE_SECONDS = 900
+RANKER_THREADS = 8
+
+# Content similarity (hashed TF-IDF + LSH) index file; workers reload it when it changes
+SIMILARITY_INDEX_PATH = BASE_DIR / 'similarity_index.npz'
+SIMILARITY_RELOAD_SECONDS = 10
+
+# User x content confidence matrix (sparse CSR + COO components) built from ratings, watchlists, reviews and views
+FEEDBACK_MATRIX_PATH = BASE_DIR / 'feedback_matrix.npz'
+
+# Raw interaction events: one append-only file per UTC day, dropped after the retention window
+EVENT_LOG_DIR = BASE_DIR / 'events'
+EVENT_RETENTION_DAYS = 14
+EVENT_FLUSH_SIZE = 200
+EVENT_FLUSH_SECONDS = 5
+
+# Recommendation impressions and clicks: same batched day-file format, kept longer for A/B reads
+IMPRESSION_LOG_DIR = BASE_DIR / 'impressions'
+IMPRESSION_RETENTION_DAYS = 30
+# A/B split per surface: variant -> percentage of visitors (bucketed by user or visitor cookie)
+RECOMMENDATION_VARIANTS = {
+    'dashboard': {'hybrid': 90, 'popular': 10},
+    'home': {'trending': 100},
+}
+
+# How many recently viewed titles the signed cookie keeps
+RECENTLY_VIEWED_SIZE = 10
+
+# Home/dashboard feed composer: per-section deadlines (ms, from the start of the request),
+# how long a section's last fragment outlives its ttl as a fallback, and the pool size
+FEED_DEFAULT_TIMEOUT_MS = 200
+FEED_SECTION_TIMEOUTS_MS = {
+    'home_genres': 150,
+    'home_because': 200,
+    'home_trending': 200,
+    'home_recent': 150,
+    'dashboard_stats': 150,
+    'dashboard_recommendations': 300,
+    'dashboard_watchlist': 150,
+    'dashboard_ratings': 150,
+}
+FEED_STALE_SECONDS = 3600
+FEED_THREADS = 16
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
@@ -93,6 +221,23 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Posters are stored by digest with resized variants; swap the backend here
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'posters': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': os.path.join(MEDIA_ROOT, 'posters'),
+            'base_url': MEDIA_URL + 'posters/',
+        },
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ===== ALLAUTH SETTINGS - PURE GOOGLE LOGIN =====
 SITE_ID = 1
@@ -2,8 +2,10 @@
 from django.contrib import admin
 from .models import (
     Content, Season, Episode, UserProfile, GoldenUser, 
-    Watchlist, Rating, Review, Analytics, Message, Reviewer, ContentOTT, ContentCreator
+    Watchlist, Rating, Review, Analytics, Message, Reviewer, ContentOTT, ContentCreator, MediaBlob, PosterImage, SiteStats,
+    CatalogRollup
 )
+from .rollups import rebuild_catalog_rollups
 
 @admin.register(Content)
 class ContentAdmin(admin.ModelAdmin):
@@ -11,16 +13,19 @@ class ContentAdmin(admin.ModelAdmin):
     list_filter = ('content_type', 'genre', 'language')
     search_fields = ('title', 'description', 'director', 'cast')
     ordering = ('-created_at',)
+    raw_id_fields = ('poster',)
 
 @admin.register(Season)
 class SeasonAdmin(admin.ModelAdmin):
-    list_display = ('id', 'content', 'season_number', 'title')
+    list_display = ('id', 'content', 'season_number', 'title', 'episode_count', 'total_duration')
     list_filter = ('content',)
+    list_select_related = ('content',)
 
 @admin.register(Episode)
 class EpisodeAdmin(admin.ModelAdmin):
     list_display = ('id', 'season', 'episode_number', 'title', 'duration')
     list_filter = ('season__content',)
+    list_select_related = ('season__content',)
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -65,18 +70,28 @@ class GoldenUserAdmin(admin.ModelAdmin):
     
     actions = ['verify_selected', 'reject_selected']
     
+    def invalidate_owners(self, queryset):
+        # queryset.update() skips signals, so drop cached user bundles here
+        from .auth_cache import invalidate_user_bundle
+        for user_id in queryset.values_list('user_profile__user_id', flat=True):
+            invalidate_user_bundle(user_id)
+    
     def verify_selected(self, request, queryset):
         from django.utils import timezone
+        self.invalidate_owners(queryset)
         queryset.update(
             verification_status='Verified',
             verified_at=timezone.now(),
             verified_by=request.user
         )
+        SiteStats.reconcile()
         self.message_user(request, f"{queryset.count()} Golden Users verified.")
     verify_selected.short_description = "Verify selected Golden Users"
     
     def reject_selected(self, request, queryset):
+        self.invalidate_owners(queryset)
         queryset.update(verification_status='Rejected')
+        SiteStats.reconcile()
         self.message_user(request, f"{queryset.count()} Golden Users rejected.")
     reject_selected.short_description = "Reject selected Golden Users"
 
@@ -99,6 +114,7 @@ class ReviewAdmin(admin.ModelAdmin):
     
     def approve_reviews(self, request, queryset):
         queryset.update(is_approved=True)
+        SiteStats.reconcile()
         self.message_user(request, f"{queryset.count()} reviews approved.")
     approve_reviews.short_description = "Approve selected reviews"
     
@@ -131,4 +147,36 @@ class ContentOTTAdmin(admin.ModelAdmin):
 class ContentCreatorAdmin(admin.ModelAdmin):
     list_display = ('id', 'user_profile', 'is_active', 'verified_at', 'total_contents_added')
     list_filter = ('is_active',)
-    search_fields = ('user_profile__user__username',)
\ No newline at end of file
+    search_fields = ('user_profile__user__username',)
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'size', 'ref_count', 'created_at')
+    search_fields = ('name', 'digest')
+    readonly_fields = ('name', 'digest', 'size', 'ref_count', 'created_at')
+
+@admin.register(PosterImage)
+class PosterImageAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'width', 'height', 'original_size', 'created_at')
+    readonly_fields = ('digest', 'width', 'height', 'original_size', 'created_at')
+
+@admin.register(SiteStats)
+class SiteStatsAdmin(admin.ModelAdmin):
+    list_display = ('id', 'total_users', 'total_content', 'total_reviews', 'pending_reviews', 'golden_pending', 'reconciled_at')
+    actions = ['reconcile_now']
+    
+    def reconcile_now(self, request, queryset):
+        SiteStats.reconcile()
+        self.message_user(request, "Site stats recounted.")
+    reconcile_now.short_description = "Recount from source tables"
+
+@admin.register(CatalogRollup)
+class CatalogRollupAdmin(admin.ModelAdmin):
+    list_display = ('dimension', 'value', 'content_count', 'rating_count', 'rating_sum', 'views_sum')
+    list_filter = ('dimension',)
+    actions = ['rebuild_rollups']
+    
+    def rebuild_rollups(self, request, queryset):
+        drift = rebuild_catalog_rollups()
+        self.message_user(request, f"Catalog rollups rebuilt ({len(drift)} row(s) changed).")
+    rebuild_rollups.short_description = "Recount all rollups from source tables"
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RecommendoxConfig(AppConfig):
     name = 'recommendox'
+
+    def ready(self):
+        from . import signals  # noqa: F401
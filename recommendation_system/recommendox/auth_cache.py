@@ -0,0 +1,48 @@
+# recommendox/auth_cache.py
+import time
+
+from django.contrib import auth
+from django.core.cache import cache
+
+USER_BUNDLE_TIMEOUT = 60 * 5
+
+
+def bundle_version(user_id):
+    """Per-user stamp; changing it orphans every cached bundle for that user"""
+    key = f'user_bundle_version:{user_id}'
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_user_bundle(user_id):
+    cache.set(f'user_bundle_version:{user_id}', time.time_ns(), None)
+
+
+def load_user_bundle(request):
+    """
+    The request's user with profile and role relations attached, cached
+    per session. A cache hit costs no queries; role changes and user
+    edits bump the version (see signals) so the next request reloads.
+    """
+    user_id = request.session.get(auth.SESSION_KEY)
+    if user_id is None:
+        return auth.get_user(request)
+    
+    key = f'user_bundle:{request.session.session_key}:{bundle_version(user_id)}'
+    user = cache.get(key)
+    if user is not None:
+        return user
+    
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        from .models import UserProfile
+        profile = UserProfile.objects.select_related(
+            'reviewer_profile', 'creator_profile', 'golden_profile'
+        ).filter(user=user).first()
+        if profile is not None:
+            user.profile = profile
+        cache.set(key, user, USER_BUNDLE_TIMEOUT)
+    return user
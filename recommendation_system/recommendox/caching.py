@@ -0,0 +1,160 @@
+# recommendox/caching.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize=1024, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key inside this process: the
+    first caller runs the function, the others wait for its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'event': threading.Event(), 'result': None, 'error': None}
+
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except BaseException as exc:
+            call['error'] = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+
+
+_flights = SingleFlight()
+
+
+def cache_get_or_load(key, loader, timeout, lock_timeout=10, wait=0.05):
+    """
+    Read `key` from the shared cache, loading it at most once on a miss.
+    Threads in this process share one load (SingleFlight); other workers
+    take a short cache.add() lock and wait for the winner's result.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    def load():
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'lock:{key}'
+        acquired = cache.add(lock_key, 1, lock_timeout)
+        if not acquired:
+            # Another worker is loading; wait for its result, then give up and load
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(wait)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+        try:
+            value = loader()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+    return _flights.do(key, load)
+
+
+def _refresh_in_background(key, compute, ttl, stale_ttl, lock_key):
+    from django.db import connections
+
+    def run():
+        try:
+            store_computation(key, compute(), ttl, stale_ttl)
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=run, name=f'refresh:{key}', daemon=True).start()
+
+
+def store_computation(key, value, ttl, stale_ttl):
+    cache.set(key, (time.time() + ttl, value), ttl + stale_ttl)
+    return value
+
+
+def shared_computation(key, compute, ttl=60, stale_ttl=300, lock_timeout=30):
+    """
+    Dogpile-safe cache for expensive results shared by many users.
+    Fresh hits are returned as is. After `ttl` the stale value keeps being
+    served for up to `stale_ttl` while one worker (whoever wins the
+    cache.add() lock) recomputes it in the background. A cold miss is
+    computed once across threads and workers; everyone else waits for it.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, value = entry
+        if fresh_until < time.time():
+            lock_key = f'lock:refresh:{key}'
+            if cache.add(lock_key, 1, lock_timeout):
+                _refresh_in_background(key, compute, ttl, stale_ttl, lock_key)
+        return value
+
+    entry = cache_get_or_load(
+        key, lambda: (time.time() + ttl, compute()), ttl + stale_ttl, lock_timeout=lock_timeout
+    )
+    return entry[1]
@@ -0,0 +1,159 @@
+# recommendox/catalog_index.py
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Content, ContentOTT
+
+# Filterable facets; 'ott' and 'free' have the single value True, 'decade' looks like '2010s'
+FACETS = ('genre', 'language', 'content_type', 'platform', 'ott', 'free', 'decade')
+ORDERINGS = {
+    'newest': (lambda meta: meta[0], True),
+    'oldest': (lambda meta: meta[0], False),
+    'title_asc': (lambda meta: meta[1], False),
+    'title_desc': (lambda meta: meta[1], True),
+}
+
+
+def decade_of(release_date):
+    return f'{release_date.year // 10 * 10}s' if release_date else None
+
+
+def popcount(bits):
+    return bits.bit_count()
+
+
+def members(bits):
+    """Content ids set in `bits`, lowest first"""
+    digits = bin(bits)[:1:-1]
+    index = digits.find('1')
+    while index != -1:
+        yield index
+        index = digits.find('1', index + 1)
+
+
+def bits_of(ids):
+    bits = 0
+    for content_id in ids:
+        bits |= 1 << content_id
+    return bits
+
+
+class CatalogIndex:
+    """
+    One bitset (a Python int, bit n = content id n) per facet value. A
+    filter combination is a bitwise AND and a facet count is a popcount,
+    so browsing never joins OTT rows or runs DISTINCT. Built on first use
+    in each worker, patched in place by Content/ContentOTT signals and
+    rebuilt every CATALOG_INDEX_REFRESH_SECONDS to catch other workers'
+    writes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bits = defaultdict(int)
+        self._all = 0
+        self._keys = {}
+        self._meta = {}  # content id -> (release_date, title) for in-memory ordering
+        self._orders = {}
+        self._built_at = None
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > settings.CATALOG_INDEX_REFRESH_SECONDS
+
+    def rebuild(self):
+        rows = Content.objects.values_list('id', 'genre', 'language', 'content_type', 'release_date', 'title')
+        otts = defaultdict(list)
+        for content_id, platform, is_free in ContentOTT.objects.values_list('content_id', 'platform_name', 'is_free'):
+            otts[content_id].append((platform, is_free))
+
+        with self._lock:
+            self._bits, self._all, self._keys, self._meta, self._orders = defaultdict(int), 0, {}, {}, {}
+            for content_id, genre, language, content_type, release_date, title in rows:
+                self._place(content_id, genre, language, content_type, release_date, title, otts[content_id])
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self._stale():
+            self.rebuild()
+
+    def _place(self, content_id, genre, language, content_type, release_date, title, otts):
+        keys = {
+            ('genre', genre), ('language', language), ('content_type', content_type),
+            ('decade', decade_of(release_date)),
+        }
+        keys |= {('platform', platform) for platform, _ in otts}
+        if otts:
+            keys.add(('ott', True))
+        if any(is_free for _, is_free in otts):
+            keys.add(('free', True))
+        keys = {key for key in keys if key[1]}
+
+        bit = 1 << content_id
+        for key in self._keys.get(content_id, set()) - keys:
+            self._bits[key] &= ~bit
+        for key in keys:
+            self._bits[key] |= bit
+        self._all |= bit
+        self._keys[content_id] = keys
+        self._meta[content_id] = (release_date, title)
+        self._orders = {}
+
+    def refresh_content(self, content_id):
+        """Re-index one title after a Content or ContentOTT change"""
+        if self._built_at is None:
+            return
+        row = Content.objects.filter(pk=content_id).values_list(
+            'genre', 'language', 'content_type', 'release_date', 'title'
+        ).first()
+        otts = list(ContentOTT.objects.filter(content_id=content_id).values_list('platform_name', 'is_free'))
+        with self._lock:
+            if row is None:
+                bit = 1 << content_id
+                for key in self._keys.pop(content_id, ()):
+                    self._bits[key] &= ~bit
+                self._all &= ~bit
+                self._meta.pop(content_id, None)
+                self._orders = {}
+                return
+            self._place(content_id, *row, otts)
+
+    def match(self, filters, skip=None):
+        """Bitset of titles passing every filter (except facet `skip`)"""
+        self.ensure_fresh()
+        with self._lock:
+            bits = self._all
+            for facet, value in filters.items():
+                if value and facet != skip:
+                    bits &= self._bits.get((facet, value), 0)
+            return bits
+
+    def facet_counts(self, facet, filters, mask=-1):
+        """[{'value', 'count'}] for one facet under the other active filters (and `mask`)"""
+        base = self.match(filters, skip=facet) & mask
+        with self._lock:
+            counts = [
+                {'value': value, 'count': popcount(base & bits)}
+                for (name, value), bits in self._bits.items() if name == facet
+            ]
+        return sorted((c for c in counts if c['count']), key=lambda c: str(c['value']))
+
+    def count(self, filters):
+        return popcount(self.match(filters))
+
+    def ordered_ids(self, bits, order='newest'):
+        """Matching ids in listing order, sorted from the in-memory metadata"""
+        key, reverse = ORDERINGS.get(order, ORDERINGS['newest'])
+        with self._lock:
+            ordering = self._orders.get(order)
+            if ordering is None:
+                ordering = self._orders[order] = sorted(
+                    self._meta, key=lambda content_id: (key(self._meta[content_id]), content_id), reverse=reverse
+                )
+        wanted = set(members(bits))
+        return [content_id for content_id in ordering if content_id in wanted]
+
+
+catalog_index = CatalogIndex()
@@ -0,0 +1,105 @@
+# recommendox/content_cache.py
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .caching import LRUCache, cache_get_or_load
+from .models import Content
+
+# L1: per-process, very short TTL so other workers' edits show up quickly
+_local = LRUCache(
+    maxsize=getattr(settings, 'CONTENT_L1_SIZE', 2048),
+    ttl=getattr(settings, 'CONTENT_L1_TTL', 5),
+)
+CONTENT_L2_TIMEOUT = getattr(settings, 'CONTENT_L2_TIMEOUT', 60 * 10)
+# Counters get their own short-lived L2 entry; rating/season signals drop it via invalidate_content
+CONTENT_COUNTERS_TTL = getattr(settings, 'CONTENT_COUNTERS_TTL', 5)
+
+_FIELDS = [f.attname for f in Content._meta.concrete_fields]
+# Counters move on every view/rating through F() updates, so they are kept out of the versioned row
+_CACHED_FIELDS = [name for name in _FIELDS if name not in Content.COUNTER_FIELDS]
+
+
+def _version_key(content_id):
+    return f'content_version:{content_id}'
+
+
+def _row_key(content_id, version):
+    return f'content_row:{content_id}:{version}'
+
+
+def _counters_key(content_id):
+    return f'content_counters:{content_id}'
+
+
+def _load_counters(content_id):
+    return Content.objects.filter(pk=content_id).values_list(*Content.COUNTER_FIELDS).first()
+
+
+def _load_row(content_id):
+    return Content.objects.filter(pk=content_id).values_list(*_CACHED_FIELDS).first()
+
+
+def _load_and_publish(content_id):
+    """Load the row, store it under its updated_at version and return that version"""
+    row = _load_row(content_id)
+    if row is None:
+        return None
+    version = row[_CACHED_FIELDS.index('updated_at')].isoformat()
+    cache.set(_row_key(content_id, version), row, CONTENT_L2_TIMEOUT)
+    return version
+
+
+def get_content(content_id):
+    """
+    Content by id through L1 (in-process LRU) then L2 (shared cache),
+    with one DB query per miss no matter how many requests are waiting.
+    L2 rows are versioned on updated_at. COUNTER_FIELDS are left out of
+    the row and cached on their own for CONTENT_COUNTERS_TTL seconds:
+    rating and season changes drop that entry at once, views_count may
+    lag by up to the ttl. Every call returns a fresh instance, so callers
+    may mutate it.
+    """
+    try:
+        content_id = int(content_id)
+    except (TypeError, ValueError):
+        return None
+    
+    row = _local.get(content_id)
+    if row is None:
+        version = cache_get_or_load(
+            _version_key(content_id), lambda: _load_and_publish(content_id), CONTENT_L2_TIMEOUT
+        )
+        if version is None:
+            return None
+        row = cache_get_or_load(
+            _row_key(content_id, version), lambda: _load_row(content_id), CONTENT_L2_TIMEOUT
+        )
+        if row is None:
+            return None
+        _local.set(content_id, row)
+    
+    counters = cache_get_or_load(
+        _counters_key(content_id), lambda: _load_counters(content_id), CONTENT_COUNTERS_TTL
+    )
+    if counters is None:
+        return None
+    values = {**dict(zip(_CACHED_FIELDS, row)), **dict(zip(Content.COUNTER_FIELDS, counters))}
+    return Content.from_db('default', _FIELDS, [values[name] for name in _FIELDS])
+
+
+def get_content_or_404(content_id):
+    content = get_content(content_id)
+    if content is None:
+        raise Http404("No Content matches the given query.")
+    return content
+
+
+def invalidate_content(content_id):
+    """Drop a content row from L1 and L2; called from post_save/post_delete"""
+    version = cache.get(_version_key(content_id))
+    keys = [_version_key(content_id), _counters_key(content_id)]
+    if version is not None:
+        keys.append(_row_key(content_id, version))
+    cache.delete_many(keys)
+    _local.pop(int(content_id))
@@ -0,0 +1,72 @@
+# recommendox/db.py
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+# One writer at a time per process; other processes wait on SQLite's busy_timeout
+_write_lock = threading.Lock()
+_owner = threading.local()  # depth of sqlite_write calls running in this thread
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+@contextmanager
+def _owning():
+    _owner.depth = getattr(_owner, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _owner.depth -= 1
+
+
+def sqlite_write(func=None, *, using='default', retries=None):
+    """
+    Run a write inside transaction.atomic(), serialized within the process
+    and retried with jittered backoff if SQLite still reports a lock.
+    A no-op wrapper (just atomic) on other database backends.
+    """
+    if func is None:
+        return functools.partial(sqlite_write, using=using, retries=retries)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connections[using].vendor != 'sqlite':
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+
+        if getattr(_owner, 'depth', 0):
+            # Nested in another sqlite_write of this thread: it holds the lock and the transaction
+            return func(*args, **kwargs)
+
+        if connections[using].in_atomic_block:
+            # A transaction the caller opened can't be retried from in here. It already holds
+            # SQLite's write lock (IMMEDIATE transactions), so take the process lock only if
+            # it is free: a thread holding it may be waiting on ours.
+            locked = _write_lock.acquire(blocking=False)
+            try:
+                with _owning(), transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            finally:
+                if locked:
+                    _write_lock.release()
+
+        attempts = retries if retries is not None else getattr(settings, 'SQLITE_WRITE_RETRIES', 5)
+        delay = 0.05
+        for attempt in range(attempts + 1):
+            try:
+                with _write_lock, _owning(), transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_locked_error(exc) or attempt == attempts:
+                    raise
+            time.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 1.0)
+    return wrapper
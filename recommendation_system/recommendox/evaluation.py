@@ -0,0 +1,270 @@
+# recommendox/evaluation.py
+import json
+import math
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from .leaderboards import bayesian_rating
+from .models import Content, Rating, Watchlist
+from .recommender import item_arrays, recommend
+
+# A held-out interaction counts as relevant if it is a rating of at least this, or a watchlist add
+RELEVANT_RATING = 4
+# Content fields the similarity index is built from
+TEXT_FIELDS = ('description', 'cast', 'director', 'genre', 'language')
+
+
+def load_texts(content_ids=None):
+    rows = Content.objects.order_by('id')
+    if content_ids is not None:
+        rows = rows.filter(pk__in=content_ids)
+    return [tuple(row) for row in rows.values_list('id', *TEXT_FIELDS)]
+
+
+class Snapshot:
+    """Frozen copy of the catalogue and of every Rating/Watchlist row, as plain tuples"""
+
+    def __init__(self, catalog, ratings, watchlist, texts=None):
+        self.catalog = catalog  # [(id, genre, language, content_type)]
+        self.ratings = ratings  # [(user_id, content_id, value, timestamp)]
+        self.watchlist = watchlist  # [(user_id, content_id, timestamp)]
+        self.texts = texts  # [(id, description, cast, director, genre, language)] for the similarity index
+
+    @classmethod
+    def from_database(cls):
+        return cls(
+            [tuple(row) for row in Content.objects.order_by('id').values_list('id', 'genre', 'language', 'content_type')],
+            [(u, c, v, d.timestamp()) for u, c, v, d in
+             Rating.objects.values_list('user_id', 'content_id', 'rating_value', 'rating_date')],
+            [(u, c, d.timestamp()) for u, c, d in Watchlist.objects.values_list('user_id', 'content_id', 'added_at')],
+            load_texts(),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Snapshots saved before texts were recorded read them from the database for their titles"""
+        with open(path) as f:
+            data = json.load(f)
+        snapshot = cls(*([tuple(row) for row in data[key]] for key in ('catalog', 'ratings', 'watchlist')))
+        if 'texts' in data:
+            snapshot.texts = [tuple(row) for row in data['texts']]
+        else:
+            snapshot.texts = load_texts([row[0] for row in snapshot.catalog])
+        return snapshot
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'catalog': self.catalog, 'ratings': self.ratings, 'watchlist': self.watchlist, 'texts': self.texts,
+            }, f)
+
+    def split(self, train_fraction=0.8):
+        """Temporal split at the timestamp below which `train_fraction` of interactions fall"""
+        stamps = sorted([r[3] for r in self.ratings] + [w[2] for w in self.watchlist])
+        if not stamps:
+            return self, {}, 0.0
+        cutoff = stamps[min(int(len(stamps) * train_fraction), len(stamps) - 1)]
+        train = Snapshot(
+            self.catalog,
+            [r for r in self.ratings if r[3] < cutoff],
+            [w for w in self.watchlist if w[2] < cutoff],
+            self.texts,
+        )
+        relevant = defaultdict(set)
+        for user_id, content_id, value, stamp in self.ratings:
+            if stamp >= cutoff and value >= RELEVANT_RATING:
+                relevant[user_id].add(content_id)
+        for user_id, content_id, stamp in self.watchlist:
+            if stamp >= cutoff:
+                relevant[user_id].add(content_id)
+        return train, dict(relevant), cutoff
+
+    def seen(self):
+        seen = defaultdict(set)
+        for user_id, content_id, *_ in self.ratings:
+            seen[user_id].add(content_id)
+        for user_id, content_id, _ in self.watchlist:
+            seen[user_id].add(content_id)
+        return seen
+
+    def rating_totals(self):
+        totals = defaultdict(lambda: [0, 0])
+        for _, content_id, value, _ in self.ratings:
+            totals[content_id][0] += 1
+            totals[content_id][1] += value
+        return totals
+
+
+# RECOMMENDERS
+class Recommender:
+    """fit() on a training Snapshot, then recommend(user_id, k) -> [content ids]"""
+    name = ''
+
+    def fit(self, train):
+        self.seen = train.seen()
+        totals = train.rating_totals()
+        count = sum(n for n, _ in totals.values())
+        mean = sum(s for _, s in totals.values()) / count if count else 0.0
+        self.scores = {
+            content_id: bayesian_rating(*totals.get(content_id, (0, 0)), mean, settings.LEADERBOARD_PRIOR_VOTES)
+            for content_id, *_ in train.catalog
+        }
+        self.popular = sorted(self.scores, key=lambda cid: (-self.scores[cid], cid))
+
+    def top_popular(self, k, exclude):
+        return [cid for cid in self.popular if cid not in exclude][:max(k, 0)]
+
+
+class PopularityRecommender(Recommender):
+    """Everyone gets the best Bayesian-rated titles they have not seen"""
+    name = 'popularity'
+
+    def recommend(self, user_id, k):
+        return self.top_popular(k, self.seen.get(user_id, set()))
+
+
+class GenreHeuristicRecommender(Recommender):
+    """The dashboard heuristic: 3 titles from each of the user's 2 favourite genres, then popular"""
+    name = 'genre_heuristic'
+
+    def fit(self, train):
+        super().fit(train)
+        self.genres = {content_id: genre for content_id, genre, *_ in train.catalog}
+        self.likes = defaultdict(Counter)
+        for user_id, content_id, value, _ in train.ratings:
+            if value >= 4:
+                self.likes[user_id][self.genres.get(content_id)] += value
+        self.by_genre = defaultdict(list)
+        for content_id in self.popular:
+            self.by_genre[self.genres[content_id]].append(content_id)
+
+    def recommend(self, user_id, k):
+        exclude = set(self.seen.get(user_id, ()))
+        picks = []
+        for genre, _ in self.likes[user_id].most_common(2):
+            for content_id in [cid for cid in self.by_genre[genre] if cid not in exclude][:3]:
+                picks.append(content_id)
+                exclude.add(content_id)
+        return (picks + self.top_popular(k - len(picks), exclude))[:k]
+
+
+class FeatureModelRecommender(Recommender):
+    """The precompute_recommendations model (taste vector over genre/language/type + prior)"""
+    name = 'feature_model'
+
+    def fit(self, train):
+        super().fit(train)
+        totals = train.rating_totals()
+        rows = [(cid, g, l, t, *totals.get(cid, (0, 0))) for cid, g, l, t in sorted(train.catalog)]
+        self.item_ids, self.features, self.prior = item_arrays(rows, settings.LEADERBOARD_PRIOR_VOTES)
+        self.signals = defaultdict(dict)
+        for user_id, content_id, value, _ in train.ratings:
+            self.signals[user_id][content_id] = value - 3.0
+        for user_id, content_id, _ in train.watchlist:
+            self.signals[user_id].setdefault(content_id, 1.0)
+
+    def recommend(self, user_id, k):
+        return recommend(self.item_ids, self.features, self.prior, self.signals.get(user_id, {}), k)[0]
+
+
+class ContentSimilarityRecommender(Recommender):
+    """
+    Neighbours of the user's liked titles from a TF-IDF/LSH similarity
+    index built here over the titles with training interactions only, so
+    neither test-period titles nor their document frequencies leak in
+    (the live index covers the whole current catalogue).
+    """
+    name = 'content_similarity'
+    neighbours = 10
+
+    def fit(self, train):
+        from .similarity import SimilarityIndex
+        super().fit(train)
+        known = {content_id for _, content_id, *_ in train.ratings}
+        known |= {content_id for _, content_id, _ in train.watchlist}
+        texts = train.texts if train.texts is not None else load_texts(known)
+        self.index = SimilarityIndex(persistent=False)
+        self.index.build((content_id, *fields, 0.0) for content_id, *fields in texts if content_id in known)
+        self.liked = defaultdict(list)
+        for user_id, content_id, value, _ in train.ratings:
+            if value >= RELEVANT_RATING:
+                self.liked[user_id].append(content_id)
+        for user_id, content_id, _ in train.watchlist:
+            self.liked[user_id].append(content_id)
+
+    def recommend(self, user_id, k):
+        exclude = self.seen.get(user_id, set())
+        votes = Counter()
+        for liked in self.liked[user_id]:
+            for rank, content_id in enumerate(self.index.similar_ids(liked, self.neighbours)):
+                if content_id not in exclude:
+                    votes[content_id] += 1.0 / (rank + 1)
+        picks = [content_id for content_id, _ in votes.most_common(k)]
+        return picks + self.top_popular(k - len(picks), exclude | set(picks))
+
+
+RECOMMENDERS = {
+    cls.name: cls
+    for cls in (GenreHeuristicRecommender, PopularityRecommender, FeatureModelRecommender, ContentSimilarityRecommender)
+}
+
+
+# METRICS
+def precision_at_k(recommended, relevant, k):
+    return len(set(recommended[:k]) & relevant) / k
+
+
+def recall_at_k(recommended, relevant, k):
+    return len(set(recommended[:k]) & relevant) / len(relevant) if relevant else 0.0
+
+
+def ndcg_at_k(recommended, relevant, k):
+    dcg = sum(1 / math.log2(i + 2) for i, cid in enumerate(recommended[:k]) if cid in relevant)
+    ideal = sum(1 / math.log2(i + 2) for i in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def evaluate(recommender_cls, train, relevant, k=10):
+    """Quality, latency (ms per user) and peak traced memory (bytes) for one recommender"""
+    recommender = recommender_cls()
+    tracemalloc.start()
+    started = time.perf_counter()
+    recommender.fit(train)
+    fit_seconds = time.perf_counter() - started
+
+    latencies, recommended_any = [], set()
+    totals = Counter()
+    for user_id, items in relevant.items():
+        started = time.perf_counter()
+        recommended = recommender.recommend(user_id, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recommended_any.update(recommended)
+        totals['precision'] += precision_at_k(recommended, items, k)
+        totals['recall'] += recall_at_k(recommended, items, k)
+        totals['ndcg'] += ndcg_at_k(recommended, items, k)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    users = len(relevant) or 1
+    return {
+        'recommender': recommender_cls.name,
+        'users': len(relevant),
+        f'precision@{k}': totals['precision'] / users,
+        f'recall@{k}': totals['recall'] / users,
+        f'ndcg@{k}': totals['ndcg'] / users,
+        'coverage': len(recommended_any) / (len(train.catalog) or 1),
+        'fit_s': fit_seconds,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'peak_mb': peak / 2 ** 20,
+    }
@@ -0,0 +1,225 @@
+# recommendox/events.py
+import atexit
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .db import sqlite_write
+from .models import Content, EventLogCursor, InteractionRollup
+from .rollups import upsert_increment
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single append write is good enough locally
+    fcntl = None
+
+# Event kind -> InteractionRollup counter
+ROLLUP_FIELDS = {
+    'view': 'views',
+    'watchlist_add': 'watchlist_adds',
+    'watchlist_remove': 'watchlist_removes',
+    'rating': 'ratings',
+    'review': 'reviews',
+}
+
+
+class InteractionEvent(NamedTuple):
+    """One raw interaction, stored as a JSON line in that UTC day's log file"""
+    ts: float
+    kind: str
+    content_id: int
+    user_id: Optional[int] = None
+    value: Optional[int] = None
+
+    @property
+    def day(self):
+        return datetime.fromtimestamp(self.ts, tz=dt_timezone.utc).date()
+
+    def to_line(self):
+        return (json.dumps(self._asdict(), separators=(',', ':')) + '\n').encode()
+
+    @classmethod
+    def from_line(cls, line):
+        return cls(**json.loads(line))
+
+
+def log_dir():
+    return Path(settings.EVENT_LOG_DIR)
+
+
+def log_path(day, directory=None):
+    return (directory or log_dir()) / f'{day.isoformat()}.jsonl'
+
+
+def read_events(path, offset=0, event_type=InteractionEvent):
+    """(events, new_offset) for the complete lines after `offset`"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    events = []
+    for line in data[:end].splitlines():
+        try:
+            events.append(event_type.from_line(line))
+        except (ValueError, TypeError):
+            continue  # a torn or hand-edited line; skip it rather than stall the job
+    return events, offset + end
+
+
+class EventWriter:
+    """
+    Buffers events in memory and appends them to the day files in batches,
+    once EVENT_FLUSH_SIZE events are waiting or EVENT_FLUSH_SECONDS passed;
+    a daemon thread also flushes every EVENT_FLUSH_SECONDS, so an idle
+    worker's events still reach the jobs reading the files.
+    `directory` returns the folder for the day files (the event log by default).
+    """
+
+    def __init__(self, directory=None):
+        self._directory = directory or log_dir
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # batches reach the files in the order they were taken
+        self._events = []
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+    def append(self, event):
+        with self._lock:
+            self._events.append(event)
+            if self._flusher is None or not self._flusher.is_alive():
+                # Started lazily, so forked workers each get their own
+                self._flusher = threading.Thread(target=self._flush_periodically, name='event-flush', daemon=True)
+                self._flusher.start()
+            due = (
+                len(self._events) >= settings.EVENT_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= settings.EVENT_FLUSH_SECONDS
+            )
+        if due:
+            self.flush()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.EVENT_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                self._last_flush = time.monotonic()
+            if not events:
+                return
+
+            by_day = defaultdict(list)
+            for event in events:
+                by_day[event.day].append(event.to_line())
+            directory = self._directory()
+            directory.mkdir(parents=True, exist_ok=True)
+            for day, lines in by_day.items():
+                with open(log_path(day, directory), 'ab') as f:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        f.write(b''.join(lines))
+                        f.flush()
+                    finally:
+                        if fcntl:
+                            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_writer = EventWriter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        _writer.flush()
+    except Exception:
+        pass
+
+
+def log_event(kind, content_id, user_id=None, value=None):
+    """Append an interaction ('view', 'watchlist_add', ...) to the event log"""
+    if kind not in ROLLUP_FIELDS:
+        raise ValueError(f"Unknown interaction kind: {kind}")
+    _writer.append(InteractionEvent(time.time(), kind, content_id, user_id, value))
+
+
+def flush_events():
+    _writer.flush()
+
+
+@sqlite_write
+def rollup_file(path):
+    """Fold the unread tail of one day file into hourly and daily rollups"""
+    cursor, _ = EventLogCursor.objects.get_or_create(name=path.name)
+    events, offset = read_events(path, cursor.offset)
+    if offset == cursor.offset:
+        return 0
+
+    totals = defaultdict(lambda: defaultdict(int))
+    for event in events:
+        hour = timezone.localtime(datetime.fromtimestamp(event.ts, tz=dt_timezone.utc)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        field = ROLLUP_FIELDS.get(event.kind)
+        if field:
+            totals[(event.content_id, 'hour', hour)][field] += 1
+            totals[(event.content_id, 'day', hour.replace(hour=0))][field] += 1
+
+    live = set(Content.objects.filter(pk__in={key[0] for key in totals}).values_list('pk', flat=True))
+    for (content_id, period, start), deltas in totals.items():
+        if content_id in live:
+            upsert_increment(
+                InteractionRollup, {'content_id': content_id, 'period': period, 'bucket_start': start}, **deltas
+            )
+    cursor.offset = offset
+    cursor.save(update_fields=['offset', 'updated_at'])
+    return len(events)
+
+
+def prune_logs(now=None):
+    """Drop whole day files past the retention window; returns the names removed"""
+    cutoff = (now or timezone.now()).date() - timedelta(days=settings.EVENT_RETENTION_DAYS)
+    removed = []
+    for path in sorted(log_dir().glob('*.jsonl')):
+        try:
+            day = datetime.strptime(path.stem, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        if day < cutoff:
+            path.unlink()
+            EventLogCursor.objects.filter(name=path.name).delete()
+            removed.append(path.name)
+    return removed
+
+
+def rollup_events(now=None):
+    """Flush this process's buffer, compact every day file, then prune old ones"""
+    flush_events()
+    rolled = 0
+    if log_dir().exists():
+        for path in sorted(log_dir().glob('*.jsonl')):
+            rolled += rollup_file(path)
+    return rolled, prune_logs(now) if log_dir().exists() else []
+
+
+def recent_interactions(content_id, hours=24):
+    """Interaction totals for a content over the last `hours` hourly buckets"""
+    since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    totals = InteractionRollup.objects.filter(
+        content_id=content_id, period='hour', bucket_start__gte=since
+    ).aggregate(**{field: Sum(field) for field in ROLLUP_FIELDS.values()})
+    return {field: value or 0 for field, value in totals.items()}
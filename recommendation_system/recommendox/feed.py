@@ -0,0 +1,159 @@
+# recommendox/feed.py
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .impressions import log_impression
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the impression id inside cached fragments; swapped per request
+IMPRESSION_TOKEN = '__impression__'
+PENDING_TEMPLATE = 'recommendox/feed/pending.html'
+
+
+class Section(NamedTuple):
+    """
+    One independently built part of a page. `provider(request)` returns the
+    fragment's template context; an `impression_ids` entry in it (the titles
+    shown, in order) gets the fragment logged as an impression on `surface`.
+    Fragments are cached under `cache_key` for `ttl` seconds (never when
+    the key is None) and rendered without the request, so one cached copy
+    can serve every visitor: anything per-user belongs in the provider's
+    context (and the key) or in the page around the fragment.
+    """
+    name: str
+    template: str
+    provider: Callable
+    cache_key: Optional[str] = None
+    ttl: int = 60
+    surface: str = ''
+    variant: str = ''
+
+
+def feed_version(user_id):
+    """Per-user stamp in personal section keys; bumped when the user's activity changes"""
+    key = f'feed_version:{user_id}'
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_feed(user_id):
+    cache.set(f'feed_version:{user_id}', time.time_ns(), None)
+
+
+def stale_key(key):
+    return f'{key}:stale'
+
+
+class FeedComposer:
+    """
+    Builds a page's sections concurrently in a shared thread pool. Cached
+    fragments are used as is; the rest are rendered in the pool and waited
+    for only up to FEED_SECTION_TIMEOUTS_MS from the start of the request.
+    A section that misses its deadline (or is still being built for an
+    earlier request) falls back to its last fragment, kept for
+    FEED_STALE_SECONDS past its ttl, or to a short placeholder; the late
+    result still refreshes the cache for the next request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._inflight = set()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.FEED_THREADS, thread_name_prefix='feed')
+            return self._executor
+
+    def _build(self, section, request):
+        try:
+            context = section.provider(request)
+            context['impression_token'] = IMPRESSION_TOKEN
+            entry = (render_to_string(section.template, context), context.get('impression_ids', []))
+            if section.cache_key:
+                cache.set(section.cache_key, entry, section.ttl)
+                cache.set(stale_key(section.cache_key), entry, section.ttl + settings.FEED_STALE_SECONDS)
+            return entry
+        finally:
+            self._release(section)
+            connections.close_all()
+
+    def _release(self, section):
+        with self._lock:
+            self._inflight.discard(section.cache_key or id(section))
+
+    def _submit(self, section, request):
+        marker = section.cache_key or id(section)
+        with self._lock:
+            if marker in self._inflight:
+                return None
+            self._inflight.add(marker)
+        # Run in a copy of the request's context so a primary pin (routers) reaches the section's queries
+        return self.executor.submit(contextvars.copy_context().run, self._build, section, request)
+
+    def compose(self, request, sections):
+        """({name: fragment html}, {name: (status, ms)})"""
+        started = time.monotonic()
+        timeouts = settings.FEED_SECTION_TIMEOUTS_MS
+        entries, futures, timings = {}, {}, {}
+        for section in sections:
+            entry = cache.get(section.cache_key) if section.cache_key else None
+            if entry is not None:
+                entries[section.name] = entry
+                timings[section.name] = ('hit', round((time.monotonic() - started) * 1000, 1))
+            else:
+                futures[section.name] = self._submit(section, request)
+
+        for section in sorted(sections, key=lambda s: timeouts.get(s.name, settings.FEED_DEFAULT_TIMEOUT_MS)):
+            if section.name in entries:
+                continue
+            future, status = futures[section.name], 'busy'
+            if future is not None:
+                deadline = started + timeouts.get(section.name, settings.FEED_DEFAULT_TIMEOUT_MS) / 1000
+                try:
+                    entries[section.name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+                    status = 'ok'
+                except FutureTimeout:
+                    status = 'timeout'
+                    if future.cancel():
+                        self._release(section)
+                except Exception:
+                    logger.exception('Feed section %s failed', section.name)
+                    status = 'error'
+            if section.name not in entries:
+                stale = cache.get(stale_key(section.cache_key)) if section.cache_key else None
+                if stale is not None:
+                    entries[section.name] = stale
+                    status += '+stale'
+                else:
+                    entries[section.name] = (render_to_string(PENDING_TEMPLATE, {'section': section.name}), [])
+            timings[section.name] = (status, round((time.monotonic() - started) * 1000, 1))
+
+        fragments = {}
+        for section in sections:
+            html, impression_ids = entries[section.name]
+            if section.surface and impression_ids:
+                impression_id = log_impression(section.surface, section.variant, impression_ids, request.user.pk)
+                html = html.replace(IMPRESSION_TOKEN, impression_id)
+            fragments[section.name] = mark_safe(html)
+        return fragments, timings
+
+
+feed_composer = FeedComposer()
@@ -0,0 +1,240 @@
+# recommendox/feedback.py
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count
+
+from .events import flush_events, log_dir, read_events
+from .models import Content, Rating, Review, Watchlist
+
+FORMAT_VERSION = 1
+# Per-pair components kept on disk so new events can be folded in without rescanning
+COMPONENTS = ('views', 'watchlist', 'rating', 'reviews')
+# Confidence added by one view / a watchlist entry / one review; repeats grow logarithmically
+IMPLICIT_WEIGHTS = {'views': 0.5, 'watchlist': 1.0, 'reviews': 1.5}
+RATING_WEIGHT = 1.0  # per star away from 3
+
+
+def confidence(views, watchlist, rating, reviews):
+    """
+    Vectorised user x content weight. Implicit activity only ever adds
+    confidence; a rating counts (value - 3) per star and, when it is below
+    3, the implicit activity is ignored so a dislike stays negative.
+    """
+    implicit = (
+        IMPLICIT_WEIGHTS['views'] * np.log2(1 + views)
+        + IMPLICIT_WEIGHTS['watchlist'] * watchlist
+        + IMPLICIT_WEIGHTS['reviews'] * np.log2(1 + reviews)
+    )
+    rated = rating > 0
+    explicit = np.where(rated, (rating - 3.0) * RATING_WEIGHT, 0.0)
+    return (explicit + np.where(rated & (rating < 3), 0.0, implicit)).astype(np.float32)
+
+
+def apply_event(pairs, event, kinds=None):
+    """Fold one InteractionEvent into the {(user, content): [views, watchlist, rating, reviews]} state"""
+    if event.user_id is None or (kinds and event.kind not in kinds):
+        return
+    entry = pairs.setdefault((event.user_id, event.content_id), [0, 0, 0, 0])
+    if event.kind == 'view':
+        entry[0] += 1
+    elif event.kind == 'watchlist_add':
+        entry[1] = 1
+    elif event.kind == 'watchlist_remove':
+        entry[1] = 0
+    elif event.kind == 'rating' and event.value:
+        entry[2] = event.value
+    # Review events are not counted: a log line can't tell whether count_reviews already saw that review
+
+
+def read_new_events(cursors, pairs, kinds=None):
+    """Apply every log line past the per-file high-water marks; returns (events applied, new cursors)"""
+    flush_events()
+    applied, moved = 0, {}
+    paths = sorted(log_dir().glob('*.jsonl')) if log_dir().exists() else []
+    for path in paths:
+        events, offset = read_events(path, cursors.get(path.name, 0))
+        for event in events:
+            apply_event(pairs, event, kinds)
+        applied += len(events)
+        moved[path.name] = offset
+    return applied, moved  # files pruned from the log simply drop out of the cursors
+
+
+def scan_database(pairs):
+    """Ratings and watchlists as they stand now"""
+    for user_id, content_id, value in Rating.objects.values_list('user_id', 'content_id', 'rating_value'):
+        pairs.setdefault((user_id, content_id), [0, 0, 0, 0])[2] = value
+    for user_id, content_id in Watchlist.objects.values_list('user_id', 'content_id'):
+        pairs.setdefault((user_id, content_id), [0, 0, 0, 0])[1] = 1
+
+
+def count_reviews(pairs):
+    """Replace every pair's review count with the database's, one grouped query; safe to repeat"""
+    for entry in pairs.values():
+        entry[3] = 0
+    counts = Review.objects.order_by().values_list('user_id', 'content_id').annotate(n=Count('id'))
+    for user_id, content_id, n in counts:
+        pairs.setdefault((user_id, content_id), [0, 0, 0, 0])[3] = n
+
+
+class FeedbackMatrix:
+    """
+    Read side: the user x content confidence matrix as CSR arrays (rows are
+    `user_ids`, columns index `content_ids`, both sorted) plus the raw COO
+    components and log cursors the builder resumes from.
+    """
+
+    def __init__(self, user_ids, content_ids, indptr, indices, data, components=None, cursors=None, built_at=0.0):
+        self.user_ids = user_ids
+        self.content_ids = content_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.components = components
+        self.cursors = cursors or {}
+        self.built_at = built_at
+
+    @property
+    def shape(self):
+        return len(self.user_ids), len(self.content_ids)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def _row_index(self, user_id):
+        row = int(np.searchsorted(self.user_ids, user_id))
+        return row if row < len(self.user_ids) and self.user_ids[row] == user_id else None
+
+    def row(self, user_id):
+        """{content_id: weight} for one user; empty if they have no activity"""
+        row = self._row_index(user_id)
+        if row is None:
+            return {}
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return dict(zip(self.content_ids[self.indices[start:end]].tolist(), self.data[start:end].tolist()))
+
+    def rows(self, user_ids):
+        return {user_id: signals for user_id in user_ids if (signals := self.row(user_id))}
+
+    @classmethod
+    def from_pairs(cls, pairs, cursors, built_at):
+        keys = sorted(pairs)
+        coo = {
+            'user': np.array([k[0] for k in keys], dtype=np.int64),
+            'content': np.array([k[1] for k in keys], dtype=np.int64),
+        }
+        values = np.array([pairs[k] for k in keys], dtype=np.int32).reshape(len(keys), len(COMPONENTS))
+        for i, name in enumerate(COMPONENTS):
+            coo[name] = values[:, i]
+
+        weights = confidence(*(coo[name] for name in COMPONENTS))
+        keep = weights != 0
+        user_ids, rows = np.unique(coo['user'][keep], return_inverse=True)
+        content_ids, columns = np.unique(coo['content'][keep], return_inverse=True)
+        # keys are sorted by (user, content), so rows are already grouped and columns ascending
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(user_ids)))]).astype(np.int64)
+        return cls(
+            user_ids, content_ids, indptr, columns.astype(np.int32), weights[keep],
+            components=coo, cursors=cursors, built_at=built_at,
+        )
+
+    def pairs(self):
+        """Back to the mutable {(user, content): [components]} state"""
+        if self.components is None:
+            return {}
+        coo = self.components
+        values = np.stack([coo[name] for name in COMPONENTS], axis=1).tolist()
+        return dict(zip(zip(coo['user'].tolist(), coo['content'].tolist()), values))
+
+    def save(self, path):
+        path = Path(path)
+        arrays = {
+            'version': np.array([FORMAT_VERSION]),
+            'user_ids': self.user_ids,
+            'content_ids': self.content_ids,
+            'indptr': self.indptr,
+            'indices': self.indices,
+            'data': self.data,
+            'cursors': np.array(json.dumps(self.cursors)),
+            'built_at': np.array(self.built_at),
+        }
+        arrays.update({f'coo_{name}': array for name, array in self.components.items()})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, components=False):
+        """None if the file is missing or from another format version"""
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            return None
+        with data:
+            if int(data['version'][0]) != FORMAT_VERSION:
+                return None
+            coo = None
+            if components:
+                coo = {name: data[f'coo_{name}'] for name in ('user', 'content') + COMPONENTS}
+            return cls(
+                data['user_ids'], data['content_ids'], data['indptr'], data['indices'], data['data'],
+                components=coo, cursors=json.loads(str(data['cursors'])), built_at=float(data['built_at']),
+            )
+
+
+def build_feedback_matrix(full=False, path=None):
+    """
+    Bring the matrix file up to date and return (matrix, events applied).
+    Incremental runs only read event-log lines past the stored high-water
+    marks. A full run (or a missing file) takes views from the whole log
+    and ratings and watchlists from the database; it also drops ratings
+    deleted since, which the log does not record. Review counts always
+    come from the database, so a review that is both in the table and
+    still on its way to the log is never counted twice.
+    """
+    path = Path(path or settings.FEEDBACK_MATRIX_PATH)
+    previous = None if full else FeedbackMatrix.load(path, components=True)
+    if previous is None:
+        pairs = {}
+        applied, cursors = read_new_events({}, pairs, kinds={'view'})
+        scan_database(pairs)
+    else:
+        pairs = previous.pairs()
+        applied, cursors = read_new_events(previous.cursors, pairs)
+    count_reviews(pairs)
+
+    live_users = set(User.objects.values_list('pk', flat=True))
+    live_content = set(Content.objects.values_list('pk', flat=True))
+    pairs = {
+        key: value for key, value in pairs.items()
+        if key[0] in live_users and key[1] in live_content and any(value)
+    }
+    matrix = FeedbackMatrix.from_pairs(pairs, cursors, time.time())
+    matrix.save(path)
+    return matrix, applied
+
+
+_loaded = {}
+
+
+def load_feedback_matrix(path=None):
+    """The saved matrix (CSR arrays only), re-read when the file changes; None if it was never built"""
+    path = Path(path or settings.FEEDBACK_MATRIX_PATH)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _loaded[path] = (mtime, FeedbackMatrix.load(path))
+    return cached[1]
@@ -2,11 +2,15 @@
 from django import forms
 from django.contrib.auth.models import User
 from .models import Content, Review
+from .images import store_poster
+from .segments import split_preference
 
 class ContentForm(forms.ModelForm):
+    poster_file = forms.ImageField(required=False, help_text="Upload a poster instead of linking one")
+    
     class Meta:
         model = Content
-        fields = '__all__'
+        exclude = ['poster', 'views_count']
         widgets = {
             'release_date': forms.DateInput(attrs={'type': 'date'}),
             'description': forms.Textarea(attrs={'rows': 4}),
@@ -33,6 +37,19 @@ class ContentForm(forms.ModelForm):
         url = self.cleaned_data.get('poster_url')
         return url
     
+    def save(self, commit=True):
+        content = super().save(commit=False)
+        upload = self.cleaned_data.get('poster_file')
+        if upload:
+            content.poster = store_poster(upload.read())
+            content.poster_url = None
+        elif content.poster_url:
+            content.poster = None
+        if commit:
+            content.save()
+            self.save_m2m()
+        return content
+    
     def clean_trailer_url(self):
         url = self.cleaned_data.get('trailer_url')
         return url
@@ -136,4 +153,36 @@ class UserRegistrationForm(forms.Form):
         if password1 and password2 and password1 != password2:
             self.add_error('password2', "Passwords do not match.")
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class OnboardingForm(forms.Form):
+    favorite_genres = forms.MultipleChoiceField(
+        choices=Content.GENRE_CHOICES, required=False, widget=forms.CheckboxSelectMultiple
+    )
+    preferred_languages = forms.MultipleChoiceField(
+        choices=Content.LANGUAGE_CHOICES, required=False, widget=forms.CheckboxSelectMultiple
+    )
+
+    def __init__(self, *args, profile=None, **kwargs):
+        self.profile = profile
+        if profile is not None:
+            kwargs.setdefault('initial', {
+                'favorite_genres': split_preference(profile.favorite_genres),
+                'preferred_languages': split_preference(profile.preferred_languages),
+            })
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('favorite_genres') and not cleaned_data.get('preferred_languages'):
+            raise forms.ValidationError("Pick at least one genre or language.")
+        return cleaned_data
+
+    def save(self):
+        """Store the picks on the profile as comma-separated values"""
+        self.profile.update_profile(
+            favorite_genres=','.join(self.cleaned_data['favorite_genres']),
+            preferred_languages=','.join(self.cleaned_data['preferred_languages']),
+        )
+        return self.profile
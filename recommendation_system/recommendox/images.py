@@ -0,0 +1,82 @@
+# recommendox/images.py
+import base64
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.urls import reverse
+
+# name -> (max width, max height); "card" for grids, "detail" for the detail page
+POSTER_VARIANTS = {
+    'thumb': (80, 120),
+    'card': (300, 450),
+    'detail': (600, 900),
+}
+POSTER_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+POSTER_CACHE_SECONDS = 60 * 60 * 24 * 365
+
+
+def poster_storage():
+    """The storage backend for posters (STORAGES['posters'], swappable in settings)"""
+    return storages['posters']
+
+
+def variant_name(digest, variant, fmt):
+    return f"{digest[:2]}/{digest}/{variant}.{fmt}"
+
+
+def decode_data_uri(value):
+    """Return the raw bytes of a base64 data: URI, or None"""
+    if not value or not value.startswith('data:') or ';base64,' not in value:
+        return None
+    try:
+        return base64.b64decode(value.split(';base64,', 1)[1])
+    except ValueError:
+        return None
+
+
+def store_poster(data):
+    """
+    Store an image once under its SHA-256 digest and render every
+    size/format variant. Returns the PosterImage row.
+    """
+    from PIL import Image, ImageOps
+
+    from .models import PosterImage
+
+    digest = hashlib.sha256(data).hexdigest()
+    existing = PosterImage.objects.filter(digest=digest).first()
+    if existing:
+        return existing
+
+    image = Image.open(BytesIO(data))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    storage = poster_storage()
+
+    for variant, size in POSTER_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for fmt, (pil_format, _, options) in POSTER_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = variant_name(digest, variant, fmt)
+            if not storage.exists(name):
+                storage.save(name, ContentFile(buffer.getvalue()))
+
+    poster, _ = PosterImage.objects.get_or_create(
+        digest=digest,
+        defaults={'width': image.width, 'height': image.height, 'original_size': len(data)},
+    )
+    return poster
+
+
+def poster_src(content, variant='card', default=''):
+    """URL to show for a content's poster: stored variant, external URL, or default"""
+    digest = getattr(content, 'poster_id', None)
+    if digest:
+        return reverse('recommendox:poster', args=[digest, variant])
+    return getattr(content, 'poster_url', None) or default
@@ -0,0 +1,175 @@
+# recommendox/impressions.py
+import atexit
+import json
+import re
+import secrets
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .events import EventWriter, read_events
+
+VISITOR_COOKIE = 'rvid'
+VISITOR_COOKIE_AGE = 365 * 24 * 3600
+IMPRESSION_ID_RE = re.compile(r'^[0-9a-f]{16}$')
+
+
+class ImpressionEvent(NamedTuple):
+    """A rendered recommendation list ('impression') or a click on one of its titles"""
+    ts: float
+    kind: str
+    impression_id: str
+    surface: str = ''
+    variant: str = ''
+    content_ids: tuple = ()
+    content_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+    @property
+    def day(self):
+        return datetime.fromtimestamp(self.ts, tz=dt_timezone.utc).date()
+
+    def to_line(self):
+        return (json.dumps(self._asdict(), separators=(',', ':')) + '\n').encode()
+
+    @classmethod
+    def from_line(cls, line):
+        return cls(**json.loads(line))
+
+
+def impression_dir():
+    return Path(settings.IMPRESSION_LOG_DIR)
+
+
+_writer = EventWriter(impression_dir)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        _writer.flush()
+    except Exception:
+        pass
+
+
+def flush_impressions():
+    _writer.flush()
+
+
+# A/B BUCKETING
+def visitor_id(request):
+    """Stable bucketing unit: the user id, else an anonymous cookie id (set by remember_visitor)"""
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    if not hasattr(request, '_visitor_id'):
+        request._visitor_id = request.COOKIES.get(VISITOR_COOKIE) or secrets.token_hex(8)
+    return request._visitor_id
+
+
+def remember_visitor(request, response):
+    """Persist a freshly minted anonymous id so the visitor keeps their variant"""
+    visitor = getattr(request, '_visitor_id', None)
+    if visitor and request.COOKIES.get(VISITOR_COOKIE) != visitor:
+        response.set_cookie(VISITOR_COOKIE, visitor, max_age=VISITOR_COOKIE_AGE, samesite='Lax')
+    return response
+
+
+def assign_variant(surface, unit):
+    """Deterministic variant for `unit` on `surface` from the RECOMMENDATION_VARIANTS percentages"""
+    variants = settings.RECOMMENDATION_VARIANTS.get(surface) or {'default': 100}
+    bucket = zlib.crc32(f'{surface}:{unit}'.encode()) % 100
+    for variant, share in variants.items():
+        if bucket < share:
+            return variant
+        bucket -= share
+    return next(iter(variants))
+
+
+# LOGGING
+def log_impression(surface, variant, content_ids, user_id=None):
+    """Record one rendered list; returns the id that its links carry back as ?imp="""
+    impression_id = secrets.token_hex(8)
+    if content_ids:
+        _writer.append(ImpressionEvent(
+            time.time(), 'impression', impression_id, surface, variant, tuple(content_ids), user_id=user_id
+        ))
+    return impression_id
+
+
+def log_click(impression_id, content_id, user_id=None):
+    if impression_id and IMPRESSION_ID_RE.match(impression_id):
+        _writer.append(ImpressionEvent(time.time(), 'click', impression_id, content_id=content_id, user_id=user_id))
+
+
+# AGGREGATION
+def read_window(days, now=None):
+    """Every impression and click event from the last `days` day files"""
+    first = (now or timezone.now()).date() - timedelta(days=days - 1)
+    events = []
+    if impression_dir().exists():
+        for path in sorted(impression_dir().glob('*.jsonl')):
+            try:
+                day = datetime.strptime(path.stem, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if day >= first:
+                events += read_events(path, event_type=ImpressionEvent)[0]
+    return events
+
+
+def ctr_report(events):
+    """
+    Per (surface, variant): lists rendered, titles shown, distinct clicks,
+    CTR (clicks / titles shown) and clicks by position. Clicks are joined
+    to their impression, so a click only counts for the list it came from.
+    """
+    impressions = {e.impression_id: e for e in events if e.kind == 'impression'}
+    clicks = {(e.impression_id, e.content_id) for e in events if e.kind == 'click' and e.impression_id in impressions}
+
+    stats = defaultdict(lambda: {'lists': 0, 'shown': 0, 'clicks': 0, 'by_position': defaultdict(int)})
+    for impression in impressions.values():
+        row = stats[(impression.surface, impression.variant)]
+        row['lists'] += 1
+        row['shown'] += len(impression.content_ids)
+    for impression_id, content_id in clicks:
+        impression = impressions[impression_id]
+        if content_id in impression.content_ids:
+            row = stats[(impression.surface, impression.variant)]
+            row['clicks'] += 1
+            row['by_position'][list(impression.content_ids).index(content_id) + 1] += 1
+
+    return [
+        {
+            'surface': surface,
+            'variant': variant,
+            'lists': row['lists'],
+            'shown': row['shown'],
+            'clicks': row['clicks'],
+            'ctr': row['clicks'] / row['shown'] if row['shown'] else 0.0,
+            'by_position': dict(sorted(row['by_position'].items())),
+        }
+        for (surface, variant), row in sorted(stats.items())
+    ]
+
+
+def prune_impressions(now=None):
+    """Drop day files older than IMPRESSION_RETENTION_DAYS; returns the names removed"""
+    cutoff = (now or timezone.now()).date() - timedelta(days=settings.IMPRESSION_RETENTION_DAYS)
+    removed = []
+    if impression_dir().exists():
+        for path in sorted(impression_dir().glob('*.jsonl')):
+            try:
+                day = datetime.strptime(path.stem, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if day < cutoff:
+                path.unlink()
+                removed.append(path.name)
+    return removed
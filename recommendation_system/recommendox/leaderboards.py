@@ -0,0 +1,163 @@
+# recommendox/leaderboards.py
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Content, ContentOTT
+from .rollups import CATALOG_FIELDS
+
+ALL = ('all', '')
+
+
+def bayesian_rating(rating_count, rating_sum, prior_mean, prior_votes):
+    """IMDb-style weighted rating: few votes pull the score towards the site mean"""
+    return (rating_sum + prior_votes * prior_mean) / (rating_count + prior_votes)
+
+
+class Leaderboard:
+    """Content ids kept sorted by score, best first; updates are a bisect away"""
+
+    def __init__(self):
+        self._entries = []  # (-score, -rating_count, -content_id)
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, content_id, score, rating_count):
+        self.remove(content_id)
+        key = (-score, -rating_count, -content_id)
+        insort(self._entries, key)
+        self._keys[content_id] = key
+
+    def remove(self, content_id):
+        key = self._keys.pop(content_id, None)
+        if key is not None:
+            index = bisect_left(self._entries, key)
+            del self._entries[index]
+
+    def ids(self):
+        return (-key[2] for key in self._entries)
+
+    def top(self, k, exclude=()):
+        result = []
+        for content_id in self.ids():
+            if content_id not in exclude:
+                result.append(content_id)
+                if len(result) >= k:
+                    break
+        return result
+
+
+class LeaderboardRegistry:
+    """
+    One board per genre, language, content type and OTT platform, plus an
+    overall board. Built from the stored rating counters (no join), patched
+    in place as ratings land in this process, and rebuilt every
+    LEADERBOARD_REFRESH_SECONDS to pick up writes made by other workers.
+    The prior mean is fixed between rebuilds so a single rating only
+    re-sorts the boards its title sits on.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._boards = defaultdict(Leaderboard)
+        self._memberships = {}
+        self._built_at = None
+        self.prior_mean = 0.0
+
+    @property
+    def prior_votes(self):
+        return settings.LEADERBOARD_PRIOR_VOTES
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > settings.LEADERBOARD_REFRESH_SECONDS
+
+    def rebuild(self):
+        rows = list(Content.objects.values_list('id', *CATALOG_FIELDS, 'rating_count', 'rating_sum'))
+        platforms = defaultdict(list)
+        for content_id, platform in ContentOTT.objects.values_list('content_id', 'platform_name'):
+            platforms[content_id].append(platform)
+
+        total_count = sum(row[4] for row in rows)
+        total_sum = sum(row[5] for row in rows)
+        with self._lock:
+            self._boards = defaultdict(Leaderboard)
+            self._memberships = {}
+            self.prior_mean = total_sum / total_count if total_count else 0.0
+            for content_id, genre, language, content_type, count, rating_sum in rows:
+                dims = [('genre', genre), ('language', language), ('content_type', content_type)]
+                self._place(content_id, dims + [('platform', p) for p in platforms[content_id]], count, rating_sum)
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self._stale():
+            self.rebuild()
+
+    def _place(self, content_id, dims, count, rating_sum):
+        score = bayesian_rating(count, rating_sum, self.prior_mean, self.prior_votes)
+        boards = [ALL] + [dim for dim in dims if dim[1]]
+        for dim in set(self._memberships.get(content_id, ())) - set(boards):
+            self._boards[dim].remove(content_id)
+        for dim in boards:
+            self._boards[dim].update(content_id, score, count)
+        self._memberships[content_id] = boards
+
+    def refresh_content(self, content_id):
+        """Re-score one title after its ratings, categories or platforms changed"""
+        if self._built_at is None:
+            return  # nothing built in this process yet; the first read loads everything
+        row = Content.objects.filter(pk=content_id).values(*CATALOG_FIELDS, 'rating_count', 'rating_sum').first()
+        with self._lock:
+            if row is None:
+                for dim in self._memberships.pop(content_id, ()):
+                    self._boards[dim].remove(content_id)
+                return
+            dims = [(name, row[name]) for name in CATALOG_FIELDS] + [
+                ('platform', p)
+                for p in ContentOTT.objects.filter(content_id=content_id).values_list('platform_name', flat=True)
+            ]
+            self._place(content_id, dims, row['rating_count'], row['rating_sum'])
+
+    def top(self, dimension, value, k, exclude=()):
+        self.ensure_fresh()
+        with self._lock:
+            board = self._boards.get((dimension, value) if dimension != 'all' else ALL)
+            return board.top(k, set(exclude)) if board else []
+
+    def top_across(self, dimension, values, k, exclude=()):
+        """Best k over several boards of one dimension (e.g. a user's genres)"""
+        self.ensure_fresh()
+        exclude = set(exclude)
+        with self._lock:
+            boards = [self._boards[(dimension, v)] for v in values if (dimension, v) in self._boards]
+            merged = heapq.merge(*(board._entries for board in boards))
+            result = []
+            for key in merged:
+                content_id = -key[2]
+                if content_id not in exclude:
+                    result.append(content_id)
+                    exclude.add(content_id)
+                    if len(result) >= k:
+                        break
+            return result
+
+    def ranked_ids(self, dimension='all', value=''):
+        """The whole ranking of one board, for sorted listings"""
+        self.ensure_fresh()
+        with self._lock:
+            board = self._boards.get((dimension, value) if dimension != 'all' else ALL)
+            return list(board.ids()) if board else []
+
+
+leaderboards = LeaderboardRegistry()
+
+
+def ranked_cards(ids):
+    """Card rows for `ids`, in that order, with rating_avg annotated"""
+    cards = Content.objects.cards().with_rating_avg().in_bulk(ids)
+    return [cards[content_id] for content_id in ids if content_id in cards]
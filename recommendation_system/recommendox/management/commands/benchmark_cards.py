@@ -0,0 +1,54 @@
+# recommendox/management/commands/benchmark_cards.py
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Avg
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from recommendox.models import Content
+
+
+def fetched_bytes(queryset):
+    """Run the queryset's SQL directly and add up the size of every value returned"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return len(rows), sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+class Command(BaseCommand):
+    help = "Compare bytes fetched and render time of full Content rows vs the card projection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=12)
+
+    def render_ms(self, queryset, repeat, page_size):
+        request = RequestFactory().get('/browse/')
+        request.user = AnonymousUser()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            page = Paginator(queryset.all(), page_size).get_page(1)
+            render_to_string('recommendox/content_list.html', {'content': page, 'sort_by': 'newest'}, request=request)
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    def handle(self, *args, **options):
+        repeat, page_size = options['repeat'], options['page_size']
+        cases = [
+            ('full rows', Content.objects.order_by('-release_date')),
+            ('full rows + Avg join', Content.objects.annotate(
+                rating_avg=Avg('ratings__rating_value')).order_by('-rating_avg', '-release_date')),
+            ('cards()', Content.objects.cards().order_by('-release_date')),
+            ('cards() + stored avg', Content.objects.cards().with_rating_avg().order_by('-rating_avg', '-release_date')),
+        ]
+
+        self.stdout.write(f"{'query':<24}{'rows':>6}{'bytes':>12}{'render ms':>12}")
+        for label, queryset in cases:
+            rows, size = fetched_bytes(queryset)
+            ms = self.render_ms(queryset, repeat, page_size)
+            self.stdout.write(f"{label:<24}{rows:>6}{size:>12}{ms:>12.2f}")
@@ -0,0 +1,24 @@
+# recommendox/management/commands/build_feedback_matrix.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recommendox.feedback import build_feedback_matrix
+
+
+class Command(BaseCommand):
+    help = "Fold new interaction events into the user x content feedback matrix on disk (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Rebuild from the database and the whole event log instead of catching up")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        matrix, applied = build_feedback_matrix(full=options['full'])
+        users, titles = matrix.shape
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {applied} events; {matrix.nnz} weights over {users} users x {titles} titles "
+            f"in {time.perf_counter() - started:.2f}s -> {settings.FEEDBACK_MATRIX_PATH}"
+        ))
@@ -0,0 +1,24 @@
+# recommendox/management/commands/build_similarity_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendox.similarity import similarity_index
+
+
+class Command(BaseCommand):
+    help = "Build or incrementally refresh the content similarity (TF-IDF + LSH) index on disk"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Rebuild from scratch instead of catching up")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['full']:
+            similarity_index.rebuild()
+            similarity_index.save()
+            message = f"Indexed {len(similarity_index)} titles"
+        else:
+            message = f"Re-indexed {similarity_index.refresh()} changed titles"
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{message} in {elapsed:.2f}s -> {similarity_index.path}"))
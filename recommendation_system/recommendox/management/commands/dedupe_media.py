@@ -0,0 +1,93 @@
+# recommendox/management/commands/dedupe_media.py
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recommendox.models import MediaBlob
+from recommendox.storage import BLOB_DIR, blob_storage
+
+
+class Command(BaseCommand):
+    help = "Move existing uploads into content-addressed storage and rebuild blob reference counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without touching files")
+        parser.add_argument('--prune', action='store_true',
+                            help="Also delete files in the upload folders that no row references")
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help="Keep unreferenced blobs younger than this (uploads still in flight)")
+
+    def tracked_fields(self):
+        for model_name, field_name in MediaBlob.TRACKED_FIELDS:
+            model = apps.get_model('recommendox', model_name)
+            yield model, model._meta.get_field(field_name)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        migrated = 0
+        bytes_before = 0
+        legacy_names = set()
+
+        # 1. Re-store every legacy file through the blob storage
+        for model, field in self.tracked_fields():
+            rows = model.objects.exclude(**{field.name: ''}).exclude(**{field.name: None})
+            for pk, name in rows.exclude(**{f'{field.name}__startswith': f'{BLOB_DIR}/'}).values_list('pk', field.name):
+                if not blob_storage.exists(name):
+                    self.stderr.write(f"Missing file for {model.__name__} #{pk}: {name}")
+                    continue
+                bytes_before += blob_storage.size(name)
+                legacy_names.add(name)
+                if dry_run:
+                    continue
+                with blob_storage.open(name, 'rb') as fh:
+                    new_name = blob_storage.save(name, File(fh, name=os.path.basename(name)))
+                model.objects.filter(pk=pk).update(**{field.name: new_name})
+                migrated += 1
+
+        # 2. Recount references from scratch
+        refs = Counter()
+        for model, field in self.tracked_fields():
+            for name in model.objects.exclude(**{field.name: ''}).exclude(**{field.name: None}).values_list(field.name, flat=True):
+                refs[name] += 1
+
+        if not dry_run:
+            for blob in MediaBlob.objects.all():
+                if blob.ref_count != refs[blob.name]:
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=refs[blob.name])
+
+            cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+            for blob in MediaBlob.objects.filter(ref_count=0, created_at__lt=cutoff):
+                blob_storage.delete(blob.name)
+                blob.delete()
+
+            for name in legacy_names:
+                if name not in refs:
+                    blob_storage.delete(name)
+
+        # 3. Optionally sweep upload folders for files nothing references
+        pruned = 0
+        if options['prune']:
+            upload_dirs = {field.upload_to.rstrip('/') for _, field in self.tracked_fields()}
+            for folder in upload_dirs:
+                if not blob_storage.exists(folder):
+                    continue
+                for filename in blob_storage.listdir(folder)[1]:
+                    name = f"{folder}/{filename}"
+                    if name in refs:
+                        continue
+                    pruned += 1
+                    self.stdout.write(f"{'Would prune' if dry_run else 'Pruned'} {name}")
+                    if not dry_run:
+                        blob_storage.delete(name)
+
+        bytes_after = sum(MediaBlob.objects.filter(ref_count__gt=0).values_list('size', flat=True))
+        self.stdout.write(self.style.SUCCESS(
+            f"{'[dry run] ' if dry_run else ''}Migrated {migrated} file(s), pruned {pruned}; "
+            f"{len(legacy_names)} legacy file(s) totalling {bytes_before} bytes, "
+            f"{bytes_after} bytes now held in blob storage."
+        ))
@@ -0,0 +1,49 @@
+# recommendox/management/commands/evaluate_recommenders.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendox.evaluation import RECOMMENDERS, Snapshot, evaluate
+
+
+class Command(BaseCommand):
+    help = "Offline comparison of recommenders on a temporal train/test split of ratings and watchlists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--train-fraction', type=float, default=0.8)
+        parser.add_argument('--recommenders', default=','.join(RECOMMENDERS),
+                            help=f"Comma-separated subset of: {', '.join(RECOMMENDERS)}")
+        parser.add_argument('--snapshot', help="Evaluate this saved snapshot instead of the live database")
+        parser.add_argument('--save-snapshot', help="Write the snapshot used to this file, for repeatable runs")
+        parser.add_argument('--json', help="Also write the report as JSON")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['recommenders'].split(',') if name.strip()]
+        unknown = set(names) - set(RECOMMENDERS)
+        if unknown:
+            raise CommandError(f"Unknown recommender(s): {', '.join(sorted(unknown))}")
+
+        snapshot = Snapshot.load(options['snapshot']) if options['snapshot'] else Snapshot.from_database()
+        if options['save_snapshot']:
+            snapshot.save(options['save_snapshot'])
+        train, relevant, _ = snapshot.split(options['train_fraction'])
+        self.stdout.write(
+            f"{len(snapshot.catalog)} titles, {len(train.ratings)}/{len(snapshot.ratings)} ratings and "
+            f"{len(train.watchlist)}/{len(snapshot.watchlist)} watchlist rows in train, "
+            f"{len(relevant)} users with held-out items"
+        )
+        if not relevant:
+            raise CommandError("Nothing to evaluate: no relevant interactions after the split")
+
+        k = options['k']
+        report = [evaluate(RECOMMENDERS[name], train, relevant, k) for name in names]
+        columns = [f'precision@{k}', f'recall@{k}', f'ndcg@{k}', 'coverage', 'fit_s', 'p50_ms', 'p99_ms', 'peak_mb']
+        self.stdout.write(f"{'recommender':<20}" + ''.join(f'{c:>13}' for c in columns))
+        for row in report:
+            self.stdout.write(f"{row['recommender']:<20}" + ''.join(f'{row[c]:>13.4f}' for c in columns))
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({'k': k, 'train_fraction': options['train_fraction'], 'results': report}, f, indent=2)
+            self.stdout.write(f"Report written to {options['json']}")
@@ -0,0 +1,49 @@
+# recommendox/management/commands/import_posters.py
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+from recommendox.images import decode_data_uri, store_poster
+from recommendox.models import Content
+
+
+class Command(BaseCommand):
+    help = (
+        "Move inline (data: URI) posters into the poster store, optionally downloading external ones. "
+        "Run after migrating: inline posters that can't be decoded are dropped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fetch', action='store_true', help="Also download and store external poster URLs")
+        parser.add_argument('--timeout', type=int, default=10)
+
+    def handle(self, *args, **options):
+        stored = failed = 0
+        rows = Content.objects.filter(poster__isnull=True).exclude(poster_url__isnull=True).exclude(poster_url='')
+        for content_id, url in rows.values_list('id', 'poster_url'):
+            data = decode_data_uri(url)
+            if data is None and options['fetch'] and url.startswith(('http://', 'https://')):
+                try:
+                    with urlopen(Request(url, headers={'User-Agent': 'RecommendoX'}), timeout=options['timeout']) as resp:
+                        data = resp.read()
+                except Exception as exc:
+                    self.stderr.write(f"#{content_id}: could not fetch {url[:80]} ({exc})")
+            inline = url.startswith('data:')
+            if data is None:
+                if inline:
+                    failed += 1
+                    self.stderr.write(f"#{content_id}: undecodable inline poster dropped")
+                    Content.objects.filter(pk=content_id).update(poster_url=None)
+                continue
+            try:
+                poster = store_poster(data)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"#{content_id}: not a usable image ({exc})")
+                if inline:
+                    Content.objects.filter(pk=content_id).update(poster_url=None)
+                continue
+            Content.objects.filter(pk=content_id).update(poster=poster, poster_url=None)
+            stored += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} poster(s), {failed} failed."))
@@ -0,0 +1,39 @@
+# recommendox/management/commands/impression_report.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from recommendox.impressions import ctr_report, flush_impressions, prune_impressions, read_window
+
+
+class Command(BaseCommand):
+    help = "Click-through rate per recommendation surface and A/B variant from the impression logs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="How many days of logs to read")
+        parser.add_argument('--surface', help="Only report this surface (e.g. dashboard)")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+        parser.add_argument('--prune', action='store_true', help="Delete day files past the retention window")
+
+    def handle(self, *args, **options):
+        flush_impressions()
+        rows = ctr_report(read_window(options['days']))
+        if options['surface']:
+            rows = [row for row in rows if row['surface'] == options['surface']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        else:
+            self.stdout.write(f"{'surface':<12}{'variant':<12}{'lists':>8}{'shown':>9}{'clicks':>8}{'CTR':>8}  top positions")
+            for row in rows:
+                positions = ', '.join(f"#{pos}:{n}" for pos, n in list(row['by_position'].items())[:5])
+                self.stdout.write(
+                    f"{row['surface']:<12}{row['variant']:<12}{row['lists']:>8}{row['shown']:>9}"
+                    f"{row['clicks']:>8}{row['ctr']:>8.2%}  {positions}"
+                )
+            if not rows:
+                self.stdout.write("No impressions logged in this window.")
+
+        if options['prune']:
+            removed = prune_impressions()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {len(removed)} day files."))
@@ -0,0 +1,75 @@
+# recommendox/management/commands/precompute_recommendations.py
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from recommendox.feedback import build_feedback_matrix
+from recommendox.models import RecommendationRun, UserRecommendation
+from recommendox.recommender import build_item_model, init_worker, save_recommendations, score_shard
+
+
+class Command(BaseCommand):
+    help = "Precompute top-N recommendations for every active user across a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--shard-size', type=int, default=500, help="Users per worker task")
+        parser.add_argument('--top', type=int, default=settings.RECOMMENDATION_COUNT)
+        parser.add_argument('--resume', action='store_true',
+                            help="Continue the last unfinished run, skipping users it already wrote")
+
+    def start_run(self, resume):
+        """(run, user ids still to do)"""
+        run = RecommendationRun.objects.filter(finished_at__isnull=True).first() if resume else None
+        users = User.objects.filter(is_active=True).order_by('id')
+        if run:
+            done = UserRecommendation.objects.filter(computed_at__gte=run.started_at).values_list('user_id', flat=True)
+            user_ids = list(users.exclude(id__in=done).values_list('id', flat=True))
+            self.stdout.write(f"Resuming run {run.pk}: {run.users_done}/{run.users_total} done, {len(user_ids)} left")
+        else:
+            user_ids = list(users.values_list('id', flat=True))
+            run = RecommendationRun.objects.create(users_total=len(user_ids))
+        return run, user_ids
+
+    def handle(self, *args, **options):
+        run, user_ids = self.start_run(options['resume'])
+        shard_size, top = options['shard_size'], options['top']
+        shards = [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+        started = time.perf_counter()
+        done = 0
+
+        with tempfile.TemporaryDirectory(prefix='recommendox-model-') as model_dir:
+            items = build_item_model(model_dir)
+            feedback, _ = build_feedback_matrix()
+            self.stdout.write(f"Feedback matrix: {feedback.nnz} weights over {feedback.shape[0]} users")
+            self.stdout.write(f"Item model: {items} titles; {len(user_ids)} users in {len(shards)} shards")
+            connections.close_all()  # never hand an open SQLite connection to forked workers
+
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            with ProcessPoolExecutor(
+                max_workers=max(1, options['workers']),
+                mp_context=multiprocessing.get_context(method),
+                initializer=init_worker,
+            ) as pool:
+                futures = [pool.submit(score_shard, model_dir, shard, top) for shard in shards]
+                for future in as_completed(futures):
+                    results = future.result()
+                    save_recommendations(results, timezone.now())
+                    RecommendationRun.objects.filter(pk=run.pk).update(users_done=F('users_done') + len(results))
+                    done += len(results)
+                    rate = done / max(time.perf_counter() - started, 1e-9)
+                    self.stdout.write(f"  {done}/{len(user_ids)} users ({rate:.0f}/s)")
+
+        RecommendationRun.objects.filter(pk=run.pk).update(finished_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {run.pk} finished: {done} users in {time.perf_counter() - started:.2f}s"
+        ))
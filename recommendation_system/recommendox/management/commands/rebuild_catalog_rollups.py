@@ -0,0 +1,14 @@
+# recommendox/management/commands/rebuild_catalog_rollups.py
+from django.core.management.base import BaseCommand
+
+from recommendox.rollups import rebuild_catalog_rollups
+
+
+class Command(BaseCommand):
+    help = "Recount genre/language/type/platform rollups and refresh their view sums (run periodically)"
+
+    def handle(self, *args, **options):
+        drift = rebuild_catalog_rollups()
+        for (dimension, value), (old, new) in sorted(drift.items()):
+            self.stdout.write(self.style.WARNING(f"{dimension}={value}: {old} -> {new}"))
+        self.stdout.write(self.style.SUCCESS(f"Catalog rollups rebuilt ({len(drift)} row(s) changed)."))
@@ -0,0 +1,20 @@
+# recommendox/management/commands/reconcile_stats.py
+from django.core.management.base import BaseCommand
+
+from recommendox.models import SiteStats
+
+
+class Command(BaseCommand):
+    help = "Recount the SiteStats snapshot from the source tables and report any drift (run periodically)"
+
+    def handle(self, *args, **options):
+        before = SiteStats.objects.filter(pk=1).values().first() or {}
+        after = SiteStats.reconcile()
+        drift = {
+            field: (before.get(field), getattr(after, field))
+            for field in SiteStats.compute()
+            if before.get(field) != getattr(after, field)
+        }
+        for field, (old, new) in drift.items():
+            self.stdout.write(self.style.WARNING(f"{field}: {old} -> {new}"))
+        self.stdout.write(self.style.SUCCESS(f"Site stats reconciled ({len(drift)} field(s) drifted)."))
@@ -0,0 +1,13 @@
+# recommendox/management/commands/refresh_segments.py
+from django.core.management.base import BaseCommand
+
+from recommendox.segments import compute_segments, publish_segments
+
+
+class Command(BaseCommand):
+    help = "Recompute the cold-start top list for every (genre, language) segment and publish it (run from cron)"
+
+    def handle(self, *args, **options):
+        segments = compute_segments()
+        publish_segments(segments)
+        self.stdout.write(self.style.SUCCESS(f"Published {len(segments)} segment lists."))
@@ -0,0 +1,32 @@
+# recommendox/management/commands/refresh_trending.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendox.models import Content
+from recommendox.trending import publish_trending, refresh_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute decayed popularity scores and republish the trending list (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every N seconds instead of running once")
+        parser.add_argument('--show', type=int, default=10, help="Print the top N titles")
+
+    def refresh_once(self, show):
+        ids = refresh_trending()
+        publish_trending(ids)
+        titles = Content.objects.in_bulk(ids[:show])
+        top = [titles[content_id] for content_id in ids[:show] if content_id in titles]
+        for rank, content in enumerate(top, start=1):
+            self.stdout.write(f"{rank:>3}. {content.title}")
+        self.stdout.write(self.style.SUCCESS(f"Trending refreshed ({len(ids)} titles scored)."))
+
+    def handle(self, *args, **options):
+        while True:
+            self.refresh_once(options['show'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+# recommendox/management/commands/rollup_events.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendox.events import rollup_events
+
+
+class Command(BaseCommand):
+    help = "Compact the raw interaction log into hourly/daily rollups and drop expired day files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every N seconds instead of running once")
+
+    def handle(self, *args, **options):
+        while True:
+            rolled, removed = rollup_events()
+            for name in removed:
+                self.stdout.write(f"Dropped {name}")
+            self.stdout.write(self.style.SUCCESS(f"Rolled up {rolled} event(s)."))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
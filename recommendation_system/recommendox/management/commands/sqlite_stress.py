@@ -0,0 +1,130 @@
+# recommendox/management/commands/sqlite_stress.py
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from recommendox.models import Content, Rating, Review
+from recommendox.routers import pin_to_primary
+from recommendox.views import increment_content_views, save_rating, save_review
+
+PREFIX = 'sqlite-stress'
+
+
+def run_worker(worker_id, content_id, user_ids, iterations, threads, errors):
+    """One process: several threads hammering views, ratings and reviews"""
+    connections.close_all()  # never share the parent's connection across fork
+    pin_to_primary()
+    content = Content.objects.get(pk=content_id)
+
+    def hammer(thread_id):
+        pin_to_primary()
+        try:
+            for i in range(iterations):
+                user = User(pk=user_ids[(thread_id + i) % len(user_ids)])
+                increment_content_views(content)
+                save_rating(user, content, 1 + (worker_id + thread_id + i) % 5)
+                save_review(user, content, f'{PREFIX} {worker_id}/{thread_id}/{i}', False)
+        except Exception as exc:
+            errors.put(f'worker {worker_id} thread {thread_id}: {exc!r}')
+        finally:
+            connections.close_all()
+
+    pool = [threading.Thread(target=hammer, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a throwaway copy of the schema with concurrent view/rating/review writes "
+        "and check that none were lost"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=25)
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError("sqlite_stress only runs against SQLite")
+
+        # Same engine and pragmas as the live database, but a fresh migrated file
+        fd, path = tempfile.mkstemp(suffix='.sqlite3', prefix=f'{PREFIX}-')
+        os.close(fd)
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_name, test_settings['NAME'] = test_settings.get('NAME'), path
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stress(connection, options['processes'], options['threads'], options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = test_name
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def stress(self, connection, processes, threads, iterations):
+        pin_to_primary()  # replicas are copies of the live database, not of the throwaway one
+        with connection.cursor() as cursor:
+            mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        self.stdout.write(f"SQLite journal_mode={mode}")
+
+        content = Content.objects.create(
+            title=f'{PREFIX} content', description=PREFIX, genre='Drama',
+            language='Other', release_date=date.today(),
+        )
+        users = [User.objects.create(username=f'{PREFIX}-{n}') for n in range(threads * 2)]
+        user_ids = [u.pk for u in users]
+        connections.close_all()
+
+        ctx = multiprocessing.get_context('fork')
+        errors = ctx.Queue()
+        started = time.perf_counter()
+        workers = [
+            ctx.Process(target=run_worker, args=(w, content.pk, user_ids, iterations, threads, errors))
+            for w in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        failures = []
+        while not errors.empty():
+            failures.append(errors.get())
+
+        content.refresh_from_db()
+        writes = processes * threads * iterations
+        # Each thread walks the user list from its own offset; only these users get a rating
+        rated = {user_ids[(t + i) % len(user_ids)] for t in range(threads) for i in range(iterations)}
+        ratings = Rating.objects.filter(content=content)
+        checks = {
+            'views_count': (content.views_count, writes),
+            'reviews': (Review.objects.filter(content=content).count(), writes),
+            'ratings': (ratings.count(), len(rated)),
+            'rating_count': (content.rating_count, ratings.count()),
+            'rating_sum': (content.rating_sum, sum(ratings.values_list('rating_value', flat=True))),
+        }
+
+        for name, (got, expected) in checks.items():
+            style = self.style.SUCCESS if got == expected else self.style.ERROR
+            self.stdout.write(style(f"{name:<13} {got:>7} (expected {expected})"))
+        self.stdout.write(f"{writes * 3} writes in {elapsed:.2f}s ({writes * 3 / elapsed:.0f}/s)")
+
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures or any(got != expected for got, expected in checks.values()):
+            raise CommandError("Lost or failed writes detected")
+        self.stdout.write(self.style.SUCCESS("No lost writes."))
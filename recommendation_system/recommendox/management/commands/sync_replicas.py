@@ -0,0 +1,52 @@
+# recommendox/management/commands/sync_replicas.py
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from recommendox.models import ReplicaHeartbeat
+
+
+class Command(BaseCommand):
+    help = "Write the replication heartbeat and copy the SQLite primary into each replica file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heartbeat-only', action='store_true',
+                            help="Only write the heartbeat (when something else replicates the data)")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every N seconds instead of running once")
+
+    def sync_once(self, heartbeat_only):
+        ReplicaHeartbeat.beat()
+        if heartbeat_only:
+            return
+        
+        primary = settings.DATABASES['default']
+        if 'sqlite3' not in primary['ENGINE']:
+            raise CommandError("File copy is only supported for SQLite; use --heartbeat-only")
+        
+        source = sqlite3.connect(str(primary['NAME']))
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(str(settings.DATABASES[alias]['NAME']))
+                try:
+                    # Online backup API: a consistent snapshot even while the primary takes writes
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Synced {alias}")
+        finally:
+            source.close()
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS and not options['heartbeat_only']:
+            raise CommandError("No replicas configured (set RECOMMENDOX_REPLICAS)")
+        
+        while True:
+            self.sync_once(options['heartbeat_only'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
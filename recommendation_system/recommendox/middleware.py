@@ -0,0 +1,47 @@
+# recommendox/middleware.py
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from .auth_cache import load_user_bundle
+from .routers import pin_to_primary, unpin
+
+PIN_COOKIE = 'primary_pin'
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes: after a POST (rating, review, watchlist...), the
+    client's reads stay on the primary for REPLICA_PIN_SECONDS so it sees
+    its own change. Incidental writes on GET (view counters) don't pin.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        token = pin_to_primary(unsafe or pinned_until > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin(token)
+        
+        if unsafe and getattr(settings, 'DATABASE_REPLICAS', []):
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+            response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that serves request.user from the user bundle cache"""
+    
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: load_user_bundle(request))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:16
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Season = apps.get_model('recommendox', 'Season')
+    Content = apps.get_model('recommendox', 'Content')
+    for season in Season.objects.annotate(n=Count('episodes'), total=Sum('episodes__duration')):
+        Season.objects.filter(pk=season.pk).update(episode_count=season.n, total_duration=season.total or 0)
+    for content in Content.objects.annotate(n=Sum('seasons__episode_count'), total=Sum('seasons__total_duration')):
+        Content.objects.filter(pk=content.pk).update(total_episodes=content.n or 0, total_runtime=content.total or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0006_alter_review_is_approved'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='season',
+            options={'ordering': ['season_number']},
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='total_episodes',
+            field=models.IntegerField(default=0, editable=False, help_text='Episodes across all seasons (kept in sync by signals)'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='total_runtime',
+            field=models.IntegerField(default=0, editable=False, help_text='Runtime in minutes across all episodes (kept in sync by signals)'),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='episode_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='total_duration',
+            field=models.IntegerField(default=0, editable=False, help_text='Duration in minutes'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:17
+
+import recommendox.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0007_season_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='goldenuser',
+            name='cover_image',
+            field=models.ImageField(blank=True, null=True, storage=recommendox.storage.ContentAddressedStorage(), upload_to='golden_covers/'),
+        ),
+        migrations.AlterField(
+            model_name='goldenuser',
+            name='profile_image',
+            field=models.ImageField(blank=True, null=True, storage=recommendox.storage.ContentAddressedStorage(), upload_to='golden_profiles/'),
+        ),
+        migrations.AlterField(
+            model_name='goldenuser',
+            name='verification_documents',
+            field=models.FileField(blank=True, null=True, storage=recommendox.storage.ContentAddressedStorage(), upload_to='verification_docs/'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=recommendox.storage.ContentAddressedStorage(), upload_to='profile_pics/'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_inline_trailers(apps, schema_editor):
+    """Inline posters stay in poster_url for `manage.py import_posters`; data: URI trailers are dropped"""
+    Content = apps.get_model('recommendox', 'Content')
+    Content.objects.filter(trailer_url__startswith='data:').update(trailer_url=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0008_media_blob_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PosterImage',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('width', models.IntegerField(default=0)),
+                ('height', models.IntegerField(default=0)),
+                ('original_size', models.IntegerField(default=0, help_text='Bytes of the source image')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='poster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contents', to='recommendox.posterimage'),
+        ),
+        migrations.RunPython(drop_inline_trailers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='content',
+            name='poster_url',
+            field=models.URLField(blank=True, help_text='External poster URL (uploads go to poster)', max_length=50000, null=True),
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='trailer_url',
+            field=models.URLField(blank=True, max_length=1000, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:19
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_counters(apps, schema_editor):
+    Content = apps.get_model('recommendox', 'Content')
+    for content in Content.objects.annotate(n=Count('ratings'), total=Sum('ratings__rating_value')):
+        Content.objects.filter(pk=content.pk).update(rating_count=content.n, rating_sum=content.total or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0009_poster_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0010_content_rating_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('beat_at', models.DateTimeField()),
+            ],
+        ),
+    ]
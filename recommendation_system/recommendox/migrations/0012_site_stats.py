@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0011_replica_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('total_content', models.IntegerField(default=0)),
+                ('total_reviews', models.IntegerField(default=0)),
+                ('pending_reviews', models.IntegerField(default=0)),
+                ('approved_reviews', models.IntegerField(default=0)),
+                ('verified_reviews', models.IntegerField(default=0)),
+                ('regular_reviews', models.IntegerField(default=0)),
+                ('total_reviewers', models.IntegerField(default=0)),
+                ('total_creators', models.IntegerField(default=0)),
+                ('total_golden', models.IntegerField(default=0)),
+                ('golden_pending', models.IntegerField(default=0)),
+                ('golden_verified', models.IntegerField(default=0)),
+                ('golden_rejected', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Site stats',
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:27
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Analytics = apps.get_model('recommendox', 'Analytics')
+    Bucket = apps.get_model('recommendox', 'ContentActivityBucket')
+    Rating = apps.get_model('recommendox', 'Rating')
+    Review = apps.get_model('recommendox', 'Review')
+
+    histograms = defaultdict(lambda: [0] * 5)
+    buckets = defaultdict(lambda: [0, 0, 0])
+
+    def starts(when):
+        day = timezone.localtime(when).date()
+        return [('day', day), ('week', day - timedelta(days=day.weekday()))]
+
+    for content_id, value, when in Rating.objects.values_list('content_id', 'rating_value', 'rating_date'):
+        histograms[content_id][value - 1] += 1
+        for period, start in starts(when):
+            bucket = buckets[(content_id, period, start)]
+            bucket[0] += 1
+            bucket[1] += value
+    for content_id, when in Review.objects.values_list('content_id', 'review_date'):
+        for period, start in starts(when):
+            buckets[(content_id, period, start)][2] += 1
+
+    for content_id, counts in histograms.items():
+        Analytics.objects.update_or_create(
+            content_id=content_id,
+            defaults={f'stars_{i + 1}': n for i, n in enumerate(counts)},
+        )
+    Bucket.objects.bulk_create([
+        Bucket(content_id=content_id, period=period, bucket_start=start,
+               ratings_count=n, ratings_sum=total, reviews_count=reviews)
+        for (content_id, period, start), (n, total, reviews) in buckets.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0012_site_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analytics',
+            name='stars_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analytics',
+            name='stars_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analytics',
+            name='stars_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analytics',
+            name='stars_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analytics',
+            name='stars_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ContentActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('bucket_start', models.DateField()),
+                ('ratings_count', models.IntegerField(default=0)),
+                ('ratings_sum', models.IntegerField(default=0)),
+                ('reviews_count', models.IntegerField(default=0)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to='recommendox.content')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'unique_together': {('content', 'period', 'bucket_start')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
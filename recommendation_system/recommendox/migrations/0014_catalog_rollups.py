@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:41
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    Content = apps.get_model('recommendox', 'Content')
+    ContentOTT = apps.get_model('recommendox', 'ContentOTT')
+    CatalogRollup = apps.get_model('recommendox', 'CatalogRollup')
+
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    by_content = {}
+    rows = Content.objects.values_list(
+        'id', 'genre', 'language', 'content_type', 'rating_count', 'rating_sum', 'views_count'
+    )
+    for content_id, genre, language, content_type, n, total, views in rows:
+        by_content[content_id] = (1, n, total, views)
+        for key in (('genre', genre), ('language', language), ('content_type', content_type)):
+            if key[1]:
+                totals[key] = [a + b for a, b in zip(totals[key], by_content[content_id])]
+    for content_id, platform in ContentOTT.objects.values_list('content_id', 'platform_name'):
+        key = ('platform', platform)
+        totals[key] = [a + b for a, b in zip(totals[key], by_content.get(content_id, (1, 0, 0, 0)))]
+
+    CatalogRollup.objects.bulk_create([
+        CatalogRollup(dimension=dimension, value=value, content_count=count,
+                      rating_count=n, rating_sum=total, views_sum=views)
+        for (dimension, value), (count, n, total, views) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0013_rating_histograms_and_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('genre', 'Genre'), ('language', 'Language'), ('content_type', 'Content Type'), ('platform', 'OTT Platform')], max_length=20)),
+                ('value', models.CharField(max_length=50)),
+                ('content_count', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('views_sum', models.BigIntegerField(default=0, help_text='Refreshed by rebuild_catalog_rollups')),
+            ],
+            options={
+                'ordering': ['dimension', 'value'],
+                'unique_together': {('dimension', 'value')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0014_catalog_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analytics',
+            name='popularity_score',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.CreateModel(
+            name='TrendingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField(db_index=True)),
+                ('views', models.IntegerField(default=0)),
+                ('ratings', models.IntegerField(default=0)),
+                ('reviews', models.IntegerField(default=0)),
+                ('watchlist_adds', models.IntegerField(default=0)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_buckets', to='recommendox.content')),
+            ],
+            options={
+                'unique_together': {('content', 'minute')},
+            },
+        ),
+    ]
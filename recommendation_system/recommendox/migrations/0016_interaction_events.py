@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0015_trending_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventLogCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InteractionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('views', models.IntegerField(default=0)),
+                ('watchlist_adds', models.IntegerField(default=0)),
+                ('watchlist_removes', models.IntegerField(default=0)),
+                ('ratings', models.IntegerField(default=0)),
+                ('reviews', models.IntegerField(default=0)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interaction_rollups', to='recommendox.content')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'bucket_start'], name='recommendox_period_a5f23e_idx')],
+                'unique_together': {('content', 'period', 'bucket_start')},
+            },
+        ),
+    ]
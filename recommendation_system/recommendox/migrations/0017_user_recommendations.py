@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendox', '0016_interaction_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('users_total', models.IntegerField(default=0)),
+                ('users_done', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_ids', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField()),
+                ('is_stale', models.BooleanField(default=False, help_text='Set when the user rates or edits their watchlist')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='precomputed_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
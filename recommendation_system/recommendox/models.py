@@ -2,6 +2,24 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Cast, NullIf, Substr
+from .db import sqlite_write
+from .storage import blob_storage
+
+class ContentQuerySet(models.QuerySet):
+    # Everything a poster card needs; description/cast/trailer stay deferred
+    CARD_FIELDS = (
+        'id', 'title', 'genre', 'language', 'content_type', 'release_date',
+        'created_at', 'poster', 'poster_url', 'rating_count', 'rating_sum',
+    )
+    
+    def cards(self):
+        """Lean projection for card grids, with a short description blurb"""
+        return self.only(*self.CARD_FIELDS).annotate(blurb=Substr('description', 1, 120))
+    
+    def with_rating_avg(self):
+        """Annotate rating_avg from the stored counters (no join over ratings)"""
+        return self.annotate(rating_avg=Cast('rating_sum', models.FloatField()) / NullIf('rating_count', 0))
 
 class Content(models.Model):
     GENRE_CHOICES = [
@@ -43,17 +61,35 @@ class Content(models.Model):
     duration = models.CharField(max_length=20, blank=True, null=True)  # "2h 30m" or "Season 1"
     director = models.CharField(max_length=100, blank=True, null=True)
     cast = models.TextField(blank=True, null=True)
-    poster_url = models.URLField(max_length=50000, blank=True, null=True)
-    trailer_url = models.URLField(max_length=50000, blank=True, null=True)
+    # Still wide enough for legacy data: URI posters until `manage.py import_posters` moves them
+    poster_url = models.URLField(max_length=50000, blank=True, null=True, help_text="External poster URL (uploads go to poster)")
+    trailer_url = models.URLField(max_length=1000, blank=True, null=True)
+    poster = models.ForeignKey('PosterImage', on_delete=models.SET_NULL, blank=True, null=True, related_name='contents')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.IntegerField(default=0, help_text="Number of times content details viewed")
+    total_episodes = models.IntegerField(default=0, editable=False, help_text="Episodes across all seasons (kept in sync by signals)")
+    total_runtime = models.IntegerField(default=0, editable=False, help_text="Runtime in minutes across all episodes (kept in sync by signals)")
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    
+    objects = ContentQuerySet.as_manager()
+    
+    # Maintained with F() updates elsewhere; a plain save() must not overwrite them
+    COUNTER_FIELDS = ('views_count', 'rating_count', 'rating_sum', 'total_episodes', 'total_runtime')
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def avg_rating(self):
-        ratings = self.ratings.all()
-        if ratings:
-            return sum([r.rating_value for r in ratings]) / len(ratings)
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
         return 0
     
     def __str__(self):
@@ -83,25 +119,55 @@ class Content(models.Model):
         else:
             return self.duration
 
+class PosterImage(models.Model):
+    """Poster stored once by digest; resized variants live in the posters storage"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    width = models.IntegerField(default=0)
+    height = models.IntegerField(default=0)
+    original_size = models.IntegerField(default=0, help_text="Bytes of the source image")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Poster {self.digest[:12]} ({self.width}x{self.height})"
+
 class Season(models.Model):
     content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='seasons')
     season_number = models.IntegerField()
     title = models.CharField(max_length=200, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
+    episode_count = models.IntegerField(default=0, editable=False)
+    total_duration = models.IntegerField(default=0, editable=False, help_text="Duration in minutes")
     
     class Meta:
         unique_together = ['content', 'season_number'] 
+        ordering = ['season_number']
     
     def __str__(self):
         return f"{self.content.title} - Season {self.season_number}"
     
-    @property
-    def episode_count(self):
-        return self.episodes.count()
-    
-    @property
-    def total_duration(self):
-        return self.episodes.aggregate(total=models.Sum('duration'))['total'] or 0
+    def refresh_rollups(self):
+        """Recompute episode count/runtime for this season and its series"""
+        totals = self.episodes.aggregate(count=models.Count('id'), total=models.Sum('duration'))
+        Season.objects.filter(pk=self.pk).update(
+            episode_count=totals['count'] or 0,
+            total_duration=totals['total'] or 0,
+        )
+        self.episode_count = totals['count'] or 0
+        self.total_duration = totals['total'] or 0
+        Season.refresh_content_rollups(self.content_id)
+    
+    @staticmethod
+    def refresh_content_rollups(content_id):
+        """Roll season totals up to the series and bump its version"""
+        from django.utils import timezone
+        totals = Season.objects.filter(content_id=content_id).aggregate(
+            count=models.Sum('episode_count'), total=models.Sum('total_duration')
+        )
+        Content.objects.filter(pk=content_id).update(
+            total_episodes=totals['count'] or 0,
+            total_runtime=totals['total'] or 0,
+            updated_at=timezone.now(),
+        )
 
 class Episode(models.Model):
     season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='episodes')
@@ -119,7 +185,7 @@ class Episode(models.Model):
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, null=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', storage=blob_storage, blank=True, null=True)
     is_premium = models.BooleanField(default=False)
     favorite_genres = models.CharField(max_length=500, blank=True, null=True)
     preferred_languages = models.CharField(max_length=500, blank=True, null=True)
@@ -161,11 +227,11 @@ class GoldenUser(models.Model):
     website = models.URLField(max_length=500, blank=True, null=True)
     social_media_links = models.JSONField(default=dict, blank=True, help_text="JSON of social media URLs")
     
-    profile_image = models.ImageField(upload_to='golden_profiles/', blank=True, null=True)
-    cover_image = models.ImageField(upload_to='golden_covers/', blank=True, null=True)
+    profile_image = models.ImageField(upload_to='golden_profiles/', storage=blob_storage, blank=True, null=True)
+    cover_image = models.ImageField(upload_to='golden_covers/', storage=blob_storage, blank=True, null=True)
     
     verification_status = models.CharField(max_length=20, choices=VERIFICATION_STATUS, default='Pending')
-    verification_documents = models.FileField(upload_to='verification_docs/', blank=True, null=True)
+    verification_documents = models.FileField(upload_to='verification_docs/', storage=blob_storage, blank=True, null=True)
     verification_notes = models.TextField(blank=True, null=True, help_text="Admin notes on verification")
     verified_at = models.DateTimeField(blank=True, null=True)
     verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='verified_golden_users')
@@ -192,12 +258,12 @@ class GoldenUser(models.Model):
         return '<span class="badge bg-warning"><i class="fas fa-clock"></i> Pending Verification</span>'
     
     def increment_content_views(self):
+        GoldenUser.objects.filter(pk=self.pk).update(total_content_views=models.F('total_content_views') + 1)
         self.total_content_views += 1
-        self.save()
     
     def increment_reviews_given(self):
+        GoldenUser.objects.filter(pk=self.pk).update(total_reviews_given=models.F('total_reviews_given') + 1)
         self.total_reviews_given += 1
-        self.save()
     
     class Meta:
         permissions = [
@@ -272,17 +338,132 @@ class Reviewer(models.Model):
 class Analytics(models.Model):
     content = models.OneToOneField(Content, on_delete=models.CASCADE, related_name='content_analytics')
     total_views = models.IntegerField(default=0)
-    popularity_score = models.FloatField(default=0.0)
+    popularity_score = models.FloatField(default=0.0, db_index=True)
     last_updated = models.DateTimeField(auto_now=True)
+    # Rating histogram, kept in step with Rating writes
+    stars_1 = models.IntegerField(default=0)
+    stars_2 = models.IntegerField(default=0)
+    stars_3 = models.IntegerField(default=0)
+    stars_4 = models.IntegerField(default=0)
+    stars_5 = models.IntegerField(default=0)
     
     def __str__(self):
         return f"Analytics for {self.content.title}"
     
+    def rating_histogram(self):
+        """[{'rating_value': 1, 'count': n}, ...] for the stars that have ratings"""
+        return [
+            {'rating_value': stars, 'count': getattr(self, f'stars_{stars}')}
+            for stars in range(1, 6) if getattr(self, f'stars_{stars}')
+        ]
+    
     def update_views(self):  
         self.total_views += 1
         self.save()
 
 
+class TrendingBucket(models.Model):
+    """Engagement events for one content within one minute, feeding the trending score"""
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='trending_buckets')
+    minute = models.DateTimeField(db_index=True)
+    views = models.IntegerField(default=0)
+    ratings = models.IntegerField(default=0)
+    reviews = models.IntegerField(default=0)
+    watchlist_adds = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['content', 'minute']
+    
+    def __str__(self):
+        return f"{self.content_id} @ {self.minute:%Y-%m-%d %H:%M}"
+
+
+class InteractionRollup(models.Model):
+    """Per-content interaction totals for one hour or one day, compacted from the raw event log"""
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='interaction_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    views = models.IntegerField(default=0)
+    watchlist_adds = models.IntegerField(default=0)
+    watchlist_removes = models.IntegerField(default=0)
+    ratings = models.IntegerField(default=0)
+    reviews = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['content', 'period', 'bucket_start']
+        indexes = [models.Index(fields=['period', 'bucket_start'])]
+    
+    def __str__(self):
+        return f"{self.content_id} {self.period} {self.bucket_start:%Y-%m-%d %H:00}"
+
+
+class EventLogCursor(models.Model):
+    """How far the rollup job has read into one day's event log file"""
+    name = models.CharField(max_length=100, unique=True)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}@{self.offset}"
+
+
+class ContentActivityBucket(models.Model):
+    """Per-content rating/review totals for one day or one week (weeks start on Monday)"""
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='activity_buckets')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateField()
+    ratings_count = models.IntegerField(default=0)
+    ratings_sum = models.IntegerField(default=0)
+    reviews_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['content', 'period', 'bucket_start']
+        ordering = ['bucket_start']
+    
+    def __str__(self):
+        return f"{self.content_id} {self.period} {self.bucket_start}"
+    
+    @property
+    def avg_rating(self):
+        return self.ratings_sum / self.ratings_count if self.ratings_count else 0
+
+class CatalogRollup(models.Model):
+    """Running totals per genre / language / content type / OTT platform"""
+    DIMENSION_CHOICES = [
+        ('genre', 'Genre'),
+        ('language', 'Language'),
+        ('content_type', 'Content Type'),
+        ('platform', 'OTT Platform'),
+    ]
+    
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=50)
+    content_count = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    views_sum = models.BigIntegerField(default=0, help_text="Refreshed by rebuild_catalog_rollups")
+    
+    class Meta:
+        unique_together = ['dimension', 'value']
+        ordering = ['dimension', 'value']
+    
+    def __str__(self):
+        return f"{self.dimension}={self.value}"
+    
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
 class ContentOTT(models.Model):
     """Simple OTT availability for content"""
     OTT_CHOICES = [
@@ -342,4 +523,164 @@ class ContentCreator(models.Model):
     class Meta:
         permissions = [
             ("can_manage_content", "Can add, edit, delete content"),
-        ]
\ No newline at end of file
+        ]
+
+class MediaBlob(models.Model):
+    """A deduplicated upload stored under its content digest"""
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # (model, field) pairs whose files are stored in blob_storage
+    TRACKED_FIELDS = [
+        ('UserProfile', 'profile_picture'),
+        ('GoldenUser', 'profile_image'),
+        ('GoldenUser', 'cover_image'),
+        ('GoldenUser', 'verification_documents'),
+    ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+    
+    @classmethod
+    def incref(cls, name):
+        cls.objects.filter(name=name).update(ref_count=models.F('ref_count') + 1)
+    
+    @classmethod
+    @sqlite_write
+    def claim(cls, name, digest, size, place):
+        """
+        Count a reference for a new upload and put its file in place (`place()`)
+        under the write lock, so a concurrent decref sees the reference first
+        """
+        blob, _ = cls.objects.get_or_create(name=name, defaults={'digest': digest, 'size': size})
+        cls.objects.filter(pk=blob.pk).update(ref_count=models.F('ref_count') + 1)
+        place()
+    
+    @classmethod
+    @sqlite_write
+    def decref(cls, name):
+        """Drop one reference; at zero delete the row and the file in the same locked transaction"""
+        blobs = cls.objects.filter(name=name)
+        list(blobs.select_for_update().values_list('pk', flat=True))
+        blobs.filter(ref_count__gt=0).update(ref_count=models.F('ref_count') - 1)
+        deleted, _ = blobs.filter(ref_count=0).delete()
+        if deleted:
+            blob_storage.delete(name)
+
+class ReplicaHeartbeat(models.Model):
+    """Single row written on the primary; its age on a replica is that replica's lag"""
+    beat_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Heartbeat at {self.beat_at}"
+    
+    @classmethod
+    def beat(cls, using='default'):
+        from django.utils import timezone
+        cls.objects.using(using).update_or_create(pk=1, defaults={'beat_at': timezone.now()})
+
+class SiteStats(models.Model):
+    """
+    Single-row snapshot of site-wide counts for the admin/moderation pages.
+    Signals apply +1/-1 deltas; `manage.py reconcile_stats` fixes drift.
+    """
+    total_users = models.IntegerField(default=0)
+    total_content = models.IntegerField(default=0)
+    total_reviews = models.IntegerField(default=0)
+    pending_reviews = models.IntegerField(default=0)
+    approved_reviews = models.IntegerField(default=0)
+    verified_reviews = models.IntegerField(default=0)
+    regular_reviews = models.IntegerField(default=0)
+    total_reviewers = models.IntegerField(default=0)
+    total_creators = models.IntegerField(default=0)
+    total_golden = models.IntegerField(default=0)
+    golden_pending = models.IntegerField(default=0)
+    golden_verified = models.IntegerField(default=0)
+    golden_rejected = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name_plural = 'Site stats'
+    
+    def __str__(self):
+        return f"Site stats (reconciled {self.reconciled_at})"
+    
+    @classmethod
+    def current(cls):
+        stats = cls.objects.filter(pk=1).first()
+        return stats if stats is not None else cls.reconcile()
+    
+    @classmethod
+    def bump(cls, **deltas):
+        """Apply counter deltas, e.g. bump(total_reviews=1, pending_reviews=1)"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updated = cls.objects.filter(pk=1).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated:
+            cls.reconcile()
+    
+    @classmethod
+    def compute(cls):
+        """Full recount from the source tables"""
+        reviews = Review.objects.aggregate(
+            total=models.Count('id'),
+            pending=models.Count('id', filter=models.Q(is_approved=False)),
+            verified=models.Count('id', filter=models.Q(is_verified=True)),
+        )
+        golden = GoldenUser.objects.aggregate(
+            total=models.Count('id'),
+            pending=models.Count('id', filter=models.Q(verification_status='Pending')),
+            verified=models.Count('id', filter=models.Q(verification_status='Verified')),
+            rejected=models.Count('id', filter=models.Q(verification_status='Rejected')),
+        )
+        return {
+            'total_users': User.objects.count(),
+            'total_content': Content.objects.count(),
+            'total_reviews': reviews['total'],
+            'pending_reviews': reviews['pending'],
+            'approved_reviews': reviews['total'] - reviews['pending'],
+            'verified_reviews': reviews['verified'],
+            'regular_reviews': reviews['total'] - reviews['verified'],
+            'total_reviewers': Reviewer.objects.count(),
+            'total_creators': ContentCreator.objects.count(),
+            'total_golden': golden['total'],
+            'golden_pending': golden['pending'],
+            'golden_verified': golden['verified'],
+            'golden_rejected': golden['rejected'],
+        }
+    
+    @classmethod
+    def reconcile(cls):
+        from django.utils import timezone
+        stats, _ = cls.objects.update_or_create(pk=1, defaults={**cls.compute(), 'reconciled_at': timezone.now()})
+        return stats
+
+class UserRecommendation(models.Model):
+    """Top-N recommendations precomputed by `manage.py precompute_recommendations`"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='precomputed_recommendations')
+    content_ids = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+    is_stale = models.BooleanField(default=False, help_text="Set when the user rates or edits their watchlist")
+    
+    def __str__(self):
+        return f"Recommendations for {self.user.username}"
+
+class RecommendationRun(models.Model):
+    """One precompute_recommendations batch; an unfinished run can be resumed"""
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    users_total = models.IntegerField(default=0)
+    users_done = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Run {self.pk}: {self.users_done}/{self.users_total}"
@@ -0,0 +1,219 @@
+# recommendox/ranking.py
+import contextvars
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Q
+
+from .caching import shared_computation
+from .feedback import load_feedback_matrix
+from .leaderboards import leaderboards
+from .models import Rating, Review, UserRecommendation, Watchlist
+from .segments import cold_start_ids, profile_preferences
+from .similarity import similarity_index
+from .trending import trending_content_ids
+
+# Candidate sources are blended by rank: a source's first pick scores its full weight
+BLEND_WEIGHTS = {'collaborative': 1.0, 'similar': 0.8, 'segments': 0.6, 'trending': 0.4}
+# Boosts only lift candidates some blend source already proposed
+BOOST_WEIGHTS = {'critics': 0.3}
+# Sources whose result is the same for every user, so their fallback is cached once
+GLOBAL_SOURCES = {'trending', 'critics'}
+CANDIDATE_FACTOR = 4  # each source proposes k * this many titles
+SIMILARITY_SEEDS = 5
+SIMILARITY_NEIGHBOURS = 10
+CRITICS_CACHE_KEY = 'ranking:critics'
+STALE_SECONDS = 3600
+
+
+# SOURCES: (user_id, n) -> content ids, best first
+
+def collaborative_source(user_id, n):
+    """
+    The batch model's list while it is current. Once the user has rated or
+    changed their watchlist since the run (is_stale), or has no list yet,
+    fall back to an on-the-fly pick from their favourite genres.
+    """
+    stored = UserRecommendation.objects.filter(user_id=user_id).values_list('content_ids', 'is_stale').first()
+    if stored and not stored[1]:
+        return list(stored[0])[:n]
+    return favourite_genre_ids(user_id, n)
+
+
+def favourite_genre_ids(user_id, n):
+    """Top-rated unseen titles of the two genres the user rated 4+ stars most"""
+    genres, rated = Counter(), set()
+    for content_id, genre, value in Rating.objects.filter(user_id=user_id).values_list(
+        'content_id', 'content__genre', 'rating_value'
+    ):
+        rated.add(content_id)
+        if value >= 4:
+            genres[genre] += value
+    return leaderboards.top_across('genre', [genre for genre, _ in genres.most_common(2)], n, exclude=rated)
+
+
+def liked_seeds(user_id):
+    """The user's strongest positive titles, from the feedback matrix when it has been built"""
+    feedback = load_feedback_matrix()
+    if feedback is not None:
+        row = feedback.row(user_id)
+        return sorted((cid for cid, w in row.items() if w > 0), key=lambda cid: -row[cid])[:SIMILARITY_SEEDS]
+    return list(
+        Rating.objects.filter(user_id=user_id, rating_value__gte=4)
+        .order_by('-rating_date').values_list('content_id', flat=True)[:SIMILARITY_SEEDS]
+    )
+
+
+def similar_source(user_id, n):
+    votes = Counter()
+    for seed in liked_seeds(user_id):
+        for rank, content_id in enumerate(similarity_index.similar_ids(seed, SIMILARITY_NEIGHBOURS)):
+            votes[content_id] += 1.0 / (rank + 1)
+    return [content_id for content_id, _ in votes.most_common(n)]
+
+
+def trending_source(user_id, n):
+    return trending_content_ids()[:n]
+
+
+def segments_source(user_id, n):
+    return cold_start_ids(*profile_preferences(user_id), n)
+
+
+def compute_critic_counts():
+    """{content_id: reviews by active verified reviewers or verified golden users}"""
+    rows = Review.objects.filter(
+        Q(is_verified=True, user__profile__reviewer_profile__is_active=True)
+        | Q(user__profile__golden_profile__verification_status='Verified')
+    ).values('content_id').annotate(n=Count('id', distinct=True))
+    return {row['content_id']: row['n'] for row in rows}
+
+
+def critics_source(user_id, n):
+    counts = shared_computation(
+        CRITICS_CACHE_KEY, compute_critic_counts, ttl=settings.RANKER_CACHE_SECONDS, stale_ttl=STALE_SECONDS
+    )
+    return sorted(counts, key=lambda cid: (-counts[cid], cid))
+
+
+SOURCES = {
+    'collaborative': collaborative_source,
+    'similar': similar_source,
+    'trending': trending_source,
+    'segments': segments_source,
+    'critics': critics_source,
+}
+
+
+def fallback_key(name, user_id):
+    return f'ranker:{name}' if name in GLOBAL_SOURCES else f'ranker:{name}:{user_id}'
+
+
+def seen_ids(user_id):
+    return set(
+        Rating.objects.filter(user_id=user_id).order_by().values_list('content_id', flat=True)
+        .union(Watchlist.objects.filter(user_id=user_id).order_by().values_list('content_id', flat=True))
+    )
+
+
+def blend(results, seen, k):
+    scores = defaultdict(float)
+    for name, weight in BLEND_WEIGHTS.items():
+        ids = [cid for cid in results.get(name, ()) if cid not in seen]
+        for rank, content_id in enumerate(ids):
+            scores[content_id] += weight * (1 - rank / len(ids))
+    for name, weight in BOOST_WEIGHTS.items():
+        ids = results.get(name, ())
+        for rank, content_id in enumerate(ids):
+            if content_id in scores:
+                scores[content_id] += weight * (1 - rank / len(ids))
+    return sorted(scores, key=lambda cid: (-scores[cid], cid))[:k]
+
+
+class HybridRanker:
+    """
+    Runs every candidate source in a shared thread pool and waits for each
+    only up to its RANKER_SOURCE_BUDGETS_MS (and never past RANKER_BUDGET_MS
+    overall). A source that misses its budget, fails or is still busy from
+    an earlier request is replaced by its last good result from the cache;
+    late results still land in that cache, so a cold model warms up in the
+    background instead of on the request path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._inflight = set()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.RANKER_THREADS, thread_name_prefix='ranker'
+                )
+            return self._executor
+
+    def _run(self, name, user_id, n):
+        try:
+            result = SOURCES[name](user_id, n)
+            cache.set(fallback_key(name, user_id), result, settings.RANKER_CACHE_SECONDS)
+            return result
+        finally:
+            self._release(name, user_id)
+            connections.close_all()
+
+    def _release(self, name, user_id):
+        with self._lock:
+            self._inflight.discard((name, user_id))
+
+    def _submit(self, name, user_id, n):
+        with self._lock:
+            if (name, user_id) in self._inflight:
+                return None
+            self._inflight.add((name, user_id))
+        # Carry the request's primary pin over, so a user who just wrote is not ranked from a replica
+        return self.executor.submit(contextvars.copy_context().run, self._run, name, user_id, n)
+
+    def rank(self, user_id, k=6):
+        """(content ids, {source: (status, ms)}) within the latency budget"""
+        started = time.monotonic()
+        budgets = settings.RANKER_SOURCE_BUDGETS_MS
+        total = settings.RANKER_BUDGET_MS
+        futures = {name: self._submit(name, user_id, k * CANDIDATE_FACTOR) for name in SOURCES}
+        seen = seen_ids(user_id)
+
+        results, report = {}, {}
+        for name in sorted(SOURCES, key=lambda name: budgets.get(name, total)):
+            future, status = futures[name], 'busy'
+            if future is not None:
+                deadline = started + min(budgets.get(name, total), total) / 1000
+                try:
+                    results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+                    status = 'ok'
+                except FutureTimeout:
+                    status = 'timeout'
+                    if future.cancel():
+                        self._release(name, user_id)
+                except Exception:
+                    status = 'error'
+            if name not in results:
+                cached = cache.get(fallback_key(name, user_id))
+                if cached is not None:
+                    results[name] = cached
+                    status += '+cached'
+            report[name] = (status, round((time.monotonic() - started) * 1000, 1))
+
+        ranked = blend(results, seen, k)
+        if len(ranked) < k:
+            ranked += leaderboards.top('all', '', k - len(ranked), exclude=seen | set(ranked))
+        return ranked, report
+
+
+hybrid_ranker = HybridRanker()
@@ -0,0 +1,57 @@
+# recommendox/recently_viewed.py
+from django.conf import settings
+
+from .leaderboards import ranked_cards
+from .similarity import similarity_index
+
+COOKIE = 'recent'
+COOKIE_SALT = 'recommendox.recently_viewed'
+COOKIE_AGE = 30 * 24 * 3600
+
+
+def recently_viewed(request):
+    """Content ids from the signed cookie, most recent first; empty if missing or tampered with"""
+    raw = request.get_signed_cookie(COOKIE, default='', salt=COOKIE_SALT, max_age=COOKIE_AGE)
+    ids = []
+    for part in raw.split('.'):
+        if part.isdigit() and int(part) not in ids:
+            ids.append(int(part))
+    return ids[:settings.RECENTLY_VIEWED_SIZE]
+
+
+def remember_view(request, response, content_id):
+    """Move `content_id` to the front of the cookie list (a header, never a session or DB write)"""
+    current = recently_viewed(request)
+    updated = ([content_id] + [cid for cid in current if cid != content_id])[:settings.RECENTLY_VIEWED_SIZE]
+    if updated != current:
+        response.set_signed_cookie(
+            COOKIE, '.'.join(map(str, updated)), salt=COOKIE_SALT, max_age=COOKIE_AGE, httponly=True, samesite='Lax'
+        )
+    return response
+
+
+def because_you_viewed(viewed, seeds=2, per_seed=4, exclude=()):
+    """
+    [(seed card, [neighbour cards])] for the most recent `seeds` titles,
+    from the similarity index's neighbour lists. Titles already viewed or
+    in `exclude` are skipped, and each title is shown under one seed only.
+    """
+    skip = set(viewed) | set(exclude)
+    groups = []
+    for seed in viewed:
+        if len(groups) >= seeds:
+            break
+        if seed in exclude:
+            continue
+        neighbours = [cid for cid in similarity_index.similar_ids(seed, per_seed * 2) if cid not in skip][:per_seed]
+        if neighbours:
+            groups.append((seed, neighbours))
+            skip.update(neighbours)
+    if not groups:
+        return []
+
+    cards = {card.id: card for card in ranked_cards([cid for seed, ids in groups for cid in [seed, *ids]])}
+    return [
+        (cards[seed], [cards[cid] for cid in ids if cid in cards])
+        for seed, ids in groups if seed in cards
+    ]
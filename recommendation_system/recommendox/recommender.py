@@ -0,0 +1,153 @@
+# recommendox/recommender.py
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from .db import sqlite_write
+from .feedback import load_feedback_matrix
+from .leaderboards import bayesian_rating
+from .models import Content, Rating, UserRecommendation, Watchlist
+
+# Weight of the Bayesian popularity prior next to the user's taste match
+PRIOR_WEIGHT = 0.3
+WATCHLIST_WEIGHT = 1.0
+MODEL_FILES = ('item_ids', 'features', 'prior')
+
+
+def feature_columns():
+    return (
+        [('genre', value) for value, _ in Content.GENRE_CHOICES]
+        + [('language', value) for value, _ in Content.LANGUAGE_CHOICES]
+        + [('content_type', value) for value, _ in Content.CONTENT_TYPES]
+    )
+
+
+def item_arrays(rows, prior_votes):
+    """
+    (item_ids, features, prior) from (id, genre, language, content_type,
+    rating_count, rating_sum) rows sorted by id: one-hot rows scaled to
+    unit length and the Bayesian rating scaled to 0..1.
+    """
+    columns = {column: i for i, column in enumerate(feature_columns())}
+    total_count = sum(row[4] for row in rows)
+    prior_mean = sum(row[5] for row in rows) / total_count if total_count else 0.0
+
+    item_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    features = np.zeros((len(rows), len(columns)), dtype=np.float32)
+    prior = np.zeros(len(rows), dtype=np.float32)
+    for i, (_, genre, language, content_type, count, rating_sum) in enumerate(rows):
+        for column in (('genre', genre), ('language', language), ('content_type', content_type)):
+            if column in columns:
+                features[i, columns[column]] = 1.0
+        prior[i] = bayesian_rating(count, rating_sum, prior_mean, prior_votes) / 5.0
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    features /= np.where(norms == 0, 1, norms)
+    return item_ids, features, prior
+
+
+def build_item_model(directory):
+    """Write the shared item model as .npy files in `directory` for workers to memory-map"""
+    rows = list(Content.objects.order_by('id').values_list(
+        'id', 'genre', 'language', 'content_type', 'rating_count', 'rating_sum'
+    ))
+    arrays = item_arrays(rows, settings.LEADERBOARD_PRIOR_VOTES)
+    directory = Path(directory)
+    for name, array in zip(MODEL_FILES, arrays):
+        np.save(directory / f'{name}.npy', array)
+    return len(rows)
+
+
+_models = {}
+
+
+def load_item_model(directory):
+    """Memory-mapped model arrays, opened once per process"""
+    directory = str(directory)
+    if directory not in _models:
+        _models[directory] = tuple(
+            np.load(Path(directory) / f'{name}.npy', mmap_mode='r') for name in MODEL_FILES
+        )
+    return _models[directory]
+
+
+def user_signals(user_ids):
+    """{user_id: {content_id: weight}} from ratings (centred on 3 stars) and watchlists"""
+    signals = defaultdict(dict)
+    for user_id, content_id, value in Rating.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'content_id', 'rating_value'
+    ):
+        signals[user_id][content_id] = value - 3.0
+    for user_id, content_id in Watchlist.objects.filter(user_id__in=user_ids).values_list('user_id', 'content_id'):
+        signals[user_id].setdefault(content_id, WATCHLIST_WEIGHT)
+    return signals
+
+
+def recommend(item_ids, features, prior, signals, n):
+    """Top-n (content ids, scores) for one user's {content_id: weight} signals"""
+    if not len(item_ids):
+        return [], []
+    scores = PRIOR_WEIGHT * np.asarray(prior, dtype=np.float32)
+
+    if signals:
+        ids = np.fromiter(signals, dtype=np.int64, count=len(signals))
+        rows = np.minimum(np.searchsorted(item_ids, ids), len(item_ids) - 1)
+        found = item_ids[rows] == ids
+        known = rows[found]
+        weights = np.fromiter(signals.values(), dtype=np.float32, count=len(signals))[found]
+        taste = weights @ features[known]
+        norm = np.linalg.norm(taste)
+        if norm:
+            scores = scores + features @ (taste / norm)
+        scores[known] = -np.inf
+
+    n = min(n, int(np.isfinite(scores).sum()))
+    if n <= 0:
+        return [], []
+    top = np.argpartition(-scores, n - 1)[:n]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return item_ids[top].tolist(), [round(float(s), 4) for s in scores[top]]
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer: set Django up under spawn, drop inherited connections"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from django.db import connections
+    connections.close_all()
+
+
+def score_shard(model_dir, user_ids, n):
+    """
+    Worker task: [(user_id, content_ids, scores)] for one shard of users.
+    Users with no activity get an empty list so the dashboard serves them
+    from their onboarding segments instead of the global prior.
+    """
+    item_ids, features, prior = load_item_model(model_dir)
+    feedback = load_feedback_matrix()
+    signals = feedback.rows(user_ids) if feedback is not None else user_signals(user_ids)
+    return [
+        (user_id, *recommend(item_ids, features, prior, signals[user_id], n)) if user_id in signals else (user_id, [], [])
+        for user_id in user_ids
+    ]
+
+
+@sqlite_write
+def save_recommendations(results, computed_at):
+    """Bulk upsert one shard's results into UserRecommendation"""
+    live = set(User.objects.filter(pk__in=[row[0] for row in results]).values_list('pk', flat=True))
+    UserRecommendation.objects.bulk_create(
+        [
+            UserRecommendation(
+                user_id=user_id, content_ids=content_ids, scores=scores, computed_at=computed_at, is_stale=False
+            )
+            for user_id, content_ids, scores in results if user_id in live
+        ],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['content_ids', 'scores', 'computed_at', 'is_stale'],
+    )
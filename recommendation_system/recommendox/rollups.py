@@ -0,0 +1,189 @@
+# recommendox/rollups.py
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Analytics, CatalogRollup, Content, ContentActivityBucket, ContentOTT, Rating
+
+CATALOG_FIELDS = ('genre', 'language', 'content_type')
+
+
+def upsert_increment(model, lookup, **deltas):
+    """
+    Add `deltas` to the row matching `lookup`, creating it if needed.
+    A concurrent insert loses the race on the unique key and retries the
+    update. Pure decrements never create rows (e.g. during a cascade delete).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments) or all(d < 0 for d in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**increments)
+
+
+def bucket_starts(when):
+    """Start dates of the day and week buckets that contain `when`"""
+    day = timezone.localtime(when).date() if timezone.is_aware(when) else when.date()
+    return {'day': day, 'week': day - timedelta(days=day.weekday())}
+
+
+def bump_histogram(content_id, stars, delta):
+    if 1 <= int(stars) <= 5:
+        upsert_increment(Analytics, {'content_id': content_id}, **{f'stars_{int(stars)}': delta})
+
+
+def bump_activity(content_id, when, ratings=0, rating_sum=0, reviews=0):
+    for period, start in bucket_starts(when).items():
+        upsert_increment(
+            ContentActivityBucket,
+            {'content_id': content_id, 'period': period, 'bucket_start': start},
+            ratings_count=ratings, ratings_sum=rating_sum, reviews_count=reviews,
+        )
+
+
+def subtract_activity(rows):
+    """
+    Take many (content_id, when, ratings, rating_sum, reviews) rows out of
+    the activity buckets with one decrement per bucket, e.g. for everything
+    a deleted user had posted.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for content_id, when, ratings, rating_sum, reviews in rows:
+        for period, start in bucket_starts(when).items():
+            entry = deltas[(content_id, period, start)]
+            entry[0] += ratings
+            entry[1] += rating_sum
+            entry[2] += reviews
+    for (content_id, period, start), (ratings, rating_sum, reviews) in deltas.items():
+        upsert_increment(
+            ContentActivityBucket,
+            {'content_id': content_id, 'period': period, 'bucket_start': start},
+            ratings_count=-ratings, ratings_sum=-rating_sum, reviews_count=-reviews,
+        )
+
+
+def recount_ratings(content_ids):
+    """Recount the rating counters and star histograms of `content_ids` from Rating, two UPDATEs in all"""
+    if not content_ids:
+        return
+    ratings = Rating.objects.filter(content_id=OuterRef('pk')).order_by().values('content_id')
+    Content.objects.filter(pk__in=content_ids).update(
+        rating_count=Coalesce(Subquery(ratings.annotate(n=Count('id')).values('n')), 0),
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating_value')).values('total')), 0),
+    )
+    stars = Rating.objects.filter(content_id=OuterRef('content_id')).order_by().values('content_id')
+    Analytics.objects.filter(content_id__in=content_ids).update(**{
+        f'stars_{n}': Coalesce(Subquery(stars.filter(rating_value=n).annotate(c=Count('id')).values('c')), 0)
+        for n in range(1, 6)
+    })
+
+
+def activity_trend(content_id, period='week', buckets=12):
+    """
+    The last `buckets` days/weeks for a content, oldest first, with empty
+    periods filled in so charts get an even series.
+    """
+    step = timedelta(days=7 if period == 'week' else 1)
+    latest = bucket_starts(timezone.now())[period]
+    starts = [latest - step * i for i in reversed(range(buckets))]
+
+    rows = {
+        bucket.bucket_start: bucket
+        for bucket in ContentActivityBucket.objects.filter(
+            content_id=content_id, period=period, bucket_start__gte=starts[0]
+        )
+    }
+    return [
+        rows.get(start) or ContentActivityBucket(content_id=content_id, period=period, bucket_start=start)
+        for start in starts
+    ]
+
+
+def content_dimensions(content_id, fields=None):
+    """(dimension, value) pairs a content counts towards, OTT platforms included"""
+    if fields is None:
+        fields = Content.objects.filter(pk=content_id).values(*CATALOG_FIELDS).first() or {}
+    dims = [(name, fields[name]) for name in CATALOG_FIELDS if fields.get(name)]
+    dims += [
+        ('platform', platform)
+        for platform in ContentOTT.objects.filter(content_id=content_id).values_list('platform_name', flat=True)
+    ]
+    return dims
+
+
+def bump_catalog(dimensions, **deltas):
+    for dimension, value in dimensions:
+        upsert_increment(CatalogRollup, {'dimension': dimension, 'value': value}, **deltas)
+
+
+def subtract_catalog_ratings(totals):
+    """Take {content_id: (ratings, rating_sum)} out of the rollups with one decrement per dimension"""
+    dims = defaultdict(list)
+    for row in Content.objects.filter(pk__in=totals).values('id', *CATALOG_FIELDS):
+        dims[row['id']] += [(name, row[name]) for name in CATALOG_FIELDS if row[name]]
+    for content_id, platform in ContentOTT.objects.filter(content_id__in=totals).values_list('content_id', 'platform_name'):
+        dims[content_id].append(('platform', platform))
+
+    deltas = defaultdict(lambda: [0, 0])
+    for content_id, (ratings, rating_sum) in totals.items():
+        for dim in dims[content_id]:
+            deltas[dim][0] += ratings
+            deltas[dim][1] += rating_sum
+    for dim, (ratings, rating_sum) in deltas.items():
+        bump_catalog([dim], rating_count=-ratings, rating_sum=-rating_sum)
+
+
+def catalog_stats(dimension, order_by='value'):
+    """All rollup rows for one dimension: a single indexed query"""
+    return list(CatalogRollup.objects.filter(dimension=dimension).order_by(order_by))
+
+
+def compute_catalog_rollups():
+    """Full recount of every catalog rollup as {(dimension, value): totals}"""
+    totals = {}
+    by_content = {}
+    rows = Content.objects.values_list('id', *CATALOG_FIELDS, 'rating_count', 'rating_sum', 'views_count')
+    for content_id, genre, language, content_type, n, total, views in rows:
+        by_content[content_id] = (1, n, total, views)
+        for key in (('genre', genre), ('language', language), ('content_type', content_type)):
+            if key[1]:
+                _add(totals, key, by_content[content_id])
+    for content_id, platform in ContentOTT.objects.values_list('content_id', 'platform_name'):
+        _add(totals, ('platform', platform), by_content.get(content_id, (1, 0, 0, 0)))
+    return totals
+
+
+def _add(totals, key, row):
+    totals[key] = tuple(a + b for a, b in zip(totals.get(key, (0, 0, 0, 0)), row))
+
+
+@transaction.atomic
+def rebuild_catalog_rollups():
+    """Replace the rollup table with a fresh recount; returns {key: (old, new)} for drifted rows"""
+    fields = ('content_count', 'rating_count', 'rating_sum', 'views_sum')
+    before = {
+        (row[0], row[1]): row[2:]
+        for row in CatalogRollup.objects.values_list('dimension', 'value', *fields)
+    }
+    after = compute_catalog_rollups()
+    CatalogRollup.objects.all().delete()
+    CatalogRollup.objects.bulk_create([
+        CatalogRollup(dimension=dimension, value=value, **dict(zip(fields, row)))
+        for (dimension, value), row in after.items()
+    ])
+    empty = (0, 0, 0, 0)
+    return {
+        key: (before.get(key, empty), after.get(key, empty))
+        for key in set(before) | set(after)
+        if tuple(before.get(key, empty)) != tuple(after.get(key, empty))
+    }
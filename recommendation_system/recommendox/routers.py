@@ -0,0 +1,72 @@
+# recommendox/routers.py
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils import timezone
+
+# Set (and reset) by ReplicaPinningMiddleware for unsafe requests or a client that wrote recently
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+# Apps whose reads must never be stale (sessions are read right after login)
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_replica_health = {}  # alias -> (checked_at, healthy)
+
+
+def pin_to_primary(pinned=True):
+    return _pinned_to_primary.set(pinned)
+
+
+def unpin(token):
+    _pinned_to_primary.reset(token)
+
+
+def is_pinned():
+    return _pinned_to_primary.get()
+
+
+def replica_is_healthy(alias):
+    """A replica is usable while its copy of the heartbeat is fresh enough"""
+    from .models import ReplicaHeartbeat
+    
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 5)
+    checked_at, healthy = _replica_health.get(alias, (0, False))
+    if time.monotonic() - checked_at < interval:
+        return healthy
+    
+    try:
+        beat_at = ReplicaHeartbeat.objects.using(alias).values_list('beat_at', flat=True).first()
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+        healthy = beat_at is not None and (timezone.now() - beat_at).total_seconds() <= max_lag
+    except Exception:
+        healthy = False
+    _replica_health[alias] = (time.monotonic(), healthy)
+    return healthy
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to 'default'; reads go to a healthy replica from
+    DATABASE_REPLICAS unless the request is pinned to the primary.
+    Writing never pins by itself: a pin set here would outlive the request
+    in management commands and worker threads that have no middleware to
+    reset it.
+    """
+    
+    def db_for_read(self, model, **hints):
+        if is_pinned() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        replicas = [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if replica_is_healthy(alias)]
+        return random.choice(replicas) if replicas else 'default'
+    
+    def db_for_write(self, model, **hints):
+        return 'default'
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own
+        return db == 'default'
@@ -0,0 +1,85 @@
+# recommendox/segments.py
+from collections import defaultdict
+from itertools import product
+
+from django.conf import settings
+
+from .caching import shared_computation, store_computation
+from .leaderboards import bayesian_rating
+from .models import Content, UserProfile
+
+SEGMENTS_CACHE_KEY = 'segments:top'
+STALE_SECONDS = 3600
+
+
+def segment_key(genre='', language=''):
+    """'Drama|Hindi'; either side may be empty for a genre-only or language-only segment"""
+    return f'{genre}|{language}'
+
+
+def compute_segments():
+    """
+    Top SEGMENT_SIZE ids per (genre, language), per genre and per language,
+    ranked by Bayesian rating from the stored counters.
+    """
+    rows = list(Content.objects.values_list('id', 'genre', 'language', 'rating_count', 'rating_sum'))
+    total_count = sum(row[3] for row in rows)
+    prior_mean = sum(row[4] for row in rows) / total_count if total_count else 0.0
+
+    ranked = sorted(
+        rows,
+        key=lambda row: (-bayesian_rating(row[3], row[4], prior_mean, settings.LEADERBOARD_PRIOR_VOTES), -row[3], -row[0]),
+    )
+    segments = defaultdict(list)
+    for content_id, genre, language, _, _ in ranked:
+        for key in (segment_key(genre, language), segment_key(genre=genre), segment_key(language=language)):
+            if len(segments[key]) < settings.SEGMENT_SIZE:
+                segments[key].append(content_id)
+    return dict(segments)
+
+
+def publish_segments(segments):
+    store_computation(SEGMENTS_CACHE_KEY, segments, settings.SEGMENT_REFRESH_SECONDS, STALE_SECONDS)
+
+
+def segment_lists():
+    return shared_computation(
+        SEGMENTS_CACHE_KEY, compute_segments, ttl=settings.SEGMENT_REFRESH_SECONDS, stale_ttl=STALE_SECONDS
+    )
+
+
+def split_preference(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def profile_preferences(user):
+    """(favorite genres, preferred languages) from the user's profile"""
+    row = UserProfile.objects.filter(user=user).values_list('favorite_genres', 'preferred_languages').first()
+    if row is None:
+        return [], []
+    return split_preference(row[0]), split_preference(row[1])
+
+
+def preferred_segments(genres, languages):
+    if genres and languages:
+        return [segment_key(g, l) for g, l in product(genres, languages)]
+    return [segment_key(genre=g) for g in genres] + [segment_key(language=l) for l in languages]
+
+
+def cold_start_ids(genres, languages, k, exclude=()):
+    """
+    Round-robin over the user's segment lists: at most k * segments steps,
+    independent of catalogue size. Empty when no preferences are set.
+    """
+    segments = segment_lists()
+    lists = [segments.get(key, []) for key in preferred_segments(genres, languages)]
+    seen = set(exclude)
+    result = []
+    for rank in range(settings.SEGMENT_SIZE):
+        for ids in lists:
+            if rank < len(ids) and ids[rank] not in seen:
+                result.append(ids[rank])
+                seen.add(ids[rank])
+                if len(result) >= k:
+                    return result
+    return result
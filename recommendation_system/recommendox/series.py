@@ -0,0 +1,42 @@
+# recommendox/series.py
+from django.core.cache import cache
+from django.db.models import Prefetch
+from .models import Content, Season, Episode
+
+SERIES_TREE_TIMEOUT = 60 * 60
+
+
+def series_tree_key(content_id, updated_at):
+    return f"series_tree:{content_id}:{updated_at.timestamp()}"
+
+
+def get_series_tree(content_id):
+    """
+    Load Content -> seasons -> episodes in three queries and cache it.
+    The key includes Content.updated_at, which the episode signals bump,
+    so any edit to the series yields a fresh tree.
+    """
+    updated_at = Content.objects.filter(pk=content_id).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    
+    key = series_tree_key(content_id, updated_at)
+    content = cache.get(key)
+    if content is None:
+        content = Content.objects.prefetch_related(
+            Prefetch(
+                'seasons',
+                queryset=Season.objects.order_by('season_number').prefetch_related(
+                    Prefetch('episodes', queryset=Episode.objects.order_by('episode_number'))
+                ),
+            )
+        ).filter(pk=content_id).first()
+        if content is None:
+            return None
+        # Point children back at their cached parents so __str__ stays query-free
+        for season in content.seasons.all():
+            season.content = content
+            for episode in season.episodes.all():
+                episode.season = season
+        cache.set(key, content, SERIES_TREE_TIMEOUT)
+    return content
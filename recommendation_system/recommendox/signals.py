@@ -0,0 +1,546 @@
+# recommendox/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.db.models import F, QuerySet
+from django.contrib.auth.models import User
+from .auth_cache import invalidate_user_bundle
+from .content_cache import invalidate_content
+from .feed import invalidate_feed
+from .events import log_event
+from .leaderboards import leaderboards
+from .catalog_index import catalog_index
+from .similarity import similarity_index
+from .storage import take_claim
+from .trending import record_event
+from .rollups import (
+    CATALOG_FIELDS, bump_activity, bump_catalog, bump_histogram, content_dimensions, recount_ratings,
+    subtract_activity, subtract_catalog_ratings,
+)
+from .models import (
+    Content, ContentOTT, Season, Watchlist, Episode, UserProfile, GoldenUser, MediaBlob, Rating, Reviewer, ContentCreator,
+    Review, SiteStats, UserRecommendation
+)
+
+
+def _cascade_from(kwargs):
+    """
+    Content or User when a delete of one of those is cascading into this
+    row, else None. Per-row delete receivers bail out then, and the
+    parent's post_delete settles the aggregates once for all its rows.
+    """
+    origin = kwargs.get('origin')
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model if model in (Content, User) else None
+
+
+# SERIES ROLLUPS
+@receiver(pre_save, sender=Episode)
+def remember_previous_season(sender, instance, **kwargs):
+    """Track the old season so moving an episode refreshes both sides"""
+    instance._previous_season_id = None
+    if instance.pk:
+        instance._previous_season_id = (
+            Episode.objects.filter(pk=instance.pk).values_list('season_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Episode)
+@receiver(post_delete, sender=Episode)
+def update_season_rollups(sender, instance, **kwargs):
+    """Keep Season/Content episode counts and runtimes in sync"""
+    season_ids = {instance.season_id, getattr(instance, '_previous_season_id', None)}
+    for season in Season.objects.filter(id__in=[s for s in season_ids if s]):
+        season.refresh_rollups()
+        invalidate_content(season.content_id)
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+def update_content_rollups(sender, instance, **kwargs):
+    """Re-total the series and bump its updated_at when a season is added, edited or deleted"""
+    Season.refresh_content_rollups(instance.content_id)
+    invalidate_content(instance.content_id)
+
+
+# MEDIA BLOB REFERENCE COUNTS
+def _blob_fields(sender):
+    return [field for model, field in MediaBlob.TRACKED_FIELDS if model == sender.__name__]
+
+
+@receiver(pre_save, sender=UserProfile)
+@receiver(pre_save, sender=GoldenUser)
+def remember_previous_blobs(sender, instance, **kwargs):
+    """Snapshot the stored file names before they are overwritten"""
+    fields = _blob_fields(sender)
+    previous = {}
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._previous_blobs = previous
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=GoldenUser)
+def update_blob_refs(sender, instance, **kwargs):
+    """Move references from the old file to the new one"""
+    previous = getattr(instance, '_previous_blobs', {})
+    for field in _blob_fields(sender):
+        old_name = previous.get(field) or ''
+        new_name = getattr(instance, field).name or ''
+        if old_name == new_name:
+            continue
+        if new_name and not take_claim(new_name):
+            MediaBlob.incref(new_name)  # the upload itself already counted fresh files
+        if old_name:
+            transaction.on_commit(lambda name=old_name: MediaBlob.decref(name))
+
+
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=GoldenUser)
+def release_blob_refs(sender, instance, **kwargs):
+    for field in _blob_fields(sender):
+        name = getattr(instance, field).name
+        if name:
+            transaction.on_commit(lambda name=name: MediaBlob.decref(name))
+
+
+# RATING COUNTERS
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_value = None
+    if instance.pk:
+        instance._previous_value = (
+            Rating.objects.filter(pk=instance.pk).values_list('rating_value', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Rating)
+def count_rating(sender, instance, created, **kwargs):
+    """Keep Content rating counters, the histogram, activity buckets and catalog rollups in step"""
+    value = int(instance.rating_value)
+    previous = getattr(instance, '_previous_value', None)
+    if created or previous is None:
+        Content.objects.filter(pk=instance.content_id).update(
+            rating_count=F('rating_count') + 1, rating_sum=F('rating_sum') + value
+        )
+        bump_histogram(instance.content_id, value, 1)
+        bump_activity(instance.content_id, instance.rating_date, ratings=1, rating_sum=value)
+        bump_catalog(content_dimensions(instance.content_id), rating_count=1, rating_sum=value)
+    elif previous != value:
+        Content.objects.filter(pk=instance.content_id).update(rating_sum=F('rating_sum') + value - previous)
+        bump_histogram(instance.content_id, previous, -1)
+        bump_histogram(instance.content_id, value, 1)
+        bump_activity(instance.content_id, instance.rating_date, rating_sum=value - previous)
+        bump_catalog(content_dimensions(instance.content_id), rating_sum=value - previous)
+    invalidate_content(instance.content_id)
+
+
+@receiver(post_delete, sender=Rating)
+def uncount_rating(sender, instance, **kwargs):
+    if _cascade_from(kwargs):
+        return  # settled by settle_user_activity / uncount_catalog_content
+    value = int(instance.rating_value)
+    Content.objects.filter(pk=instance.content_id).update(
+        rating_count=F('rating_count') - 1, rating_sum=F('rating_sum') - value
+    )
+    bump_histogram(instance.content_id, value, -1)
+    bump_activity(instance.content_id, instance.rating_date, ratings=-1, rating_sum=-value)
+    bump_catalog(content_dimensions(instance.content_id), rating_count=-1, rating_sum=-value)
+    invalidate_content(instance.content_id)
+
+
+@receiver(post_save, sender=Review)
+def count_review_activity(sender, instance, created, **kwargs):
+    if created:
+        bump_activity(instance.content_id, instance.review_date, reviews=1)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review_activity(sender, instance, **kwargs):
+    if _cascade_from(kwargs) is None:
+        bump_activity(instance.content_id, instance.review_date, reviews=-1)
+
+
+# CASCADE DELETES
+@receiver(pre_delete, sender=User)
+def remember_user_activity(sender, instance, **kwargs):
+    """Snapshot what the user posted; the cascade removes it row by row without per-row bookkeeping"""
+    instance._cascade_ratings = list(
+        Rating.objects.filter(user_id=instance.pk).values_list('content_id', 'rating_value', 'rating_date')
+    )
+    instance._cascade_reviews = list(
+        Review.objects.filter(user_id=instance.pk).values_list('content_id', 'review_date', 'is_approved', 'is_verified')
+    )
+
+
+@receiver(post_delete, sender=User)
+def settle_user_activity(sender, instance, **kwargs):
+    """One recount per rated title and one decrement per activity bucket, instead of ~10 queries a row"""
+    ratings = getattr(instance, '_cascade_ratings', [])
+    reviews = getattr(instance, '_cascade_reviews', [])
+    totals = {}
+    for content_id, value, _ in ratings:
+        n, total = totals.get(content_id, (0, 0))
+        totals[content_id] = (n + 1, total + int(value))
+    subtract_catalog_ratings(totals)
+    content_ids = set(totals)
+    recount_ratings(content_ids)
+    subtract_activity(
+        [(content_id, when, 1, int(value), 0) for content_id, value, when in ratings]
+        + [(content_id, when, 0, 0, 1) for content_id, when, _, _ in reviews]
+    )
+    SiteStats.bump(**_reviews_deltas(flags for _, _, *flags in reviews))
+    for content_id in content_ids:
+        invalidate_content(content_id)
+        transaction.on_commit(lambda content_id=content_id: leaderboards.refresh_content(content_id))
+
+
+@receiver(pre_delete, sender=Content)
+def remember_content_audience(sender, instance, **kwargs):
+    instance._cascade_users = set(
+        Rating.objects.filter(content_id=instance.pk).order_by().values_list('user_id', flat=True)
+        .union(Watchlist.objects.filter(content_id=instance.pk).order_by().values_list('user_id', flat=True))
+        .union(Review.objects.filter(content_id=instance.pk).order_by().values_list('user_id', flat=True))
+    )
+    instance._cascade_reviews = list(
+        Review.objects.filter(content_id=instance.pk).values_list('is_approved', 'is_verified')
+    )
+
+
+@receiver(post_delete, sender=Content)
+def settle_content_audience(sender, instance, **kwargs):
+    """The content's ratings, reviews and watchlist entries are gone; tell their users once each"""
+    users = getattr(instance, '_cascade_users', set())
+    UserRecommendation.objects.filter(user_id__in=users, is_stale=False).update(is_stale=True)
+    for user_id in users:
+        invalidate_feed(user_id)
+    SiteStats.bump(**_reviews_deltas(getattr(instance, '_cascade_reviews', [])))
+
+
+# CATALOG ROLLUPS
+# views_sum is left to rebuild_catalog_rollups so page views stay a single UPDATE
+_TOTALS = ('rating_count', 'rating_sum')
+
+
+def _content_totals(content_id):
+    """Rollup deltas one content contributes; read from the row, not the stale instance"""
+    row = Content.objects.filter(pk=content_id).values(*_TOTALS).first() or {}
+    return {'content_count': 1, **{field: row.get(field, 0) for field in _TOTALS}}
+
+
+def _negate(totals):
+    return {field: -value for field, value in totals.items()}
+
+
+@receiver(pre_save, sender=Content)
+@receiver(pre_delete, sender=Content)
+def remember_catalog_fields(sender, instance, **kwargs):
+    instance._previous_catalog = None
+    if instance.pk:
+        instance._previous_catalog = (
+            Content.objects.filter(pk=instance.pk).values(*CATALOG_FIELDS, *_TOTALS).first()
+        )
+
+
+@receiver(post_save, sender=Content)
+def count_catalog_content(sender, instance, created, **kwargs):
+    """New content joins its genre/language/type; a re-categorised one moves its totals"""
+    previous = getattr(instance, '_previous_catalog', None)
+    if created or previous is None:
+        bump_catalog([(name, getattr(instance, name)) for name in CATALOG_FIELDS], content_count=1)
+        return
+    totals = _content_totals(instance.pk)
+    for name in CATALOG_FIELDS:
+        if previous[name] != getattr(instance, name):
+            bump_catalog([(name, previous[name])], **_negate(totals))
+            bump_catalog([(name, getattr(instance, name))], **totals)
+
+
+@receiver(pre_delete, sender=Content)
+def remember_catalog_platforms(sender, instance, **kwargs):
+    instance._previous_platforms = list(
+        ContentOTT.objects.filter(content_id=instance.pk).values_list('platform_name', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Content)
+def uncount_catalog_content(sender, instance, **kwargs):
+    """
+    Take the whole content out of every dimension it counted towards, in
+    one decrement each: its cascading ratings and OTT rows skip their own
+    per-row bookkeeping.
+    """
+    previous = getattr(instance, '_previous_catalog', None) or {}
+    dims = [(name, previous.get(name, getattr(instance, name))) for name in CATALOG_FIELDS]
+    dims += [('platform', platform) for platform in getattr(instance, '_previous_platforms', [])]
+    totals = {'content_count': 1, **{field: previous.get(field, 0) for field in _TOTALS}}
+    bump_catalog(dims, **_negate(totals))
+
+
+@receiver(pre_save, sender=ContentOTT)
+def remember_previous_platform(sender, instance, **kwargs):
+    instance._previous_platform = None
+    if instance.pk:
+        instance._previous_platform = (
+            ContentOTT.objects.filter(pk=instance.pk).values_list('content_id', 'platform_name').first()
+        )
+
+
+@receiver(post_save, sender=ContentOTT)
+def count_platform_content(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_platform', None)
+    current = (instance.content_id, instance.platform_name)
+    if previous == current and not created:
+        return
+    if previous and not created:
+        bump_catalog([('platform', previous[1])], **_negate(_content_totals(previous[0])))
+    bump_catalog([('platform', instance.platform_name)], **_content_totals(instance.content_id))
+
+
+@receiver(post_delete, sender=ContentOTT)
+def uncount_platform_content(sender, instance, **kwargs):
+    if _cascade_from(kwargs) is Content:
+        return
+    bump_catalog([('platform', instance.platform_name)], **_negate(_content_totals(instance.content_id)))
+
+
+# TRENDING EVENTS
+@receiver(post_save, sender=Rating)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Watchlist)
+def record_trending_event(sender, instance, created, **kwargs):
+    """Views are recorded by increment_content_views"""
+    if created:
+        record_event(instance.content_id, _EVENT_KINDS[sender])
+
+
+_EVENT_KINDS = {Rating: 'rating', Review: 'review', Watchlist: 'watchlist'}
+
+
+# INTERACTION LOG
+@receiver(post_save, sender=Watchlist)
+def log_watchlist_add(sender, instance, created, **kwargs):
+    if created:
+        log_event('watchlist_add', instance.content_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Watchlist)
+def log_watchlist_remove(sender, instance, **kwargs):
+    log_event('watchlist_remove', instance.content_id, instance.user_id)
+
+
+@receiver(post_save, sender=Rating)
+def log_rating(sender, instance, created, **kwargs):
+    """Re-rates are logged too, carrying the new value"""
+    if created or getattr(instance, '_previous_value', None) != int(instance.rating_value):
+        log_event('rating', instance.content_id, instance.user_id, int(instance.rating_value))
+
+
+@receiver(post_save, sender=Review)
+def log_review(sender, instance, created, **kwargs):
+    if created:
+        log_event('review', instance.content_id, instance.user_id)
+
+
+# LEADERBOARDS
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(post_save, sender=ContentOTT)
+@receiver(post_delete, sender=ContentOTT)
+def rescore_leaderboards(sender, instance, **kwargs):
+    if sender is not Content and _cascade_from(kwargs):
+        return
+    content_id = instance.pk if sender is Content else instance.content_id
+    transaction.on_commit(lambda: leaderboards.refresh_content(content_id))
+
+
+# CATALOGUE INDEX
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(post_save, sender=ContentOTT)
+@receiver(post_delete, sender=ContentOTT)
+def reindex_catalog(sender, instance, **kwargs):
+    content_id = instance.pk if sender is Content else instance.content_id
+    transaction.on_commit(lambda: catalog_index.refresh_content(content_id))
+
+
+# SIMILARITY INDEX
+@receiver(post_save, sender=Content)
+def reindex_similarity(sender, instance, **kwargs):
+    content_id = instance.pk
+    transaction.on_commit(lambda: similarity_index.update_content(content_id))
+
+
+@receiver(post_delete, sender=Content)
+def drop_from_similarity(sender, instance, **kwargs):
+    content_id = instance.pk
+    transaction.on_commit(lambda: similarity_index.remove_content(content_id))
+
+
+# PRECOMPUTED RECOMMENDATIONS
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+def mark_recommendations_stale(sender, instance, **kwargs):
+    """The dashboard recomputes on the fly until the next batch run"""
+    if _cascade_from(kwargs):
+        return
+    UserRecommendation.objects.filter(user_id=instance.user_id, is_stale=False).update(is_stale=True)
+
+
+# PERSONAL FEED SECTIONS
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+@receiver(post_save, sender=UserProfile)
+def invalidate_user_feed(sender, instance, **kwargs):
+    """New keys for the user's cached dashboard fragments"""
+    if _cascade_from(kwargs):
+        return
+    invalidate_feed(instance.user_id)
+
+
+# CONTENT LOOKUP CACHE
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_cached_content(sender, instance, **kwargs):
+    invalidate_content(instance.pk)
+
+
+# CACHED USER BUNDLES
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_user_bundle(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_owner(sender, instance, **kwargs):
+    invalidate_user_bundle(instance.user_id)
+
+
+@receiver(post_save, sender=Reviewer)
+@receiver(post_delete, sender=Reviewer)
+@receiver(post_save, sender=ContentCreator)
+@receiver(post_delete, sender=ContentCreator)
+@receiver(post_save, sender=GoldenUser)
+@receiver(post_delete, sender=GoldenUser)
+def invalidate_role_owner(sender, instance, **kwargs):
+    """make_/remove_reviewer, make_/remove_creator and golden verification land here"""
+    user_id = UserProfile.objects.filter(pk=instance.user_profile_id).values_list('user_id', flat=True).first()
+    if user_id:
+        invalidate_user_bundle(user_id)
+
+
+# SITE STATS SNAPSHOT
+def _review_buckets(is_approved, is_verified):
+    return {
+        'pending_reviews' if not is_approved else 'approved_reviews': 1,
+        'verified_reviews' if is_verified else 'regular_reviews': 1,
+    }
+
+
+def _golden_bucket(status):
+    return {'Pending': 'golden_pending', 'Verified': 'golden_verified', 'Rejected': 'golden_rejected'}.get(status)
+
+
+def _apply(deltas, buckets, sign):
+    for field, delta in buckets.items():
+        if field:
+            deltas[field] = deltas.get(field, 0) + sign * delta
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Content)
+@receiver(post_save, sender=Reviewer)
+@receiver(post_save, sender=ContentCreator)
+def count_created(sender, instance, created, **kwargs):
+    if created:
+        SiteStats.bump(**{_TOTAL_FIELDS[sender]: 1})
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Content)
+@receiver(post_delete, sender=Reviewer)
+@receiver(post_delete, sender=ContentCreator)
+def count_deleted(sender, instance, **kwargs):
+    SiteStats.bump(**{_TOTAL_FIELDS[sender]: -1})
+
+
+_TOTAL_FIELDS = {
+    User: 'total_users',
+    Content: 'total_content',
+    Reviewer: 'total_reviewers',
+    ContentCreator: 'total_creators',
+}
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review_flags(sender, instance, **kwargs):
+    instance._previous_flags = None
+    if instance.pk:
+        instance._previous_flags = (
+            Review.objects.filter(pk=instance.pk).values_list('is_approved', 'is_verified').first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    deltas = {}
+    previous = getattr(instance, '_previous_flags', None)
+    if created or previous is None:
+        deltas['total_reviews'] = 1
+    else:
+        _apply(deltas, _review_buckets(*previous), -1)
+    _apply(deltas, _review_buckets(instance.is_approved, instance.is_verified), 1)
+    SiteStats.bump(**deltas)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    if _cascade_from(kwargs) is None:
+        SiteStats.bump(**_reviews_deltas([(instance.is_approved, instance.is_verified)]))
+
+
+def _reviews_deltas(flags):
+    """SiteStats deltas for deleting reviews with these (is_approved, is_verified) flags"""
+    deltas = {}
+    for is_approved, is_verified in flags:
+        deltas['total_reviews'] = deltas.get('total_reviews', 0) - 1
+        _apply(deltas, _review_buckets(is_approved, is_verified), -1)
+    return deltas
+
+
+@receiver(pre_save, sender=GoldenUser)
+def remember_previous_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = (
+            GoldenUser.objects.filter(pk=instance.pk).values_list('verification_status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=GoldenUser)
+def count_golden(sender, instance, created, **kwargs):
+    deltas = {}
+    previous = getattr(instance, '_previous_status', None)
+    if created or previous is None:
+        deltas['total_golden'] = 1
+    else:
+        _apply(deltas, {_golden_bucket(previous): 1}, -1)
+    _apply(deltas, {_golden_bucket(instance.verification_status): 1}, 1)
+    SiteStats.bump(**deltas)
+
+
+@receiver(post_delete, sender=GoldenUser)
+def uncount_golden(sender, instance, **kwargs):
+    deltas = {'total_golden': -1}
+    _apply(deltas, {_golden_bucket(instance.verification_status): 1}, -1)
+    SiteStats.bump(**deltas)
@@ -0,0 +1,324 @@
+# recommendox/similarity.py
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .models import Content
+
+DIMENSIONS = 2 ** 14  # hashed feature space
+TABLES = 8  # LSH tables ...
+BITS = 10  # ... of 10 random hyperplanes each
+SEED = 42
+FORMAT_VERSION = 1
+
+# How much each field counts relative to one description word
+FIELD_WEIGHTS = {'genre': 3.0, 'director': 2.0, 'cast': 1.5, 'language': 1.0, 'description': 1.0}
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has he her his in into is it its of on or she that the their '
+    'them they this to was were which while who will with'.split()
+)
+WORD_RE = re.compile(r"[a-z0-9']{3,}")
+
+
+def content_tokens(title_fields):
+    """Weighted tokens for one content; cast/director/genre/language are whole-value tokens"""
+    description, cast, director, genre, language = title_fields
+    tokens = Counter()
+    for word in WORD_RE.findall((description or '').lower()):
+        if word not in STOPWORDS:
+            tokens[f'w:{word}'] += FIELD_WEIGHTS['description']
+    for name in (cast or '').split(','):
+        if name.strip():
+            tokens[f'cast:{name.strip().lower()}'] += FIELD_WEIGHTS['cast']
+    if director:
+        tokens[f'director:{director.strip().lower()}'] += FIELD_WEIGHTS['director']
+    if genre:
+        tokens[f'genre:{genre.lower()}'] += FIELD_WEIGHTS['genre']
+    if language:
+        tokens[f'language:{language.lower()}'] += FIELD_WEIGHTS['language']
+    return tokens
+
+
+def hashed_vector(tokens):
+    """Feature-hash tokens into (indices, signed log-scaled term weights)"""
+    buckets = defaultdict(float)
+    for token, weight in tokens.items():
+        h = zlib.crc32(token.encode())
+        sign = -1.0 if h & 0x80000000 else 1.0
+        buckets[h % DIMENSIONS] += sign * (1 + math.log(weight)) if weight >= 1 else sign * weight
+    indices = np.fromiter(buckets, dtype=np.int32, count=len(buckets))
+    values = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+    order = np.argsort(indices)
+    return indices[order], values[order]
+
+
+def _planes():
+    return np.random.default_rng(SEED).standard_normal((DIMENSIONS, TABLES * BITS)).astype(np.float32)
+
+
+class SimilarityIndex:
+    """
+    Hashed TF-IDF vectors for every title plus a random-projection LSH
+    index over them. Neighbours come from the title's LSH buckets (topped
+    up by Hamming distance when the buckets are thin), re-ranked by exact
+    cosine and memoised until the index changes. Content signals patch
+    the in-memory copy of the worker that made the edit; only
+    `manage.py build_similarity_index` writes SIMILARITY_INDEX_PATH, and
+    workers reload it when it changes, re-applying edits the file missed.
+    A non-`persistent` index never touches the file and holds only what
+    build() is given (e.g. the titles of an evaluation training split).
+    """
+
+    def __init__(self, persistent=True):
+        self.persistent = persistent
+        self._lock = threading.RLock()
+        self._planes = None
+        self._reset()
+        self._ready = False
+        self._loaded_mtime = None
+        self._checked_at = None
+
+    def _reset(self):
+        self._vectors = {}  # content id -> (indices, tf weights)
+        self._signatures = {}  # content id -> bool array (TABLES * BITS)
+        self._stamps = {}  # content id -> updated_at timestamp when indexed
+        self._df = np.zeros(DIMENSIONS, dtype=np.int32)
+        self._buckets = defaultdict(set)
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._vectors)
+
+    @property
+    def path(self):
+        return Path(settings.SIMILARITY_INDEX_PATH)
+
+    @property
+    def planes(self):
+        if self._planes is None:
+            self._planes = _planes()
+        return self._planes
+
+    def idf(self, indices):
+        n = len(self._vectors)
+        return np.log((1 + n) / (1 + self._df[indices])) + 1
+
+    def weighted(self, content_id):
+        """L2-normalised TF-IDF vector as (indices, weights)"""
+        indices, tf = self._vectors[content_id]
+        weights = tf * self.idf(indices)
+        norm = np.linalg.norm(weights)
+        return indices, weights / norm if norm else weights
+
+    def _signature(self, content_id):
+        indices, weights = self.weighted(content_id)
+        return (weights @ self.planes[indices]) > 0
+
+    def _bucket_keys(self, signature):
+        return [(t, signature[t * BITS:(t + 1) * BITS].tobytes()) for t in range(TABLES)]
+
+    # Building and updating
+
+    def _add(self, content_id, fields, stamp):
+        indices, tf = hashed_vector(content_tokens(fields))
+        self._vectors[content_id] = (indices, tf)
+        self._df[indices] += 1
+        self._stamps[content_id] = stamp
+
+    def _remove(self, content_id):
+        if content_id not in self._vectors:
+            return
+        indices, _ = self._vectors.pop(content_id)
+        self._df[indices] -= 1
+        self._stamps.pop(content_id, None)
+        signature = self._signatures.pop(content_id, None)
+        if signature is not None:
+            for key in self._bucket_keys(signature):
+                self._buckets[key].discard(content_id)
+
+    def _index(self, content_id):
+        signature = self._signature(content_id)
+        self._signatures[content_id] = signature
+        for key in self._bucket_keys(signature):
+            self._buckets[key].add(content_id)
+
+    def rebuild(self):
+        """Index every title in memory; the build command saves the result"""
+        rows = Content.objects.values_list('id', 'description', 'cast', 'director', 'genre', 'language', 'updated_at')
+        self.build((content_id, *fields, updated_at.timestamp()) for content_id, *fields, updated_at in rows)
+
+    def build(self, rows):
+        """Replace the index with (id, description, cast, director, genre, language, stamp) rows"""
+        with self._lock:
+            self._reset()
+            for content_id, *fields, stamp in rows:
+                self._add(content_id, fields, stamp)
+            for content_id in self._vectors:
+                self._index(content_id)
+            self._ready = True
+
+    def refresh(self):
+        """Re-index titles added, edited or deleted since the file was built and save it; returns the count"""
+        with self._lock:
+            self.ensure_loaded(force=True)
+            changed = self._catch_up()
+            self.save()
+        return changed
+
+    def _catch_up(self):
+        current = dict(Content.objects.values_list('id', 'updated_at'))
+        changed = [cid for cid, updated in current.items() if self._stamps.get(cid) != updated.timestamp()]
+        deleted = [cid for cid in self._stamps if cid not in current]
+        for content_id in deleted:
+            self.remove_content(content_id)
+        for content_id in changed:
+            self.update_content(content_id)
+        return len(changed) + len(deleted)
+
+    def update_content(self, content_id):
+        if not self._ready:
+            return  # not loaded in this worker; the catch-up on first load covers it
+        row = Content.objects.filter(pk=content_id).values_list(
+            'description', 'cast', 'director', 'genre', 'language', 'updated_at'
+        ).first()
+        if row is None:
+            return self.remove_content(content_id)
+        with self._lock:
+            self._remove(content_id)
+            self._add(content_id, row[:-1], row[-1].timestamp())
+            self._index(content_id)
+            self._memo = {}
+
+    def remove_content(self, content_id):
+        if not self._ready:
+            return
+        with self._lock:
+            self._remove(content_id)
+            self._memo = {}
+
+    # Persistence
+
+    def save(self):
+        with self._lock:
+            ids = np.array(sorted(self._vectors), dtype=np.int64)
+            lengths = [len(self._vectors[cid][0]) for cid in ids]
+            indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            empty_i, empty_f = np.zeros(0, np.int32), np.zeros(0, np.float32)
+            arrays = {
+                'version': np.array([FORMAT_VERSION, DIMENSIONS, TABLES, BITS, SEED]),
+                'ids': ids,
+                'stamps': np.array([self._stamps[cid] for cid in ids], dtype=np.float64),
+                'indptr': indptr,
+                'indices': np.concatenate([self._vectors[cid][0] for cid in ids]) if len(ids) else empty_i,
+                'tf': np.concatenate([self._vectors[cid][1] for cid in ids]) if len(ids) else empty_f,
+                'signatures': np.array(
+                    [self._signatures[cid] for cid in ids], dtype=bool
+                ).reshape(len(ids), TABLES * BITS),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.npz')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self.path)
+            self._loaded_mtime = self.path.stat().st_mtime
+
+    def load(self):
+        """Read the persisted index; False if it is missing or built with other parameters"""
+        try:
+            data = np.load(self.path)
+        except (OSError, ValueError):
+            return False
+        with data, self._lock:
+            if tuple(data['version']) != (FORMAT_VERSION, DIMENSIONS, TABLES, BITS, SEED):
+                return False
+            self._reset()
+            indptr, indices, tf = data['indptr'], data['indices'], data['tf']
+            for row, (content_id, stamp) in enumerate(zip(data['ids'].tolist(), data['stamps'].tolist())):
+                vector_indices = indices[indptr[row]:indptr[row + 1]]
+                self._vectors[content_id] = (vector_indices, tf[indptr[row]:indptr[row + 1]])
+                self._df[vector_indices] += 1
+                self._stamps[content_id] = stamp
+                self._signatures[content_id] = data['signatures'][row]
+                for key in self._bucket_keys(self._signatures[content_id]):
+                    self._buckets[key].add(content_id)
+            self._loaded_mtime = self.path.stat().st_mtime
+            self._ready = True
+        return True
+
+    def ensure_loaded(self, force=False):
+        """
+        Load on first use (building in memory if there is no file yet) and
+        reload when the build command writes a new file, re-applying edits
+        it missed. Only one thread per worker does this; the rest wait.
+        """
+        if not self.persistent:
+            return
+        if not force and self._fresh():
+            return
+        with self._lock:
+            if not force and self._fresh():
+                return  # another thread got here first
+            self._checked_at = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != self._loaded_mtime and self.load():
+                self._catch_up()
+            elif not self._ready:
+                self.rebuild()
+
+    def _fresh(self):
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < settings.SIMILARITY_RELOAD_SECONDS
+        )
+
+    # Queries
+
+    def similar_ids(self, content_id, k=5):
+        """Ids of the k most similar titles, best first"""
+        self.ensure_loaded()
+        memo_key = (content_id, k)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        with self._lock:
+            if content_id not in self._vectors:
+                return []
+            signature = self._signatures[content_id]
+            candidates = set()
+            for key in self._bucket_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            candidates.discard(content_id)
+
+            if len(candidates) < k * 3:
+                # Thin buckets: top up with the nearest signatures by Hamming distance
+                others = [cid for cid in self._signatures if cid != content_id and cid not in candidates]
+                if others:
+                    distances = (np.array([self._signatures[cid] for cid in others]) != signature).sum(axis=1)
+                    nearest = np.argsort(distances, kind='stable')[:k * 3 - len(candidates)]
+                    candidates.update(others[i] for i in nearest)
+
+            query_indices, query_weights = self.weighted(content_id)
+            query = dict(zip(query_indices.tolist(), query_weights.tolist()))
+            scored = []
+            for candidate in candidates:
+                indices, weights = self.weighted(candidate)
+                score = sum(query.get(i, 0.0) * w for i, w in zip(indices.tolist(), weights.tolist()))
+                scored.append((-score, candidate))
+            result = [candidate for _, candidate in sorted(scored)[:k]]
+            self._memo[memo_key] = result
+            return result
+
+
+similarity_index = SimilarityIndex()
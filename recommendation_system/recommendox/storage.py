@@ -0,0 +1,100 @@
+# recommendox/storage.py
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'cas'
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Blob names this thread's uploads already hold a reference to, until the saving row's signal takes it over
+_claims = threading.local()
+
+
+def take_claim(name):
+    """True (and forget it) if an upload in this thread already counted a reference to `name`"""
+    claims = getattr(_claims, 'names', None)
+    if not claims or not claims[name]:
+        return False
+    claims[name] -= 1
+    return True
+
+
+def blob_name(digest, ext):
+    """Storage name for a blob, fanned out by the first two hex digits"""
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext.lower()}"
+
+
+def hash_file(fileobj, chunk_size=HASH_CHUNK_SIZE):
+    """SHA-256 of a file object, read in chunks"""
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once under its SHA-256 digest.
+    The upload is streamed chunk by chunk into a temp file while it is
+    hashed, then moved into place unless a blob with that digest exists.
+    Reference counts live in MediaBlob and are kept by signals; the upload
+    takes its reference up front, in the same locked transaction that
+    decides whether to reuse the file, so a concurrent last decref can't
+    delete it in between.
+    """
+    
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen in _save() from the digest
+        return name
+    
+    def _save(self, name, content):
+        from .models import MediaBlob
+        
+        ext = os.path.splitext(name)[1]
+        blob_dir = self.path(BLOB_DIR)
+        os.makedirs(blob_dir, exist_ok=True)
+        
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=blob_dir, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    sha.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            
+            digest = sha.hexdigest()
+            final_name = blob_name(digest, ext)
+            final_path = self.path(final_name)
+            
+            def place():
+                if os.path.exists(final_path):
+                    os.remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                    os.replace(tmp_path, final_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(final_path, self.file_permissions_mode)
+            
+            MediaBlob.claim(final_name, digest, size, place)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        if getattr(_claims, 'names', None) is None:
+            _claims.names = Counter()
+        _claims.names[final_name] += 1
+        return final_name
+
+
+blob_storage = ContentAddressedStorage()
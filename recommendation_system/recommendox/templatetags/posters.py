@@ -0,0 +1,9 @@
+# recommendox/templatetags/posters.py
+from django import template
+from recommendox.images import poster_src as resolve_poster_src
+
+register = template.Library()
+
+@register.simple_tag
+def poster_src(content, variant='card', default=''):
+    return resolve_poster_src(content, variant, default)
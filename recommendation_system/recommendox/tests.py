@@ -1,3 +1,235 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from datetime import date
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .content_cache import get_content
+from .events import flush_events, log_event
+from .feed import FeedComposer, Section
+from .feedback import build_feedback_matrix
+from .management.commands.sqlite_stress import Command as SqliteStressCommand
+from .models import CatalogRollup, Content, ContentOTT, Episode, Rating, Review, Season, SiteStats
+from .rollups import rebuild_catalog_rollups
+
+
+def make_content(title='Test title', **fields):
+    defaults = {'description': 'A test title', 'genre': 'Drama', 'language': 'Other', 'release_date': date(2024, 1, 1)}
+    return Content.objects.create(title=title, **{**defaults, **fields})
+
+
+class IsolatedFilesMixin:
+    """Event logs, indexes and media under a temp dir, and an empty cache, for each test"""
+
+    def setUp(self):
+        super().setUp()
+        root = Path(tempfile.mkdtemp(prefix='recommendox-test-'))
+        self.addCleanup(shutil.rmtree, root, True)
+        files = override_settings(
+            EVENT_LOG_DIR=root / 'events',
+            IMPRESSION_LOG_DIR=root / 'impressions',
+            SIMILARITY_INDEX_PATH=root / 'similarity_index.npz',
+            FEEDBACK_MATRIX_PATH=root / 'feedback_matrix.npz',
+            MEDIA_ROOT=str(root / 'media'),
+        )
+        files.enable()
+        self.addCleanup(files.disable)
+        self.addCleanup(flush_events)  # cleanups run last-in first-out: before the paths are restored
+        cache.clear()
+
+
+class SqliteStressTests(IsolatedFilesMixin, TransactionTestCase):
+    def test_concurrent_writes_are_not_lost(self):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            self.skipTest("needs a file-backed SQLite test database to fork writers against")
+        out = StringIO()
+        SqliteStressCommand(stdout=out, stderr=StringIO()).stress(connection, processes=2, threads=2, iterations=5)
+        self.assertIn("No lost writes.", out.getvalue())
+
+
+class SeriesRollupTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.series = make_content('Series', content_type='Web Series')
+
+    def test_episodes_roll_up_to_season_and_series(self):
+        season = Season.objects.create(content=self.series, season_number=1)
+        Episode.objects.create(season=season, episode_number=1, title='One', duration=40)
+        Episode.objects.create(season=season, episode_number=2, title='Two', duration=50)
+        season.refresh_from_db()
+        self.series.refresh_from_db()
+        self.assertEqual((season.episode_count, season.total_duration), (2, 90))
+        self.assertEqual((self.series.total_episodes, self.series.total_runtime), (2, 90))
+
+    def test_deleting_a_season_updates_the_series(self):
+        first = Season.objects.create(content=self.series, season_number=1)
+        second = Season.objects.create(content=self.series, season_number=2)
+        Episode.objects.create(season=first, episode_number=1, title='One', duration=40)
+        Episode.objects.create(season=second, episode_number=1, title='Two', duration=30)
+        second.delete()
+        self.series.refresh_from_db()
+        self.assertEqual((self.series.total_episodes, self.series.total_runtime), (1, 40))
+
+
+class RatingCounterTests(IsolatedFilesMixin, TestCase):
+    def test_counters_follow_create_update_and_delete(self):
+        content = make_content()
+        alice, bob = User.objects.create(username='alice'), User.objects.create(username='bob')
+        rating = Rating.objects.create(user=alice, content=content, rating_value=4)
+        Rating.objects.create(user=bob, content=content, rating_value=2)
+        rating.rating_value = 5
+        rating.save()
+        content.refresh_from_db()
+        self.assertEqual((content.rating_count, content.rating_sum), (2, 7))
+
+        bob.delete()
+        content.refresh_from_db()
+        self.assertEqual((content.rating_count, content.rating_sum), (1, 5))
+
+
+class SiteStatsTests(IsolatedFilesMixin, TestCase):
+    def assertMatchesRecount(self):
+        stats = SiteStats.objects.get(pk=1)
+        self.assertEqual({field: getattr(stats, field) for field in SiteStats.compute()}, SiteStats.compute())
+
+    def test_deltas_match_a_full_recount(self):
+        SiteStats.reconcile()
+        user = User.objects.create(username='reviewer')
+        content = make_content()
+        review = Review.objects.create(user=user, content=content, comment='Good', is_approved=False)
+        Review.objects.create(user=User.objects.create(username='other'), content=content, comment='Fine')
+        review.is_approved = True
+        review.is_verified = True
+        review.save()
+        self.assertMatchesRecount()
+
+        user.delete()
+        self.assertMatchesRecount()
+        content.delete()
+        self.assertMatchesRecount()
+        self.assertEqual(SiteStats.objects.get(pk=1).total_reviews, 0)
+
+
+class CatalogRollupTests(IsolatedFilesMixin, TestCase):
+    def rollup(self, dimension, value):
+        return CatalogRollup.objects.get(dimension=dimension, value=value)
+
+    def test_rollups_follow_content_platforms_and_ratings(self):
+        drama = make_content('Drama', genre='Drama')
+        make_content('Comedy', genre='Comedy')
+        ContentOTT.objects.create(content=drama, platform_name='Netflix')
+        user = User.objects.create(username='rater')
+        Rating.objects.create(user=user, content=drama, rating_value=4)
+
+        genre = self.rollup('genre', 'Drama')
+        self.assertEqual((genre.content_count, genre.rating_count, genre.rating_sum), (1, 1, 4))
+        platform = self.rollup('platform', 'Netflix')
+        self.assertEqual((platform.content_count, platform.rating_count), (1, 1))
+
+        user.delete()
+        self.assertEqual(self.rollup('platform', 'Netflix').rating_count, 0)
+        drama.delete()
+        self.assertEqual(self.rollup('genre', 'Drama').content_count, 0)
+        self.assertEqual(rebuild_catalog_rollups(), {})  # incremental totals never drifted
+
+
+class ContentCacheTests(IsolatedFilesMixin, TestCase):
+    def test_cached_lookups_skip_the_database(self):
+        content = make_content()
+        get_content(content.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_content(content.pk).title, content.title)
+
+    def test_edits_and_ratings_show_up_at_once(self):
+        content = make_content('Before')
+        get_content(content.pk)
+        content.title = 'After'
+        content.save()
+        self.assertEqual(get_content(content.pk).title, 'After')
+
+        Rating.objects.create(user=User.objects.create(username='rater'), content=content, rating_value=3)
+        cached = get_content(content.pk)
+        self.assertEqual((cached.rating_count, cached.rating_sum), (1, 3))
+
+    def test_deleted_content_is_gone(self):
+        content = make_content()
+        get_content(content.pk)
+        content_id = content.pk
+        content.delete()
+        self.assertIsNone(get_content(content_id))
+
+
+class FeedbackMatrixTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='viewer')
+        self.liked, self.disliked = make_content('Liked'), make_content('Disliked')
+
+    def test_reviews_are_counted_once_across_builds(self):
+        Review.objects.create(user=self.user, content=self.liked, comment='Great')
+        build_feedback_matrix(full=True)
+        # The same review's event reaching the log late, e.g. from another worker's buffer
+        log_event('review', self.liked.pk, self.user.pk)
+        matrix, _ = build_feedback_matrix()
+        self.assertEqual(matrix.pairs()[(self.user.pk, self.liked.pk)], [0, 0, 0, 1])
+
+    def test_views_add_confidence_and_low_ratings_stay_negative(self):
+        build_feedback_matrix(full=True)
+        log_event('view', self.liked.pk, self.user.pk)
+        log_event('view', self.disliked.pk, self.user.pk)
+        Rating.objects.create(user=self.user, content=self.disliked, rating_value=1)
+        matrix, applied = build_feedback_matrix()
+        row = matrix.row(self.user.pk)
+        self.assertGreaterEqual(applied, 3)
+        self.assertGreater(row[self.liked.pk], 0)
+        self.assertLess(row[self.disliked.pk], 0)
+
+
+class FakeRequest:
+    class user:
+        pk = None
+
+
+@override_settings(FEED_SECTION_TIMEOUTS_MS={'slow': 50}, FEED_DEFAULT_TIMEOUT_MS=1000)
+class FeedComposerTests(IsolatedFilesMixin, TestCase):
+    template = 'recommendox/feed/pending.html'  # only needs `section` in its context
+
+    def setUp(self):
+        super().setUp()
+        self.composer = FeedComposer()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow(self, request):
+        self.release.wait(5)
+        return {'section': 'late'}
+
+    def test_section_past_its_deadline_gets_a_placeholder(self):
+        fragments, timings = self.composer.compose(FakeRequest(), [Section('slow', self.template, self.slow, 'feed:slow')])
+        self.assertEqual(timings['slow'][0], 'timeout')
+        self.assertIn('data-section="slow"', fragments['slow'])
+
+    def test_late_result_is_cached_and_stale_copy_is_served(self):
+        section = Section('slow', self.template, lambda request: {'section': 'fresh'}, 'feed:slow')
+        self.composer.compose(FakeRequest(), [section])
+        cache.delete('feed:slow')  # the fresh copy expired; its stale copy is still around
+
+        fragments, timings = self.composer.compose(FakeRequest(), [section._replace(provider=self.slow)])
+        self.assertEqual(timings['slow'][0], 'timeout+stale')
+        self.assertIn('data-section="fresh"', fragments['slow'])
+
+    def test_failing_section_is_logged(self):
+        def broken(request):
+            raise ValueError("provider bug")
+
+        with self.assertLogs('recommendox.feed', 'ERROR') as logs:
+            fragments, timings = self.composer.compose(FakeRequest(), [Section('broken', self.template, broken)])
+        self.assertEqual(timings['broken'][0], 'error')
+        self.assertIn('broken', logs.output[0])
+        self.assertIn('data-section="broken"', fragments['broken'])
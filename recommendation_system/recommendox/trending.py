@@ -0,0 +1,184 @@
+# recommendox/trending.py
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import shared_computation, store_computation
+from .db import sqlite_write
+from .models import Analytics, Content, TrendingBucket
+from .rollups import upsert_increment
+
+EVENT_FIELDS = {
+    'view': 'views',
+    'rating': 'ratings',
+    'review': 'reviews',
+    'watchlist': 'watchlist_adds',
+}
+EVENT_WEIGHTS = {
+    'views': 1.0,
+    'ratings': 3.0,
+    'reviews': 4.0,
+    'watchlist_adds': 2.0,
+}
+TRENDING_CACHE_KEY = 'trending:top'
+STALE_SECONDS = 3600
+
+
+def current_minute(now=None):
+    return (now or timezone.now()).replace(second=0, microsecond=0)
+
+
+def decay(age):
+    """Exponential decay weight for an event `age` (timedelta) old"""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return 0.5 ** (max(age.total_seconds(), 0) / half_life)
+
+
+class EventBuffer:
+    """
+    Per-process event counts for the current minute. The first event of a
+    new minute writes the previous minute out as one batch of upserts, and
+    a background thread flushes every TRENDING_FLUSH_SECONDS so counts on
+    a worker that goes quiet still reach the buckets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minute = None
+        self._counts = defaultdict(lambda: defaultdict(int))
+        self._flusher = None
+
+    def add(self, content_id, field, n=1):
+        minute = current_minute()
+        batch = None
+        with self._lock:
+            if self._minute != minute:
+                batch = self._take()
+                self._minute = minute
+            self._counts[content_id][field] += n
+            if self._flusher is None or not self._flusher.is_alive():
+                # Started lazily, so forked workers each get their own
+                self._flusher = threading.Thread(target=self._flush_periodically, name='trending-flush', daemon=True)
+                self._flusher.start()
+        if batch:
+            write_buckets(*batch)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.TRENDING_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                pass
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            write_buckets(*batch)
+
+    def _take(self):
+        batch = (self._minute, self._counts) if self._minute and self._counts else None
+        self._minute, self._counts = None, defaultdict(lambda: defaultdict(int))
+        return batch
+
+
+@sqlite_write
+def write_buckets(minute, counts):
+    live = set(Content.objects.filter(pk__in=list(counts)).values_list('pk', flat=True))
+    for content_id in live:
+        upsert_increment(TrendingBucket, {'content_id': content_id, 'minute': minute}, **counts[content_id])
+
+
+_buffer = EventBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        _buffer.flush()
+    except Exception:
+        pass
+
+
+def record_event(content_id, kind):
+    """Count a 'view', 'rating', 'review' or 'watchlist' event towards trending"""
+    _buffer.add(content_id, EVENT_FIELDS[kind])
+
+
+def compute_scores(now=None):
+    """Decayed engagement per content over the sliding window"""
+    now = now or timezone.now()
+    scores = defaultdict(float)
+    buckets = TrendingBucket.objects.filter(
+        minute__gte=now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    ).values_list('content_id', 'minute', *EVENT_WEIGHTS)
+    for content_id, minute, *counts in buckets:
+        weight = sum(w * n for w, n in zip(EVENT_WEIGHTS.values(), counts))
+        scores[content_id] += weight * decay(now - minute)
+    return scores
+
+
+@sqlite_write
+def save_popularity_scores(scores, now=None):
+    """Write scores to Analytics; titles that fell out of the window go back to 0"""
+    now = now or timezone.now()
+    rows = Analytics.objects.filter(Q(content_id__in=list(scores)) | Q(popularity_score__gt=0))
+    changed = []
+    for analytics in rows:
+        analytics.popularity_score = round(scores.get(analytics.content_id, 0.0), 4)
+        analytics.last_updated = now
+        changed.append(analytics)
+    Analytics.objects.bulk_update(changed, ['popularity_score', 'last_updated'])
+
+    missing = set(scores) - {a.content_id for a in changed}
+    Analytics.objects.bulk_create([
+        Analytics(content_id=content_id, popularity_score=round(scores[content_id], 4))
+        for content_id in Content.objects.filter(pk__in=missing).values_list('pk', flat=True)
+    ], ignore_conflicts=True)
+
+
+def top_ids(scores):
+    ranked = sorted((cid for cid, score in scores.items() if score > 0), key=scores.get, reverse=True)
+    return ranked[:settings.TRENDING_SIZE]
+
+
+def rank_trending(now=None):
+    """The top TRENDING_SIZE content ids; read-only, so safe to compute on a request"""
+    return top_ids(compute_scores(now))
+
+
+def refresh_trending(now=None):
+    """
+    The write side, run by `manage.py refresh_trending`: flush this
+    process's buffer, prune buckets that left the window, save every
+    popularity score and return the top TRENDING_SIZE content ids.
+    """
+    now = now or timezone.now()
+    _buffer.flush()
+    TrendingBucket.objects.filter(
+        minute__lt=now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    ).delete()
+    scores = compute_scores(now)
+    save_popularity_scores(scores, now)
+    return top_ids(scores)
+
+
+def publish_trending(ids):
+    store_computation(TRENDING_CACHE_KEY, ids, settings.TRENDING_REFRESH_SECONDS, STALE_SECONDS)
+
+
+def trending_content_ids():
+    """Cached top-N ids, re-ranked from the buckets in the background once they go stale"""
+    return shared_computation(
+        TRENDING_CACHE_KEY, rank_trending, ttl=settings.TRENDING_REFRESH_SECONDS, stale_ttl=STALE_SECONDS
+    )
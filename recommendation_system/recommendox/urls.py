@@ -8,12 +8,14 @@ urlpatterns = [
     path('', views.home, name='home'), 
     path('browse/', views.content_list, name='content_list'),
     path('content/<int:content_id>/', views.content_detail, name='content_detail'),
+    path('posters/<str:digest>/<str:variant>/', views.serve_poster, name='poster'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
     
     # USER PAGES
     path('dashboard/', views.user_dashboard, name='user_dashboard'),
+    path('onboarding/', views.onboarding, name='onboarding'),
     path('watchlist/manage/', views.manage_watchlist, name='manage_watchlist'),
     path('content/<int:content_id>/rate/', views.rate_content, name='rate_content'),
     path('content/<int:content_id>/review/', views.add_review, name='add_review'),
@@ -1,5 +1,8 @@
 # recommendox/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import AuthenticationForm
@@ -11,10 +14,24 @@ from django.contrib import messages
 from django import forms
 from django.utils import timezone
 from datetime import timedelta
-from .forms import UserRegistrationForm, ContentForm, ReviewForm 
+from .forms import UserRegistrationForm, ContentForm, ReviewForm, OnboardingForm
+from .db import sqlite_write
+from .content_cache import get_content_or_404
+from .rollups import activity_trend, catalog_stats
+from .trending import record_event, trending_content_ids
+from .events import log_event, recent_interactions
+from .leaderboards import leaderboards, ranked_cards
+from .catalog_index import bits_of, catalog_index, members
+from .similarity import similarity_index
+from .ranking import hybrid_ranker, seen_ids
+from .impressions import assign_variant, log_click, log_impression, remember_visitor, visitor_id
+from .recently_viewed import because_you_viewed, recently_viewed, remember_view
+from .feed import Section, feed_composer, feed_version
+from .series import get_series_tree
+from .images import POSTER_VARIANTS, POSTER_FORMATS, POSTER_CACHE_SECONDS, poster_storage, variant_name
 from .models import (
     Content, UserProfile, GoldenUser, Watchlist, 
-    Rating, Review, Analytics, Message, Reviewer, ContentOTT, ContentCreator
+    Rating, Review, Analytics, Message, Reviewer, ContentOTT, ContentCreator, SiteStats
 )
 
 #HELPER FUNCTIONS 
@@ -52,79 +69,108 @@ def content_creator_required(view_func):
         return redirect('recommendox:user_dashboard')
     return wrapper
 
-def get_personalized_recommendations(user):
-    """Generate personalized recommendations based on user activity"""
-    recommendations = []
-    seen_ids = set()  
-   
-    user_ratings = Rating.objects.filter(user=user)
-    if user_ratings.exists():
-        from collections import Counter
-        genre_counter = Counter()
-        
-        for rating in user_ratings:
-            if rating.rating_value >= 4: 
-                genre_counter[rating.content.genre] += rating.rating_value
-        
-        if genre_counter:
-            top_genres = [genre for genre, count in genre_counter.most_common(2)]
-           
-            for genre in top_genres:
-                genre_content = Content.objects.filter(
-                    genre=genre
-                ).exclude(
-                    id__in=user_ratings.values_list('content_id', flat=True)
-                ).order_by('-ratings__rating_value')[:3]
-                
-                for content in genre_content:
-                    if content.id not in seen_ids: 
-                        recommendations.append(content)
-                        seen_ids.add(content.id)
-   
-    if len(recommendations) < 6:
-        additional = Content.objects.exclude(
-            id__in=seen_ids 
-        ).order_by('-ratings__rating_value')[:6-len(recommendations)]
-        
-        for content in additional:
-            if content.id not in seen_ids:
-                recommendations.append(content)
-                seen_ids.add(content.id)
-    
-    return recommendations[:6] 
+def ranked_recommendations(user, limit=6, variant='hybrid'):
+    """Dashboard picks as cards, plus how each candidate source fared; 'popular' is the A/B control"""
+    if variant == 'popular':
+        return ranked_cards(leaderboards.top('all', '', limit, exclude=seen_ids(user.pk))), {}
+    ids, report = hybrid_ranker.rank(user.pk, limit)
+    return ranked_cards(ids), report
 
-#PUBLIC VIEWS
-def home(request):
-    """Public home page"""
-    from django.db.models import Avg, Count
+
+def server_timing(report):
+    """Server-Timing header value from {name: (status, ms)}"""
+    return ', '.join(f'{name};dur={ms};desc="{status}"' for name, (status, ms) in report.items())
+
+#FEED SECTIONS
+# Each provider runs in the feed composer's thread pool and returns one fragment's context
+def home_genres_section(request):
+    return {'popular_genres': [
+        {'genre': row.value, 'count': row.content_count}
+        for row in sorted(catalog_stats('genre'), key=lambda r: -r.content_count)[:5]
+        if row.content_count > 0
+    ]}
+
+
+def home_because_section(viewed):
+    because_viewed = because_you_viewed(viewed)
+    return {
+        'because_viewed': because_viewed,
+        'impression_ids': [c.pk for _, cards in because_viewed for c in cards],
+    }
+
+
+def home_trending_section(request):
     from datetime import datetime
     
     current_year = datetime.now().year
-    newest_content = Content.objects.order_by('-release_date')[:8]
-    newest_ids = [content.id for content in newest_content]
-    trending_content = Content.objects.filter(
-        id__in=newest_ids
-    ).annotate(
-        average_rating=Avg('ratings__rating_value')
-    ).order_by('-average_rating', '-release_date')
+    trending_ids = trending_content_ids()[:8]
+    if trending_ids:
+        cards = Content.objects.cards().in_bulk(trending_ids)
+        trending_content = [cards[i] for i in trending_ids if i in cards]
+    else:
+        # Nothing has been watched or rated yet: newest releases, best rated first
+        trending_content = sorted(
+            Content.objects.cards().order_by('-release_date')[:8],
+            key=lambda c: (c.avg_rating, c.release_date),
+            reverse=True,
+        )
     
     for content in trending_content:
         content.is_new_release = (content.release_date.year == current_year)
-
-    recent_content = Content.objects.order_by('-created_at')[:6]
-    
-    popular_genres = Content.objects.values('genre').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    context = {
+    return {
         'trending_content': trending_content,
-        'recent_content': recent_content,
-        'popular_genres': popular_genres,
-        'total_content': Content.objects.count(),
         'current_year': current_year,
+        'impression_ids': [c.pk for c in trending_content],
+    }
+
+
+def home_recent_section(request):
+    return {'recent_content': list(Content.objects.cards().order_by('-created_at')[:6])}
+
+
+def dashboard_stats_section(user, profile):
+    return {
+        'profile': profile,
+        'watchlist_count': Watchlist.objects.filter(user=user).count(),
+        'ratings_count': Rating.objects.filter(user=user).count(),
+        'reviews_count': Review.objects.filter(user=user).count(),
     }
-    return render(request, 'recommendox/home.html', context)
+
+
+def dashboard_recommendations_section(user, variant):
+    recommendations, _ = ranked_recommendations(user, variant=variant)
+    return {'recommendations': recommendations, 'impression_ids': [c.pk for c in recommendations]}
+
+
+def dashboard_watchlist_section(user):
+    return {'watchlist': list(Content.objects.cards().filter(
+        id__in=Watchlist.objects.filter(user=user).values_list('content_id', flat=True)
+    )[:6])}
+
+
+def dashboard_ratings_section(user):
+    return {'user_ratings': list(Rating.objects.filter(user=user).select_related('content').order_by('-rating_date')[:5])}
+
+#PUBLIC VIEWS
+def home(request):
+    """Public home page, composed from independently cached sections"""
+    viewed = recently_viewed(request)
+    variant = assign_variant('home', visitor_id(request))
+    sections, timings = feed_composer.compose(request, [
+        Section('home_genres', 'recommendox/feed/home_genres.html', home_genres_section, 'feed:home_genres', ttl=300),
+        Section(
+            'home_because', 'recommendox/feed/home_because.html', lambda request: home_because_section(viewed),
+            f"feed:home_because:{'.'.join(map(str, viewed))}", ttl=300, surface='home_because', variant='similar',
+        ),
+        Section(
+            'home_trending', 'recommendox/feed/home_trending.html', home_trending_section, 'feed:home_trending',
+            surface='home', variant=variant,
+        ),
+        Section('home_recent', 'recommendox/feed/home_recent.html', home_recent_section, 'feed:home_recent'),
+    ])
+    response = render(request, 'recommendox/home.html', {'sections': sections})
+    response['Server-Timing'] = server_timing(timings)
+    return remember_visitor(request, response)
 
 
 def content_list(request):
@@ -137,52 +183,57 @@ def content_list(request):
     search = request.GET.get('search')
     sort_by = request.GET.get('sort', 'newest') 
   
-    content_ids = Content.objects.all().values_list('id', flat=True)
-   
-    if genre:
-        content_ids = content_ids.filter(genre=genre)
-    if language:
-        content_ids = content_ids.filter(language=language)
-    if content_type:
-        content_ids = content_ids.filter(content_type=content_type)
-   
+    decade = request.GET.get('decade')
+    filters = {'genre': genre, 'language': language, 'content_type': content_type, 'decade': decade}
+    
+    # Facet filters are bitset ANDs on the catalogue index; only search hits the database
+    mask = -1
     if search:
-        content_ids = content_ids.filter(
+        mask = bits_of(Content.objects.filter(
             Q(title__icontains=search) |
             Q(description__icontains=search) |
             Q(director__icontains=search) |
             Q(cast__icontains=search)
-        )
+        ).values_list('id', flat=True))
+    matching = catalog_index.match(filters) & mask
     
-    content_ids = content_ids.distinct()
-    content_list = Content.objects.filter(id__in=content_ids)
     if sort_by == 'rating':
-        content_list = content_list.annotate(
-            rating_avg=Avg('ratings__rating_value')
-        ).order_by('-rating_avg', '-release_date')
-    elif sort_by == 'oldest':
-        content_list = content_list.order_by('release_date')
-    elif sort_by == 'title_asc':
-        content_list = content_list.order_by('title')
-    elif sort_by == 'title_desc':
-        content_list = content_list.order_by('-title')
-    else:  
-        content_list = content_list.order_by('-release_date')
+        # Walk the most specific leaderboard and keep the ids that pass the filters
+        board = next(((d, v) for d, v in (('genre', genre), ('language', language),
+                                           ('content_type', content_type)) if v), ('all', ''))
+        wanted = set(members(matching))
+        content_list = [content_id for content_id in leaderboards.ranked_ids(*board) if content_id in wanted]
+        # Titles this worker's boards haven't picked up yet (added elsewhere) follow in DB order
+        unranked = wanted.difference(content_list)
+        if unranked:
+            content_list += list(
+                Content.objects.filter(pk__in=unranked).with_rating_avg()
+                .order_by(F('rating_avg').desc(nulls_last=True), '-rating_count', '-id')
+                .values_list('id', flat=True)
+            )
+    else:
+        content_list = catalog_index.ordered_ids(matching, sort_by)
     
     paginator = Paginator(content_list, 12)
     page = request.GET.get('page')
     content = paginator.get_page(page)
+    content.object_list = ranked_cards(list(content.object_list))
     
-    genres = Content.objects.values_list('genre', flat=True).distinct()
-    languages = Content.objects.values_list('language', flat=True).distinct()
+    type_labels = {'Movie': 'Movies', 'Web Series': 'Web Series', 'TV Show': 'TV Shows', 'Documentary': 'Documentaries'}
+    type_facets = catalog_index.facet_counts('content_type', filters, mask)
+    for facet in type_facets:
+        facet['label'] = type_labels.get(facet['value'], facet['value'])
     
     context = {
         'content': content,
-        'genres': genres,
-        'languages': languages,
+        'genres': catalog_index.facet_counts('genre', filters, mask),
+        'languages': catalog_index.facet_counts('language', filters, mask),
+        'content_types': type_facets,
+        'decades': catalog_index.facet_counts('decade', filters, mask),
         'selected_genre': genre,
         'selected_language': language,
         'selected_type': content_type,
+        'selected_decade': decade,
         'search_query': search,
         'sort_by': sort_by,
     }
@@ -191,9 +242,11 @@ def content_list(request):
 
 def content_detail(request, content_id):
     """Content detail page with prioritized reviews"""
-    content = get_object_or_404(Content, id=content_id)
+    content = get_content_or_404(content_id)
     
     increment_content_views(content)
+    log_event('view', content.pk, request.user.pk)
+    log_click(request.GET.get('imp'), content.pk, request.user.pk)
     
     user_rating = None
     in_watchlist = False
@@ -205,11 +258,10 @@ def content_detail(request, content_id):
         
         in_watchlist = Watchlist.objects.filter(user=request.user, content=content).exists()
   
-    similar_content = Content.objects.filter(
-        genre=content.genre
-    ).exclude(id=content_id).annotate(
-        rating_avg=Avg('ratings__rating_value')
-    ).order_by('-rating_avg')[:4]
+    similar_content = ranked_cards(
+        similarity_index.similar_ids(content.id, 4)
+        or leaderboards.top('genre', content.genre, 4, exclude={content.id})
+    )
     
     all_reviews = Review.objects.filter(content=content).select_related('user')
     
@@ -219,21 +271,78 @@ def content_detail(request, content_id):
     from itertools import chain
     reviews = list(chain(reviewer_reviews, regular_reviews))
     
+    because_viewed = because_you_viewed(
+        recently_viewed(request), seeds=1, per_seed=3, exclude={content.id} | {c.id for c in similar_content}
+    )
+    
+    seasons = []
+    if content.content_type != 'Movie':
+        series = get_series_tree(content.id)
+        seasons = series.seasons.all() if series else []
+    
     context = {
         'content': content,
+        'seasons': seasons,
         'user_rating': user_rating,
         'in_watchlist': in_watchlist,
         'similar_content': similar_content,
         'reviews': reviews,  
+        'because_viewed': because_viewed,
+        'because_impression_id': log_impression(
+            'detail_because', 'similar', [c.pk for _, cards in because_viewed for c in cards], request.user.pk
+        ),
     }
-    return render(request, 'recommendox/content_detail.html', context)
+    return remember_view(request, render(request, 'recommendox/content_detail.html', context), content.pk)
 
+@require_GET
+def serve_poster(request, digest, variant):
+    """Serve a resized poster; names are content-addressed so they never change"""
+    if variant not in POSTER_VARIANTS:
+        raise Http404
+    fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+    etag = f'"{digest}-{variant}-{fmt}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        storage = poster_storage()
+        name = variant_name(digest, variant, fmt)
+        if not storage.exists(name):
+            raise Http404
+        response = FileResponse(storage.open(name, 'rb'), content_type=POSTER_FORMATS[fmt][1])
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={POSTER_CACHE_SECONDS}, immutable'
+    response['Expires'] = http_date(timezone.now().timestamp() + POSTER_CACHE_SECONDS)
+    response['Vary'] = 'Accept'
+    return response
+
+@sqlite_write
 def increment_content_views(content):
-    """Increment view count for content"""
+    """Increment view count for content (atomic, so concurrent views are not lost)"""
+    Content.objects.filter(pk=content.pk).update(views_count=F('views_count') + 1)
+    record_event(content.pk, 'view')
     content.views_count += 1
-    content.save(update_fields=['views_count'])
     return content.views_count
 
+@sqlite_write
+def save_rating(user, content, rating_value):
+    return Rating.objects.update_or_create(
+        user=user,
+        content=content,
+        defaults={'rating_value': rating_value}
+    )
+
+@sqlite_write
+def save_review(user, content, comment, is_verified):
+    return Review.objects.create(
+        user=user,
+        content=content,
+        comment=comment,
+        is_approved=True,
+        is_verified=is_verified
+    )
+
 def register(request):
     """User registration"""
     if request.method == 'POST':
@@ -281,26 +390,53 @@ def user_dashboard(request):
     """User dashboard"""
     user = request.user
     profile, created = UserProfile.objects.get_or_create(user=user)  
-    user_is_reviewer = is_reviewer(user)
-
-    watchlist = Content.objects.filter(
-        id__in=Watchlist.objects.filter(user=user).values_list('content_id', flat=True)
-    )[:6]
- 
-    user_ratings = Rating.objects.filter(user=user).order_by('-rating_date')[:5]   
-    user_reviews = Review.objects.filter(user=user).order_by('-review_date')[:5]   
-    recommendations = get_personalized_recommendations(user)
+    version = feed_version(user.pk)
+    variant = assign_variant('dashboard', visitor_id(request))
+    sections, timings = feed_composer.compose(request, [
+        Section(
+            'dashboard_stats', 'recommendox/feed/dashboard_stats.html',
+            lambda request: dashboard_stats_section(user, profile), f'feed:dashboard_stats:{user.pk}:{version}', ttl=300,
+        ),
+        Section(
+            'dashboard_recommendations', 'recommendox/feed/dashboard_recommendations.html',
+            lambda request: dashboard_recommendations_section(user, variant),
+            f'feed:dashboard_recommendations:{user.pk}:{version}:{variant}', surface='dashboard', variant=variant,
+        ),
+        Section(
+            'dashboard_watchlist', 'recommendox/feed/dashboard_watchlist.html',
+            lambda request: dashboard_watchlist_section(user), f'feed:dashboard_watchlist:{user.pk}:{version}', ttl=300,
+        ),
+        Section(
+            'dashboard_ratings', 'recommendox/feed/dashboard_ratings.html',
+            lambda request: dashboard_ratings_section(user), f'feed:dashboard_ratings:{user.pk}:{version}', ttl=300,
+        ),
+    ])
     
     context = {
         'user': user,
         'profile': profile,
-        'watchlist': watchlist,
-        'user_ratings': user_ratings,
-        'user_reviews': user_reviews,
-        'recommendations': recommendations,
-        'is_reviewer': user_is_reviewer,
+        'sections': sections,
+        'needs_onboarding': not (profile.favorite_genres or profile.preferred_languages),
     }
-    return render(request, 'recommendox/user_dashboard.html', context)
+    response = render(request, 'recommendox/user_dashboard.html', context)
+    response['Server-Timing'] = server_timing(timings)
+    return response
+
+
+@login_required
+def onboarding(request):
+    """Pick favourite genres and languages for cold-start recommendations"""
+    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    if request.method == 'POST':
+        form = OnboardingForm(request.POST, profile=profile)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Preferences saved! Your recommendations have been updated.')
+            return redirect('recommendox:user_dashboard')
+    else:
+        form = OnboardingForm(profile=profile)
+
+    return render(request, 'recommendox/onboarding.html', {'form': form})
 
 
 @login_required
@@ -309,7 +445,7 @@ def manage_watchlist(request):
     if request.method == 'POST':
         content_id = request.POST.get('content_id')
         action = request.POST.get('action')
-        content = get_object_or_404(Content, id=content_id)
+        content = get_content_or_404(content_id)
         
         if action == 'add':
             Watchlist.objects.get_or_create(user=request.user, content=content)
@@ -324,16 +460,12 @@ def manage_watchlist(request):
 @login_required
 def rate_content(request, content_id):
     """Rate content"""
-    content = get_object_or_404(Content, id=content_id)
+    content = get_content_or_404(content_id)
     
     if request.method == 'POST':
         rating_value = request.POST.get('rating')
         if rating_value and 1 <= int(rating_value) <= 5:
-            Rating.objects.update_or_create(
-                user=request.user,
-                content=content,
-                defaults={'rating_value': rating_value}
-            )
+            save_rating(request.user, content, int(rating_value))
             messages.success(request, f'You rated "{content.title}" {rating_value}/5!')
     
     return redirect('recommendox:content_detail', content_id=content_id)
@@ -341,7 +473,7 @@ def rate_content(request, content_id):
 @login_required
 def add_review(request, content_id):
     """Add review for content - Auto-approved for everyone"""
-    content = get_object_or_404(Content, id=content_id)
+    content = get_content_or_404(content_id)
     
     if request.method == 'POST':
         comment = request.POST.get('comment')
@@ -352,13 +484,7 @@ def add_review(request, content_id):
             except:
                 pass
    
-            review = Review.objects.create(
-                user=request.user,
-                content=content,
-                comment=comment,
-                is_approved=True,          
-                is_verified=is_reviewer      
-            )
+            review = save_review(request.user, content, comment, is_reviewer)
           
             messages.success(request, 'Your review has been posted!')
     
@@ -423,7 +549,7 @@ def creator_dashboard(request):
         creator = user.profile.creator_profile
     except:
         pass
-    recent_content = Content.objects.order_by('-created_at')[:10]
+    recent_content = Content.objects.cards().order_by('-created_at')[:10]
    
     total_content = Content.objects.count()
     recent_count = Content.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).count()
@@ -441,7 +567,7 @@ def creator_dashboard(request):
 def manage_content(request):
     """Content management for admin and creators"""
     if request.method == 'POST':
-        form = ContentForm(request.POST)
+        form = ContentForm(request.POST, request.FILES)
         if form.is_valid():
           
             content = form.save()
@@ -475,13 +601,13 @@ def manage_content(request):
 @staff_member_required 
 def edit_content(request, content_id):
     """Edit content - works for both admin and creators"""
-    content = get_object_or_404(Content, id=content_id)
+    content = get_content_or_404(content_id)
     
     from .models import ContentOTT
     ott = ContentOTT.objects.filter(content=content).first()
     
     if request.method == 'POST':
-        form = ContentForm(request.POST, instance=content)
+        form = ContentForm(request.POST, request.FILES, instance=content)
         if form.is_valid():
             form.save()
             
@@ -527,28 +653,20 @@ def delete_content(request, content_id):
 def admin_dashboard(request):
     """Admin dashboard"""
    
-    total_users = User.objects.count()
-    total_content = Content.objects.count()
-    total_reviews = Review.objects.count()
-    pending_reviews = Review.objects.filter(is_approved=False).count()
-    approved_reviews = Review.objects.filter(is_approved=True).count()
-    total_reviewers = Reviewer.objects.count()
-    total_creators = ContentCreator.objects.count()
-  
-    pending_golden = GoldenUser.objects.filter(verification_status='Pending').count()
+    stats = SiteStats.current()
     
     recent_content = Content.objects.order_by('-created_at')[:5]
     recent_reviews = Review.objects.order_by('-review_date')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_content': total_content,
-        'total_reviews': total_reviews,
-        'pending_reviews': pending_reviews,
-        'approved_reviews': approved_reviews,
-        'total_reviewers': total_reviewers,
-        'total_creators': total_creators,
-        'pending_golden': pending_golden,  
+        'total_users': stats.total_users,
+        'total_content': stats.total_content,
+        'total_reviews': stats.total_reviews,
+        'pending_reviews': stats.pending_reviews,
+        'approved_reviews': stats.approved_reviews,
+        'total_reviewers': stats.total_reviewers,
+        'total_creators': stats.total_creators,
+        'pending_golden': stats.golden_pending,
         'recent_content': recent_content,
         'recent_reviews': recent_reviews,
     }
@@ -711,15 +829,13 @@ def admin_manage_reviews(request):
         messages.success(request, f'Review by {username} on "{content_title}" deleted.')
         return redirect('recommendox:admin_manage_reviews')
    
-    total_reviews = Review.objects.count()
-    reviewer_count = Review.objects.filter(is_verified=True).count()
-    regular_count = Review.objects.filter(is_verified=False).count()
+    stats = SiteStats.current()
     
     context = {
         'reviews': reviews,
-        'total_reviews': total_reviews,
-        'reviewer_count': reviewer_count,
-        'regular_count': regular_count,
+        'total_reviews': stats.total_reviews,
+        'reviewer_count': stats.verified_reviews,
+        'regular_count': stats.regular_reviews,
         'filter': filter_by,
     }
     return render(request, 'recommendox/admin_manage_reviews.html', context)
@@ -731,19 +847,24 @@ def ott_browse(request):
     platform = request.GET.get('platform', '')
     free_only = request.GET.get('free_only') == 'True'
     
-    content_list = Content.objects.filter(ott_platforms__isnull=False).distinct()
+    filters = {'ott': True, 'platform': platform, 'free': free_only}
+    content_ids = catalog_index.ordered_ids(catalog_index.match(filters), 'newest')
     
-    if platform:
-        content_list = content_list.filter(ott_platforms__platform_name=platform)
-    
-    if free_only:
-        content_list = content_list.filter(ott_platforms__is_free=True)
-    paginator = Paginator(content_list, 12)
+    paginator = Paginator(content_ids, 12)
     page = request.GET.get('page')
     contents = paginator.get_page(page)
+    cards = Content.objects.cards().prefetch_related('ott_platforms').in_bulk(contents.object_list)
+    contents.object_list = [cards[content_id] for content_id in contents.object_list if content_id in cards]
+    
+    platform_labels = dict(ContentOTT.OTT_CHOICES)
+    platforms = catalog_index.facet_counts('platform', filters)
+    for facet in platforms:
+        facet['label'] = platform_labels.get(facet['value'], facet['value'])
     
     context = {
         'page_obj': contents,
+        'platforms': platforms,
+        'free_count': catalog_index.count({**filters, 'free': True}),
         'selected_platform': platform,
         'free_only': free_only,
     }
@@ -858,6 +979,21 @@ def become_golden_user(request):
     professions = GoldenUser.PROFESSION_CHOICES
     return render(request, 'recommendox/become_golden.html', {'professions': professions})
 
+def compute_genre_stats():
+    """Average rating per genre, read from the precomputed catalog rollups"""
+    return [
+        {'genre': row.value, 'avg_rating': row.avg_rating, 'count': row.content_count}
+        for row in catalog_stats('genre')
+    ]
+
+def compute_ott_stats():
+    """Average rating per OTT platform, best first, from the catalog rollups"""
+    stats = [
+        {'platform_name': row.value, 'avg_rating': row.avg_rating, 'count': row.content_count}
+        for row in catalog_stats('platform') if row.content_count > 0
+    ]
+    return sorted(stats, key=lambda s: (s['avg_rating'] is None, -(s['avg_rating'] or 0)))
+
 @login_required
 @golden_user_required
 def golden_dashboard(request):
@@ -896,6 +1032,9 @@ def golden_dashboard(request):
     else:
         my_content = Content.objects.none()
     
+    if my_content is not None:
+        my_content = my_content.cards().prefetch_related('ott_platforms')
+    
     my_content_ids = my_content.values_list('id', flat=True) if my_content else []
     
     my_stats = {
@@ -912,21 +1051,12 @@ def golden_dashboard(request):
     else:
         my_genre_list = list(my_content.values_list('genre', flat=True).distinct())
     
-    trending_in_genre = Content.objects.filter(
-        genre__in=my_genre_list
-    ).exclude(
-        id__in=my_content_ids
-    ).annotate(
-        rating_avg=Avg('ratings__rating_value')
-    ).order_by('-rating_avg')[:8]
-    
-    genre_stats = Content.objects.values('genre').annotate(
-        avg_rating=Avg('ratings__rating_value')
-    ).order_by('genre')
-  
-    ott_stats = ContentOTT.objects.values('platform_name').annotate(
-        avg_rating=Avg('content__ratings__rating_value')
-    ).order_by('-avg_rating')
+    trending_in_genre = ranked_cards(
+        leaderboards.top_across('genre', my_genre_list, 8, exclude=set(my_content_ids))
+    )
+    
+    genre_stats = compute_genre_stats()
+    ott_stats = compute_ott_stats()
     
     if my_content_ids:
         recent_feedback = Review.objects.filter(
@@ -951,31 +1081,36 @@ def golden_dashboard(request):
 @golden_user_required
 def golden_content_analytics(request, content_id):
     """Detailed analytics for specific content"""
-    content = get_object_or_404(Content, id=content_id)
+    content = get_content_or_404(content_id)
    
     golden = request.user.profile.golden_profile
     golden.increment_content_views()
     
     increment_content_views(content)
+    log_event('view', content.pk, request.user.pk)
 
-    rating_stats = Rating.objects.filter(content=content).values('rating_value').annotate(
-        count=Count('id')
-    ).order_by('rating_value')
+    analytics = Analytics.objects.filter(content=content).first() or Analytics(content=content)
+    rating_stats = analytics.rating_histogram()
     
     reviews = Review.objects.filter(content=content, is_approved=True).select_related('user')
     
     ott_availability = ContentOTT.objects.filter(content=content)
     
-    similar_content = Content.objects.filter(genre=content.genre).exclude(id=content_id)[:5]
+    similar_content = ranked_cards(
+        similarity_index.similar_ids(content.id, 5)
+        or leaderboards.top('genre', content.genre, 5, exclude={content.id})
+    )
     
     context = {
         'content': content,
         'rating_stats': rating_stats,
-        'total_ratings': Rating.objects.filter(content=content).count(),
+        'total_ratings': content.rating_count,
         'avg_rating': content.avg_rating,
+        'weekly_trend': activity_trend(content.id, 'week', 12),
         'reviews': reviews,
         'total_reviews': reviews.count(),
         'total_views': content.views_count,
+        'recent_activity': recent_interactions(content.id, hours=24),
         'ott_availability': ott_availability,
         'similar_content': similar_content,
         'golden': golden,
@@ -1025,17 +1160,14 @@ def verify_golden_users(request):
         golden.save()
         return redirect('recommendox:verify_golden_users')
   
-    pending_count = GoldenUser.objects.filter(verification_status='Pending').count()
-    verified_count = GoldenUser.objects.filter(verification_status='Verified').count()
-    rejected_count = GoldenUser.objects.filter(verification_status='Rejected').count()
-    total_count = GoldenUser.objects.count()
+    stats = SiteStats.current()
     
     context = {
         'applications': applications,
         'status_filter': status_filter,
-        'pending_count': pending_count,
-        'verified_count': verified_count,
-        'rejected_count': rejected_count,
-        'total_count': total_count,
+        'pending_count': stats.golden_pending,
+        'verified_count': stats.golden_verified,
+        'rejected_count': stats.golden_rejected,
+        'total_count': stats.total_golden,
     }
     return render(request, 'recommendox/verify_golden.html', context)
\ No newline at end of file